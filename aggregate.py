@@ -0,0 +1,336 @@
+"""Build the per-geography turnout CSVs from a raw voter roll.
+
+The roll is a CSV with one row per registered voter: the five geography
+columns below plus a `voted` flag (1/0, true/false or y/n). It is read in
+chunks and every chunk is grouped by all five geographies at once, so the
+file is read a single time and memory stays bounded by the chunk size and
+the number of distinct regions, however many rows the roll has.
+
+With --workers N the roll is split into N byte ranges on line boundaries
+(quoted fields must not contain newlines); each worker process streams its
+own range and the partial counts are summed at the end, giving exactly the
+same tables as a serial run.
+
+On election night, --delta applies a batch of newly voted records (same
+geography columns, one row per voter who has now voted) to the CSVs in
+--out-dir, which double as the persisted per-region counters. Only the rows
+of regions in the batch change; every other line is left as it was. Each
+batch is recorded under its id (--batch-id, or a hash of its voter_id
+column) so applying the same batch twice is a no-op, while two batches that
+happen to have the same contents are both counted. New CSVs are staged next
+to the old ones and the ledger records the batch as pending before any of
+them is swapped in, so an interrupted batch is completed on the next run
+instead of being lost or counted twice.
+
+Usage:
+    python aggregate.py voter_roll.csv [--out-dir .] [--chunksize 500000] [--workers 4]
+    python aggregate.py ballots_batch.csv --delta [--batch-id 2024-11-05T21:00] [--out-dir .]
+"""
+import argparse
+import csv
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from boundaries import json_writer, write_atomic
+
+# Geography column in the roll -> CSV the dashboards read
+OUTPUTS = {
+    "County": "Voter_Counties_data.csv",
+    "City": "preprocessed_ld_data_City.csv",
+    "School District": "Voter_SD_data.csv",
+    "Legislative District": "preprocessed_ld_data.csv",
+    "Congressional District": "preprocessed_ld_data_Congressional District.csv",
+}
+VOTED_COLUMN = "voted"
+VOTED_VALUES = ("1", "1.0", "true", "t", "yes", "y")
+CHUNKSIZE = 500_000
+VOTER_ID_COLUMN = "voter_id"
+# Ids of the delta batches already applied to a folder of CSVs, and the
+# batch being swapped in, if any
+APPLIED_DELTAS = ".applied_deltas.json"
+
+
+def read_roll(path, chunksize=CHUNKSIZE):
+    # Iterate over the roll in chunks, reading only the columns we need.
+    # Keys stay strings so they are written out exactly as they appear.
+    return pd.read_csv(
+        path,
+        usecols=list(OUTPUTS) + [VOTED_COLUMN],
+        dtype=str,
+        chunksize=chunksize,
+    )
+
+
+def voted_flags(values):
+    # 1 for voters, 0 for everyone else (missing counts as not voted)
+    return values.fillna("").str.strip().str.lower().isin(VOTED_VALUES).astype("int64")
+
+
+def aggregate_chunk(chunk):
+    # Partial counts of one chunk: {geography: DataFrame(total_population,
+    # voters) indexed by region}. Rows without a region are left out of
+    # that geography only.
+    chunk = chunk.assign(**{VOTED_COLUMN: voted_flags(chunk[VOTED_COLUMN])})
+    partials = {}
+    for column in OUTPUTS:
+        grouped = chunk.groupby(column)[VOTED_COLUMN]
+        partials[column] = pd.DataFrame({"total_population": grouped.size(), "voters": grouped.sum()})
+    return partials
+
+
+def merge_partials(left, right):
+    # Sum two sets of partial counts region by region
+    if left is None:
+        return right
+    return {
+        column: pd.concat([left[column], right[column]]).groupby(level=0).sum()
+        for column in OUTPUTS
+    }
+
+
+def finalize(counts):
+    # Turn summed counts into the dashboard tables, sorted by region
+    tables = {}
+    for column, table in counts.items():
+        table = table.sort_index().astype("int64")
+        table["non_voters"] = table["total_population"] - table["voters"]
+        table["voter_rate"] = table["voters"] / table["total_population"]
+        table.index.name = column
+        tables[column] = table.reset_index()
+    return tables
+
+
+class _RangeFile:
+    # Read-only view of an open binary file that ends at byte `end`
+    def __init__(self, file, end):
+        self._file = file
+        self._remaining = end - file.tell()
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def __iter__(self):
+        return iter(lambda: self.read(1 << 16), b"")
+
+
+def split_roll(path, parts):
+    # Cut the rows of the roll into at most `parts` byte ranges that start
+    # and end on line boundaries
+    size = os.path.getsize(path)
+    with open(path, "rb") as file:
+        file.readline()  # Header
+        bounds = [file.tell()]
+        for part in range(1, parts):
+            target = bounds[0] + (size - bounds[0]) * part // parts
+            if target <= bounds[-1]:
+                continue
+            file.seek(target)
+            file.readline()  # Finish the line the cut landed in
+            if file.tell() < size:
+                bounds.append(file.tell())
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def aggregate_range(path, start, end, chunksize=CHUNKSIZE):
+    # Partial counts of the rows between two line boundaries (None if empty)
+    with open(path, "rb") as file:
+        columns = next(csv.reader([file.readline().decode("utf-8-sig")]))
+        file.seek(start)
+        chunks = pd.read_csv(
+            _RangeFile(file, end),
+            names=columns,
+            header=None,
+            usecols=list(OUTPUTS) + [VOTED_COLUMN],
+            dtype=str,
+            chunksize=chunksize,
+        )
+        counts = None
+        for chunk in chunks:
+            counts = merge_partials(counts, aggregate_chunk(chunk))
+    return counts
+
+
+def aggregate_roll(path, chunksize=CHUNKSIZE, workers=1):
+    # Streaming pass over the roll, only the running totals are kept. With
+    # several workers each process streams its own slice of the file.
+    counts = None
+    if workers <= 1:
+        for chunk in read_roll(path, chunksize):
+            counts = merge_partials(counts, aggregate_chunk(chunk))
+    else:
+        ranges = split_roll(path, workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(aggregate_range, path, start, end, chunksize) for start, end in ranges]
+            for future in futures:
+                partial = future.result()
+                if partial is not None:
+                    counts = merge_partials(counts, partial)
+    if counts is None:
+        raise ValueError(f"{path} has no rows")
+    return finalize(counts)
+
+
+def write_outputs(tables, out_dir="."):
+    # Write every table to its dashboard CSV; returns the paths written
+    paths = []
+    for column, table in tables.items():
+        path = os.path.join(out_dir, OUTPUTS[column])
+        write_atomic(path, lambda temp_path: table.to_csv(temp_path, index=False))
+        paths.append(path)
+    return paths
+
+
+def canonical_keys(keys):
+    # Region keys as compared across files: "1", "1.0" and " 1" are the same
+    # legislative district
+    keys = pd.Series(keys, dtype=str).str.strip().reset_index(drop=True)
+    numbers = pd.to_numeric(keys, errors="coerce")
+    return keys.where(numbers.isna(), numbers.map("{:g}".format))
+
+
+def count_delta(delta_path, chunksize=CHUNKSIZE):
+    # New votes per region in a delta batch: {geography: Series}. Every row
+    # is a new vote unless the batch has a voted column saying otherwise.
+    counts = None
+    chunks = pd.read_csv(
+        delta_path,
+        usecols=lambda name: name in OUTPUTS or name == VOTED_COLUMN,
+        dtype=str,
+        chunksize=chunksize,
+    )
+    for chunk in chunks:
+        if VOTED_COLUMN not in chunk.columns:
+            chunk[VOTED_COLUMN] = "1"
+        counts = merge_partials(counts, aggregate_chunk(chunk))
+    if counts is None:
+        return {column: pd.Series(dtype="int64") for column in OUTPUTS}
+    return {column: table["voters"][table["voters"] > 0] for column, table in counts.items()}
+
+
+def _apply_votes(table, column, votes):
+    # Add new votes to the matching rows of one CSV (read as text), leaving
+    # all other rows untouched. Returns the number of rows changed.
+    votes = votes.groupby(canonical_keys(votes.index).to_numpy()).sum()
+    keys = canonical_keys(table[column])
+    unknown = votes.index.difference(keys)
+    if len(unknown):
+        raise ValueError(f"{column}: regions not in the counters: {unknown.tolist()}")
+
+    rows = keys.isin(votes.index).to_numpy()
+    total = table.loc[rows, "total_population"].astype(float).astype("int64")
+    voters = table.loc[rows, "voters"].astype(float).astype("int64") + votes.reindex(keys[rows]).to_numpy()
+    if (voters > total).any():
+        raise ValueError(f"{column}: more voters than people on the roll after the delta")
+
+    table.loc[rows, "voters"] = voters.astype(str)
+    table.loc[rows, "non_voters"] = (total - voters).astype(str)
+    table.loc[rows, "voter_rate"] = (voters / total).astype(str)
+    return int(rows.sum())
+
+
+def batch_id(delta_path, chunksize=CHUNKSIZE):
+    # Id of a delta batch: a hash of its sorted voter ids, so the same
+    # voters make the same batch however the file is laid out
+    try:
+        chunks = pd.read_csv(delta_path, usecols=[VOTER_ID_COLUMN], dtype=str, chunksize=chunksize)
+        ids = pd.concat([chunk[VOTER_ID_COLUMN] for chunk in chunks], ignore_index=True)
+    except ValueError:
+        raise ValueError(f"{delta_path} has no {VOTER_ID_COLUMN} column; pass a batch id") from None
+    digest = hashlib.sha256("\n".join(ids.sort_values()).encode())
+    return "voters:" + digest.hexdigest()
+
+
+def _read_ledger(out_dir):
+    # {"applied": [batch ids], "pending": {"batch": id, "files": [CSV names]} or None}
+    try:
+        with open(os.path.join(out_dir, APPLIED_DELTAS), "r") as file:
+            ledger = json.load(file)
+    except (OSError, ValueError):
+        ledger = {}
+    if isinstance(ledger, list):  # Older ledgers: a plain list
+        ledger = {"applied": ledger}
+    return {"applied": ledger.get("applied", []), "pending": ledger.get("pending")}
+
+
+def _write_ledger(out_dir, ledger):
+    write_atomic(os.path.join(out_dir, APPLIED_DELTAS), json_writer(ledger))
+
+
+def _staged_path(out_dir, csv_name):
+    return os.path.join(out_dir, csv_name + ".pending")
+
+
+def _finish_pending(out_dir, ledger):
+    # Swap in the staged CSVs of a batch interrupted after it was recorded
+    pending = ledger["pending"]
+    if pending is None:
+        return ledger
+    for csv_name in pending["files"]:
+        staged = _staged_path(out_dir, csv_name)
+        if os.path.exists(staged):
+            os.replace(staged, os.path.join(out_dir, csv_name))
+    ledger = {"applied": ledger["applied"], "pending": None}
+    _write_ledger(out_dir, ledger)
+    return ledger
+
+
+def apply_delta(delta_path, out_dir=".", batch=None):
+    # Apply one batch of newly voted records to the five CSVs in out_dir,
+    # recorded under batch (default: batch_id of the file). Returns
+    # {geography: rows changed}, or None if the batch was already applied.
+    # Nothing is written unless every layer accepts the batch.
+    ledger = _finish_pending(out_dir, _read_ledger(out_dir))
+    batch = batch or batch_id(delta_path)
+    if batch in ledger["applied"]:
+        return None
+
+    votes = count_delta(delta_path)
+    tables = {}
+    changed = {}
+    for column, csv_name in OUTPUTS.items():
+        table = pd.read_csv(os.path.join(out_dir, csv_name), dtype=str, keep_default_na=False)
+        changed[column] = _apply_votes(table, column, votes[column])
+        tables[column] = table
+
+    # Stage every new CSV, then record the batch (the commit point), then
+    # swap the staged files in
+    files = [OUTPUTS[column] for column, rows in changed.items() if rows]
+    for column, table in tables.items():
+        if changed[column]:
+            table.to_csv(_staged_path(out_dir, OUTPUTS[column]), index=False)
+    ledger = {"applied": ledger["applied"] + [batch], "pending": {"batch": batch, "files": files}}
+    _write_ledger(out_dir, ledger)
+    _finish_pending(out_dir, ledger)
+    return changed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate a voter roll into the per-geography turnout CSVs.")
+    parser.add_argument("roll", help="Voter roll CSV (one row per voter), or a delta batch with --delta")
+    parser.add_argument("--delta", action="store_true", help="Apply the file as a batch of new votes")
+    parser.add_argument("--batch-id", help="Id the delta batch is recorded under (default: hash of its voter_id column)")
+    parser.add_argument("--out-dir", default=".", help="Folder to write the CSVs to")
+    parser.add_argument("--chunksize", type=int, default=CHUNKSIZE, help="Rows read per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (default: 1, no pool)")
+    args = parser.parse_args()
+
+    if args.delta:
+        changed = apply_delta(args.roll, args.out_dir, args.batch_id)
+        if changed is None:
+            print(f"{args.roll}: already applied")
+        for column, rows in (changed or {}).items():
+            print(f"{OUTPUTS[column]}: {rows} regions updated")
+        raise SystemExit(0)
+
+    tables = aggregate_roll(args.roll, args.chunksize, args.workers)
+    for path, table in zip(write_outputs(tables, args.out_dir), tables.values()):
+        print(f"{path}: {len(table)} regions, {table['total_population'].sum()} voters on the roll")
@@ -0,0 +1,195 @@
+"""Label anchor points for boundary features, persisted next to each GeoJSON.
+
+Anchors are area-weighted centroids computed with NumPy over every part of
+a Polygon or MultiPolygon (holes subtracted). When that point falls outside
+the shape -- island counties, crescent-shaped districts -- the centroid of
+the largest part is used instead, and failing that an interior point on a
+horizontal scanline through it.
+
+Usage:
+    python anchors.py WA_County_Boundaries.geojson --key JURISDICT_NM
+"""
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from boundaries import file_hash, file_signature, json_writer, load_geojson, write_atomic, write_cache
+from spans import span
+
+# Anchor tables already loaded in this process, keyed by (path, key property)
+_loaded = {}
+_lock = threading.Lock()
+
+
+def _ring_area_centroid(ring):
+    # Signed area and centroid of a closed ring (shoelace formula)
+    ring = np.asarray(ring, dtype=float)[:, :2]
+    x, y = ring[:, 0], ring[:, 1]
+    x0, y0 = x[:-1], y[:-1]
+    x1, y1 = x[1:], y[1:]
+    cross = x0 * y1 - x1 * y0
+    area = cross.sum() / 2
+    if area == 0:
+        return 0.0, x.mean(), y.mean()
+    cx = ((x0 + x1) * cross).sum() / (6 * area)
+    cy = ((y0 + y1) * cross).sum() / (6 * area)
+    return area, cx, cy
+
+
+def _polygon_area_centroid(polygon):
+    # Area and centroid of one polygon: the outer ring minus its holes
+    total, sum_x, sum_y = 0.0, 0.0, 0.0
+    for index, ring in enumerate(polygon):
+        area, cx, cy = _ring_area_centroid(ring)
+        area = abs(area) if index == 0 else -abs(area)
+        total += area
+        sum_x += area * cx
+        sum_y += area * cy
+    if total == 0:
+        outer = np.asarray(polygon[0], dtype=float)
+        return 0.0, outer[:, 0].mean(), outer[:, 1].mean()
+    return total, sum_x / total, sum_y / total
+
+
+def _contains(polygon, x, y):
+    # Even-odd ray casting against all rings of the polygon at once
+    inside = False
+    for ring in polygon:
+        ring = np.asarray(ring, dtype=float)
+        x0, y0 = ring[:-1, 0], ring[:-1, 1]
+        x1, y1 = ring[1:, 0], ring[1:, 1]
+        straddles = (y0 > y) != (y1 > y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cross_x = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+        inside ^= bool(np.count_nonzero(straddles & (x < cross_x)) % 2)
+    return inside
+
+
+def _scanline_point(polygon, y):
+    # Midpoint of the widest span of the polygon along the horizontal line y
+    crossings = []
+    for ring in polygon:
+        ring = np.asarray(ring, dtype=float)
+        x0, y0 = ring[:-1, 0], ring[:-1, 1]
+        x1, y1 = ring[1:, 0], ring[1:, 1]
+        straddles = (y0 > y) != (y1 > y)
+        crossings.append(
+            x0[straddles] + (y - y0[straddles]) * (x1[straddles] - x0[straddles]) / (y1[straddles] - y0[straddles])
+        )
+    crossings = np.sort(np.concatenate(crossings))
+    if len(crossings) < 2:
+        return None
+    starts, ends = crossings[0::2], crossings[1::2]
+    widest = np.argmax(ends - starts[:len(ends)])
+    return (starts[widest] + ends[widest]) / 2, y
+
+
+def label_point(geometry):
+    # Best point to place a feature's label, as (lon, lat)
+    if geometry["type"] == "Polygon":
+        polygons = [geometry["coordinates"]]
+    elif geometry["type"] == "MultiPolygon":
+        polygons = geometry["coordinates"]
+    else:
+        raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+
+    parts = np.array([_polygon_area_centroid(polygon) for polygon in polygons])
+    areas = parts[:, 0]
+    if areas.sum() > 0:
+        lon = (areas * parts[:, 1]).sum() / areas.sum()
+        lat = (areas * parts[:, 2]).sum() / areas.sum()
+        if any(_contains(polygon, lon, lat) for polygon in polygons):
+            return float(lon), float(lat)
+
+    largest = int(np.argmax(areas))
+    _, lon, lat = parts[largest]
+    if _contains(polygons[largest], lon, lat):
+        return float(lon), float(lat)
+
+    # Nudge the scanline off any vertex latitude so crossings are well defined
+    point = _scanline_point(polygons[largest], lat + 1e-9)
+    if point is None:
+        return float(lon), float(lat)
+    return float(point[0]), float(point[1])
+
+
+def compute_anchors(geojson_data, key_property):
+    # One anchor per feature, in feature order
+    return [
+        [feature["properties"][key_property], *label_point(feature["geometry"])]
+        for feature in geojson_data["features"]
+    ]
+
+
+def sidecar_path(geojson_path):
+    root, _ = os.path.splitext(geojson_path)
+    return root + ".anchors.json"
+
+
+def _read_sidecar(path, source_hash, key_property):
+    try:
+        with open(path, "r") as file:
+            sidecar = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if sidecar.get("source_sha256") != source_hash or sidecar.get("key_property") != key_property:
+        return None
+    return sidecar["anchors"]
+
+
+def _sidecar_writer(geojson_path, key_property, anchors):
+    # (path, write function) of the sidecar for write_atomic/write_cache
+    sidecar = {
+        "source_sha256": file_hash(geojson_path),
+        "key_property": key_property,
+        "anchors": anchors,
+    }
+    return sidecar_path(geojson_path), json_writer(sidecar)
+
+
+def build_sidecar(geojson_path, key_property):
+    # Compute anchors for a boundary file and write them next to it
+    anchors = compute_anchors(load_geojson(geojson_path), key_property)
+    write_atomic(*_sidecar_writer(geojson_path, key_property, anchors))
+    return anchors
+
+
+def load_anchors(geojson_path, key_property):
+    # Label anchors as a DataFrame with columns name, lon and lat, one row per
+    # feature. Anchors come from the sidecar file when its hash matches the
+    # GeoJSON; otherwise they are computed once and the sidecar is refreshed.
+    key = (os.path.abspath(geojson_path), key_property)
+    signature = file_signature(geojson_path)
+    with _lock:
+        entry = _loaded.get(key)
+    if entry is not None and entry[0] == signature:
+        return entry[1].copy()
+
+    with span("anchor sidecar"):
+        anchors = _read_sidecar(sidecar_path(geojson_path), file_hash(geojson_path), key_property)
+    if anchors is None:
+        geojson_data = load_geojson(geojson_path)
+        with span("centroids"):
+            anchors = compute_anchors(geojson_data, key_property)
+        # Read-only deployment: the anchors are kept in memory only
+        write_cache(*_sidecar_writer(geojson_path, key_property, anchors))
+
+    anchor_df = pd.DataFrame(anchors, columns=["name", "lon", "lat"])
+    with _lock:
+        _loaded[key] = (signature, anchor_df)
+    return anchor_df.copy()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute label anchors for a boundary GeoJSON file.")
+    parser.add_argument("geojson", nargs="+", help="GeoJSON file(s) to process")
+    parser.add_argument("--key", required=True, help="Feature property that names each region")
+    args = parser.parse_args()
+
+    for path in args.geojson:
+        anchors = build_sidecar(path, args.key)
+        print(f"{sidecar_path(path)}: {len(anchors)} anchors")
@@ -0,0 +1,237 @@
+"""Read-only JSON API over the metrics both dashboards draw.
+
+Serves the same normalized, key-mapped tables the maps use (metrics.load_metrics),
+so other tools get exactly the numbers on screen without scraping:
+
+    GET /                                          dashboards, sections and their URLs
+    GET /<dashboard>/<section>                     every region's metrics
+    GET /<dashboard>/<section>/regions/<region>    one region's metrics
+    GET /<dashboard>/<section>/anchors             label anchor (lon, lat) per feature
+    GET /<dashboard>/<section>/bounds              bounding box per feature
+
+Dashboards and sections are addressed by slug (/voterchroplethmap/cities),
+regions by their boundary feature name, URL-quoted.
+
+Every response carries a strong ETag (a hash of its body, with "-gz"
+appended for the gzipped encoding) and Cache-Control: no-cache, so clients
+revalidate each poll and get an empty 304 while nothing changed;
+If-None-Match is honoured. Bodies are gzipped for clients whose
+Accept-Encoding allows it (gzip;q=0 refuses it). Numbers are written
+exactly as the CSV holds them (the tables keep rates as float64). Built
+responses are kept in memory until the CSV, boundary or key map file behind
+them changes, so a repeat request costs a dictionary lookup.
+
+Usage:
+    python api.py [--port 8766] [--host 127.0.0.1]
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import pandas as pd
+
+from boundaries import file_signature
+from keymatch import keymap_path
+from layers import DASHBOARDS, slug
+
+# Built responses keyed by URL path, with the signatures of their inputs
+_responses = {}
+_lock = threading.Lock()
+
+# {dashboard slug: (dashboard, {section slug: (section, Layer)})}
+ROUTES = {
+    slug(dashboard): (dashboard, {slug(section): (section, layer) for section, layer in layers.items()})
+    for dashboard, layers in DASHBOARDS.items()
+}
+
+
+class NotFound(Exception):
+    pass
+
+
+class Response:
+    # A JSON body and its gzipped copy, each with its own ETag, built once
+    def __init__(self, value):
+        self.body = json.dumps(value, separators=(",", ":"), allow_nan=False).encode()
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = '"' + digest + '"'
+        self.gzipped = gzip.compress(self.body, compresslevel=6)
+        self.gzipped_etag = '"' + digest + '-gz"'
+
+
+def _records(data):
+    # DataFrame -> list of dicts of plain Python values, NaN as null (to_json
+    # would round floats to 10 digits)
+    columns = [[None if pd.isna(value) else value for value in data[column].tolist()] for column in data.columns]
+    return [dict(zip(data.columns, row)) for row in zip(*columns)]
+
+
+def _inputs(layer):
+    # Signatures of the files a layer's responses are built from
+    paths = (layer.csv_path, layer.geojson_path, keymap_path(layer))
+    return tuple(file_signature(path) if os.path.exists(path) else None for path in paths)
+
+
+def _index():
+    return {
+        dashboard_slug: {
+            "dashboard": dashboard,
+            "sections": {
+                section_slug: {"section": section, "title": layer.title, "url": f"/{dashboard_slug}/{section_slug}"}
+                for section_slug, (section, layer) in sections.items()
+            },
+        }
+        for dashboard_slug, (dashboard, sections) in ROUTES.items()
+    }
+
+
+def _layer_value(layer, parts):
+    # Body of /<dashboard>/<section>[/...] for the remaining path parts
+    from anchors import load_anchors
+    from metrics import load_metrics
+    from spatial_index import load_index
+
+    if not parts:
+        data = load_metrics(layer)
+        return {"key": layer.key_column, "metric": layer.metric, "regions": _records(data)}
+    if parts[0] == "regions" and len(parts) == 2:
+        data = load_metrics(layer)
+        rows = data[data[layer.key_column] == parts[1]]
+        if not len(rows):
+            raise NotFound(f"no region {parts[1]!r}")
+        return _records(rows)[0]
+    if parts == ["anchors"]:
+        anchors = load_anchors(layer.geojson_path, layer.feature_key)
+        return _records(anchors[["name", "lon", "lat"]])
+    if parts == ["bounds"]:
+        index = load_index(layer.geojson_path, layer.feature_key)
+        return [
+            {"name": name, "west": west, "south": south, "east": east, "north": north}
+            for name, (west, south, east, north) in zip(index.keys, index.bounds.tolist())
+        ]
+    raise NotFound("unknown path")
+
+
+def response(path):
+    # Response for a URL path, rebuilt only when its inputs changed
+    parts = [unquote(part) for part in path.strip("/").split("/") if part]
+    if not parts:
+        inputs, build = None, _index
+    else:
+        if parts[0] not in ROUTES or len(parts) < 2 or parts[1] not in ROUTES[parts[0]][1]:
+            raise NotFound("unknown dashboard or section")
+        _, layer = ROUTES[parts[0]][1][parts[1]]
+        if not os.path.exists(layer.csv_path) or not os.path.exists(layer.geojson_path):
+            raise NotFound(f"{layer.title}: data files missing")
+        inputs = _inputs(layer)
+
+        def build():
+            return _layer_value(layer, parts[2:])
+
+    key = "/" + "/".join(parts)
+    with _lock:
+        entry = _responses.get(key)
+    if entry is not None and entry[0] == inputs:
+        return entry[1]
+    built = Response(build())
+    with _lock:
+        _responses[key] = (inputs, built)
+    return built
+
+
+def _accepts_gzip(header):
+    # Accept-Encoding allows gzip: listed (or "*" when it is not) with a
+    # q-value above 0
+    qualities = {}
+    for entry in (header or "").split(","):
+        coding, *params = [part.strip() for part in entry.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.lower()] = quality
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+def _etag_matches(header, etag):
+    # If-None-Match: "*" or a comma separated list of (possibly weak) tags
+    if header is None:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or "W/" + etag in tags
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive: pollers reuse one connection
+    # Headers and body go out in separate writes; without this every
+    # response waits for the client's delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        try:
+            built = response(urlsplit(self.path).path)
+        except NotFound as error:
+            self._send(404, json.dumps({"error": str(error)}).encode(), {"Content-Type": "application/json"})
+            return
+
+        gzipped = _accepts_gzip(self.headers.get("Accept-Encoding"))
+        etag = built.gzipped_etag if gzipped else built.etag
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+            "Access-Control-Allow-Origin": "*",
+        }
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            self._send(304, b"", headers)
+            return
+        headers["Content-Type"] = "application/json"
+        if gzipped:
+            headers["Content-Encoding"] = "gzip"
+            self._send(200, built.gzipped, headers)
+        else:
+            self._send(200, built.body, headers)
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    do_HEAD = do_GET
+
+    def log_message(self, format, *args):
+        # Polling clients would flood the console
+        pass
+
+
+def serve(host="127.0.0.1", port=8766):
+    # The API server, not yet started (call serve_forever)
+    return ThreadingHTTPServer((host, port), MetricsHandler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the dashboards' metrics as a read-only JSON API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=8766, help="Port to listen on")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port)
+    print(f"serving metrics on http://{args.host}:{args.port}/")
+    server.serve_forever()
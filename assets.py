@@ -0,0 +1,47 @@
+"""Boundary geometry served as static, cacheable files.
+
+When Streamlit's static file serving is on (`server.enableStaticServing`,
+set in .streamlit/config.toml), each boundary file is published once to
+static/boundaries/<name>.<content hash>.geojson and figures reference it by
+URL instead of inlining the whole FeatureCollection. Streamlit serves
+static/ from the app's folder, so copies from different datasets sit side by
+side there instead of overwriting each other. The browser downloads a geometry file once, caches
+it across reruns and across both dashboards, and each render only carries
+the metric arrays. The `?v=` content hash makes Streamlit's file server send
+a long-lived Cache-Control header and changes whenever the file does.
+"""
+import os
+import shutil
+from urllib.parse import quote
+
+import streamlit as st
+
+from boundaries import file_hash, load_geojson, write_atomic
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+ASSET_DIR = os.path.join(STATIC_DIR, "boundaries")
+
+
+def geometry_mode():
+    # "url" when static files are served, otherwise geometry is inlined
+    return "url" if st.get_option("server.enableStaticServing") else "inline"
+
+
+def publish_geojson(path):
+    # Copy a boundary file into the static folder under its content hash
+    # (only once) and return the URL figures should load it from
+    digest = file_hash(path)
+    stem, extension = os.path.splitext(os.path.basename(path))
+    name = f"{stem}.{digest[:16]}{extension}"
+    target = os.path.join(ASSET_DIR, name)
+    if not os.path.exists(target):
+        write_atomic(target, lambda temp_path: shutil.copyfile(path, temp_path))
+    return f"app/static/boundaries/{quote(name)}?v={digest[:16]}"
+
+
+def figure_geojson(path):
+    # Value for Choroplethmapbox(geojson=...): a URL in "url" mode, the
+    # parsed FeatureCollection otherwise
+    if geometry_mode() == "url":
+        return publish_geojson(path)
+    return load_geojson(path)
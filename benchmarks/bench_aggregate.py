@@ -0,0 +1,60 @@
+"""Voter roll aggregation throughput at 1, 2, 4 and 8 worker processes.
+
+Builds a synthetic roll whose regions are the keys of the shipped turnout
+CSVs, aggregates it serially and with each pool size, and checks that every
+parallel result is identical to the serial one.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_aggregate [--rows 2000000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from aggregate import OUTPUTS, VOTED_COLUMN, aggregate_roll
+
+WORKERS = (1, 2, 4, 8)
+
+
+def synthetic_roll(path, rows, seed=0):
+    # One row per voter; each geography drawn independently from the shipped
+    # keys, with ~10% of voters outside any city and ~60% turnout
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for column, csv_path in OUTPUTS.items():
+        keys = pd.read_csv(csv_path, dtype=str)[column].dropna().to_numpy(dtype=object)
+        columns[column] = keys[rng.integers(0, len(keys), rows)]
+    columns["City"][rng.random(rows) < 0.1] = None
+    columns[VOTED_COLUMN] = (rng.random(rows) < 0.6).astype(np.int8)
+    pd.DataFrame(columns).to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Rows in the synthetic roll")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "voter_roll.csv")
+        synthetic_roll(path, args.rows)
+        print(f"synthetic roll: {args.rows:,} rows, {os.path.getsize(path) / 2 ** 20:.0f} MiB, "
+              f"{os.cpu_count()} CPUs")
+
+        print(f"{'workers':>8}{'time':>10}{'rows/s':>14}{'speedup':>10}  identical")
+        serial = None
+        for workers in WORKERS:
+            start = time.perf_counter()
+            tables = aggregate_roll(path, workers=workers)
+            elapsed = time.perf_counter() - start
+            if serial is None:
+                serial, serial_time = tables, elapsed
+            identical = all(tables[column].equals(serial[column]) for column in OUTPUTS)
+            print(f"{workers:>8}{elapsed:>9.2f}s{args.rows / elapsed:>14,.0f}{serial_time / elapsed:>9.2f}x  {identical}")
+
+
+if __name__ == "__main__":
+    main()
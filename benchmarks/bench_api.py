@@ -0,0 +1,131 @@
+"""Load test of the metrics API (api.py) against a local instance.
+
+Starts the server in this process on a free port and polls it from
+--clients threads, each over one keep-alive connection, for --seconds per
+scenario: full gzipped responses, and conditional requests that send back
+the ETag they were given and get 304s. Reports requests per second, median
+and 99th percentile latency and bytes per response.
+
+Uses the real data files when present, otherwise a synthetic dataset
+(synthetic.py) at --scale times the real feature counts.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_api [--clients 8] [--seconds 5] [--scale 10]
+"""
+import argparse
+import http.client
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+import numpy as np
+
+import api
+import keymatch
+import tables
+from synthetic import write_dataset
+
+PATHS = (
+    "/voterchroplethmap/cities",
+    "/voterchroplethmap/counties/anchors",
+    "/voterchroplethmap/school-districts/bounds",
+    "/chorplethmap/legislative-districts",
+)
+
+
+def poll(port, path, conditional, deadline, results):
+    # One client: request path until the deadline, recording (seconds, bytes)
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    headers = {"Accept-Encoding": "gzip"}
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        connection.request("GET", path, headers=headers)
+        reply = connection.getresponse()
+        body = reply.read()
+        results.append((time.perf_counter() - start, len(body)))
+        if reply.status not in (200, 304):
+            raise RuntimeError(f"{path}: HTTP {reply.status} {body[:200]!r}")
+        if conditional:
+            headers["If-None-Match"] = reply.getheader("ETag")
+    connection.close()
+
+
+def scenario(port, path, conditional, clients, seconds):
+    results = []
+    deadline = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=poll, args=(port, path, conditional, deadline, results))
+        for _ in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latencies = np.array([latency for latency, _ in results]) * 1000
+    print(
+        f"{path:<45}{'304' if conditional else '200 gzip':<10}{len(results) / seconds:>10.0f}"
+        f"{np.median(latencies):>10.2f}ms{np.percentile(latencies, 99):>10.2f}ms"
+        f"{np.mean([size for _, size in results]):>12.0f}"
+    )
+
+
+def run(clients, seconds):
+    server = api.serve(port=0)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        paths = [path for path in PATHS if _available(port, path)]
+        print(f"{'path':<45}{'reply':<10}{'req/s':>10}{'median':>12}{'p99':>12}{'bytes':>12}")
+        for path in paths:
+            for conditional in (False, True):
+                scenario(port, path, conditional, clients, seconds)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _available(port, path):
+    # Request once: skips sections without data and builds the response
+    # outside the timed loop
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    start = time.perf_counter()
+    connection.request("GET", path)
+    reply = connection.getresponse()
+    reply.read()
+    connection.close()
+    if reply.status != 200:
+        print(f"{path}: HTTP {reply.status}, skipped")
+        return False
+    print(f"{path}: first response built in {(time.perf_counter() - start) * 1000:.0f}ms")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent client threads")
+    parser.add_argument("--seconds", type=float, default=5, help="Duration of each scenario")
+    parser.add_argument("--scale", type=int, default=10, help="Synthetic feature counts when the real files are missing")
+    args = parser.parse_args()
+
+    real = all(os.path.exists(layer.csv_path) and os.path.exists(layer.geojson_path)
+               for _, sections in api.ROUTES.values() for _, layer in sections.values())
+    with tempfile.TemporaryDirectory() as scratch, \
+            mock.patch.object(tables, "TABLE_DIR", os.path.join(scratch, "tables")), \
+            mock.patch.object(keymatch, "KEYMAP_DIR", os.path.join(scratch, "keymaps")):
+        if real:
+            run(args.clients, args.seconds)
+            return
+        print(f"data files missing, using synthetic data at {args.scale}x")
+        write_dataset(scratch, scale=args.scale)
+        previous = os.getcwd()
+        os.chdir(scratch)
+        try:
+            run(args.clients, args.seconds)
+        finally:
+            os.chdir(previous)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Load time and resident memory: json.load vs the columnar boundary store.
+
+Each measurement runs in a fresh interpreter so peak RSS is not polluted by
+earlier runs. Layers without a GeoJSON file are skipped; stores are built on
+the fly when missing.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_boundary_store
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.memory import rss_mib
+
+LAYERS = (
+    "WA_County_Boundaries.geojson",
+    "CityLimits.geojson",
+    "Washington_School_Districts_2024.geojson",
+    "wa_legislative_districts.geojson",
+    "Congressional District.geojson",
+)
+MODES = ("json.load", "store (mmap only)", "store + to_geojson")
+
+
+def _measure(mode, path):
+    # Runs inside the child interpreter
+    import numpy  # noqa: F401  (imported up front so it is not counted)
+
+    from boundary_store import read_store, store_path, to_geojson
+
+    before = rss_mib()
+    start = time.perf_counter()
+    if mode == "json.load":
+        with open(path, "r") as file:
+            loaded = json.load(file)
+    elif mode == "store (mmap only)":
+        loaded = read_store(store_path(path))
+    else:
+        loaded = to_geojson(read_store(store_path(path)))
+    elapsed = time.perf_counter() - start
+    # Measured while `loaded` is still alive so its memory is counted
+    added = rss_mib() - before
+    del loaded
+    return {"seconds": elapsed, "rss_mib": added}
+
+
+def _run_child(mode, path):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_boundary_store", "--child", mode, path],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    from boundaries import file_hash, load_geojson
+    from boundary_store import read_meta, store_path, write_store
+
+    print(f"{'layer':<42}{'mode':<22}{'time':>10}{'RSS added':>12}")
+    for path in LAYERS:
+        if not os.path.exists(path):
+            print(f"{path:<42}(missing, skipped)")
+            continue
+        if read_meta(store_path(path)) is None:
+            write_store(load_geojson(path), store_path(path), source_sha256=file_hash(path))
+        for mode in MODES:
+            # Best of three to smooth out page-cache effects
+            runs = [_run_child(mode, path) for _ in range(3)]
+            best = min(runs, key=lambda run: run["seconds"])
+            print(f"{path:<42}{mode:<22}{best['seconds'] * 1000:>8.1f}ms{best['rss_mib']:>10.1f}MB")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        print(json.dumps(_measure(sys.argv[2], sys.argv[3])))
+    else:
+        main()
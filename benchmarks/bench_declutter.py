@@ -0,0 +1,50 @@
+"""Time label placement (declutter.py) for thousands of candidate labels.
+
+Candidates are synthetic: town-clustered points over Washington (as in the
+synthetic voter roll) with names of realistic length and skewed voter
+counts, so labels pile up around a few centres as the real city and school
+district labels do around Puget Sound. Reports placement time over all
+PLACEMENT_ZOOMS and how many labels are drawn at each zoom.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_declutter [--labels 1000 5000 20000] [--size 9]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from declutter import PLACEMENT_ZOOMS, label_boxes, place_labels, visible_at
+from synthetic import voter_points
+
+
+def candidates(count, seed=0):
+    rng = np.random.default_rng(seed)
+    points = voter_points(count, rng)
+    text = [f"Synthetic City {number}" for number in range(1, count + 1)]
+    voters = rng.pareto(1.1, count) * 1000
+    return points[:, 0], points[:, 1], text, voters
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--labels", type=int, nargs="+", default=[1000, 5000, 20000], help="Candidate label counts")
+    parser.add_argument("--size", type=int, default=9, help="Font size in pixels")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per count; the best is reported")
+    args = parser.parse_args()
+
+    shown_zooms = range(6, 13)
+    print(f"{'labels':>8}{'placement':>12}" + "".join(f"{f'z{zoom}':>8}" for zoom in shown_zooms))
+    for count in args.labels:
+        lon, lat, text, voters = candidates(count)
+        widths, heights = label_boxes(text, args.size)
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            min_zoom = place_labels(lon, lat, widths, heights, voters, PLACEMENT_ZOOMS)
+            best = min(best, time.perf_counter() - start)
+        print(f"{count:>8}{best * 1000:>10.0f}ms" + "".join(f"{int(visible_at(min_zoom, zoom).sum()):>8}" for zoom in shown_zooms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Bytes sent to the browser per page view, inline geometry vs static URLs.
+
+Runs both dashboards headlessly, captures every figure passed to
+st.plotly_chart and measures its serialized size (what Streamlit sends on
+each render). In "url" mode the boundary files are downloaded once per
+browser and then served from its cache, so they are counted on the first
+view only -- and only once for both dashboards together.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_page_bytes
+"""
+import os
+from unittest import mock
+from urllib.parse import unquote, urlparse
+
+import plotly.io as pio
+import streamlit as st
+
+import assets
+
+DASHBOARDS = ("VoterChroplethMap.py", "chorplethMap.py")
+
+
+def render(script, mode):
+    # Figure payload sizes of one run of a dashboard, plus the geometry URLs used
+    sizes = []
+    urls = set()
+
+    def capture(fig, **kwargs):
+        sizes.append(len(pio.to_json(fig, validate=False)))
+        for trace in fig.data:
+            if isinstance(getattr(trace, "geojson", None), str):
+                urls.add(trace.geojson)
+
+    with mock.patch.object(assets, "geometry_mode", return_value=mode), \
+            mock.patch.object(st, "plotly_chart", side_effect=capture):
+        with open(script, "r") as file:
+            exec(compile(file.read(), script, "exec"), {"__name__": "__main__"})
+    return sizes, urls
+
+
+def asset_bytes(urls):
+    total = 0
+    for url in urls:
+        name = unquote(os.path.basename(urlparse(url).path))
+        total += os.path.getsize(os.path.join(assets.ASSET_DIR, name))
+    return total
+
+
+def main():
+    all_urls = set()
+    print(f"{'dashboard':<24}{'inline/view':>14}{'url first view':>16}{'url repeat view':>17}")
+    for script in DASHBOARDS:
+        inline_sizes, _ = render(script, "inline")
+        url_sizes, urls = render(script, "url")
+        all_urls |= urls
+        print(
+            f"{script:<24}{sum(inline_sizes) / 1024:>12.0f}KiB"
+            f"{(sum(url_sizes) + asset_bytes(urls)) / 1024:>14.0f}KiB"
+            f"{sum(url_sizes) / 1024:>15.0f}KiB"
+        )
+    print(f"geometry downloaded once for both dashboards: {asset_bytes(all_urls) / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
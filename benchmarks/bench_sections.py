@@ -0,0 +1,202 @@
+"""Per-section cost of both dashboards on synthetic boundaries, headless.
+
+For every section of VoterChroplethMap.py and chorplethMap.py, and every
+scale (feature count as a multiple of the real layers), a synthetic dataset
+is generated with synthetic.py and each section is rendered without a
+browser, server or network in a fresh interpreter. Recorded per section:
+
+  parse_ms     json.load of the boundary file
+  anchors_ms   label anchor (centroid) computation
+  load_ms      metric table load: CSV ingest, key normalization, key map
+  build_ms     figure construction (render.build_figure)
+  serialize_ms plotly JSON serialization of the figure
+  figure_bytes size of that JSON, what a rerun sends to the browser
+  peak_mib     peak resident memory above the interpreter's baseline
+
+Results are written as JSON (with the commit they were measured at) so two
+runs can be compared with --compare.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_sections [--scales 10 100 1000] [--output results.json]
+    python -m benchmarks.bench_sections --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.memory import peak_mib, reset_peak, rss_mib
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULT_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+DASHBOARDS = ("VoterChroplethMap.py", "chorplethMap.py")
+METRICS = ("parse_ms", "anchors_ms", "load_ms", "build_ms", "serialize_ms", "figure_bytes", "peak_mib")
+
+
+def _registry(dashboard):
+    from layers import MUSLIM_LAYERS, VOTER_LAYERS
+
+    return VOTER_LAYERS if dashboard == "VoterChroplethMap.py" else MUSLIM_LAYERS
+
+
+def _measure(dashboard, section, folder):
+    # Runs inside the child interpreter, with the synthetic dataset as cwd.
+    # Everything is imported first so module import is not counted.
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    import anchors
+    import boundaries
+    import declutter
+    import keymatch
+    import metrics
+    import render
+    import tables
+
+    # Keep derived files next to the synthetic data, away from the repository's
+    tables.TABLE_DIR = os.path.join(folder, "tables")
+    keymatch.KEYMAP_DIR = os.path.join(folder, "keymaps")
+    declutter.PLACEMENT_DIR = os.path.join(folder, "placements")
+    layer = _registry(dashboard)[section]
+    # Plotly loads its trace validators lazily; do that before timing builds
+    pio.to_json(go.Figure([go.Choroplethmapbox(), go.Scattermapbox()]).update_layout(mapbox_zoom=1))
+    reset_peak()
+    baseline = rss_mib()
+
+    def timed(function):
+        start = time.perf_counter()
+        value = function()
+        return value, (time.perf_counter() - start) * 1000
+
+    geojson_data, parse_ms = timed(lambda: boundaries.load_geojson(layer.geojson_path))
+    _, anchors_ms = timed(lambda: anchors.compute_anchors(geojson_data, layer.feature_key))
+    anchors.load_anchors(layer.geojson_path, layer.feature_key)  # Warm, as a rerun would find it
+    _, load_ms = timed(lambda: metrics.load_metrics(layer))
+    (fig, _), build_ms = timed(lambda: render.build_figure(layer))
+    serialized, serialize_ms = timed(lambda: pio.to_json(fig, validate=False))
+    return {
+        "dashboard": dashboard,
+        "section": section,
+        "features": len(geojson_data["features"]),
+        "parse_ms": parse_ms,
+        "anchors_ms": anchors_ms,
+        "load_ms": load_ms,
+        "build_ms": build_ms,
+        "serialize_ms": serialize_ms,
+        "figure_bytes": len(serialized),
+        "peak_mib": peak_mib() - baseline,
+    }
+
+
+def _run_child(dashboard, section, folder):
+    # One fresh interpreter per section so caches and peak memory start clean
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.environ.get("PYTHONPATH")])))
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_sections", "--child", dashboard, section, folder],
+        cwd=folder, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _best(runs):
+    # Fastest of repeated runs per metric, to smooth out scheduling noise
+    best = dict(runs[0])
+    for metric in METRICS:
+        best[metric] = min(run[metric] for run in runs)
+    return best
+
+
+def run(scales, edge_vertices, sections=None, repeat=1):
+    from synthetic import write_dataset
+
+    results = []
+    print(f"{'section':<48}{'scale':>6}{'features':>9}{'parse':>9}{'anchors':>9}{'load':>9}"
+          f"{'build':>9}{'serialize':>11}{'figure':>10}{'peak':>9}")
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as folder:
+            write_dataset(folder, scale=scale, edge_vertices=edge_vertices)
+            for dashboard in DASHBOARDS:
+                for section in _registry(dashboard):
+                    if sections and section not in sections:
+                        continue
+                    runs = [_run_child(dashboard, section, folder) for _ in range(repeat)]
+                    result = dict(_best(runs), scale=scale)
+                    results.append(result)
+                    print(
+                        f"{dashboard + ' / ' + section:<48}{scale:>6}{result['features']:>9}"
+                        f"{result['parse_ms']:>7.0f}ms{result['anchors_ms']:>7.0f}ms{result['load_ms']:>7.0f}ms"
+                        f"{result['build_ms']:>7.0f}ms{result['serialize_ms']:>9.0f}ms"
+                        f"{result['figure_bytes'] / 2 ** 20:>7.1f}MiB{result['peak_mib']:>6.0f}MiB"
+                    )
+    return results
+
+
+def compare(before_path, after_path):
+    # Ratio after/before of every metric, per section and scale
+    with open(before_path, "r") as file:
+        before = json.load(file)
+    with open(after_path, "r") as file:
+        after = json.load(file)
+    baseline = {(row["dashboard"], row["section"], row["scale"]): row for row in before["results"]}
+
+    print(f"{before['commit']} -> {after['commit']} (after / before)")
+    print(f"{'section':<48}{'scale':>6}" + "".join(f"{metric:>14}" for metric in METRICS))
+    for row in after["results"]:
+        old = baseline.get((row["dashboard"], row["section"], row["scale"]))
+        if old is None:
+            continue
+        ratios = "".join(
+            f"{row[metric] / old[metric]:>13.2f}x" if old[metric] else f"{'-':>14}" for metric in METRICS
+        )
+        print(f"{row['dashboard'] + ' / ' + row['section']:<48}{row['scale']:>6}{ratios}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000], help="Feature count multiples")
+    parser.add_argument("--edge-vertices", type=int, default=8, help="Vertices per shared border")
+    parser.add_argument("--sections", nargs="+", help="Only these sections (e.g. Counties Cities)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per section; the best of each metric is kept")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/sections-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = run(args.scales, args.edge_vertices, args.sections, args.repeat)
+    commit = _commit()
+    output = args.output or os.path.join(RESULT_DIR, f"sections-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump({
+            "commit": commit,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "edge_vertices": args.edge_vertices,
+            "repeat": args.repeat,
+            "results": results,
+        }, file, indent=1)
+    print(f"wrote {os.path.relpath(output)}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        print(json.dumps(_measure(*sys.argv[2:])))
+    else:
+        main()
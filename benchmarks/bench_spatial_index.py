@@ -0,0 +1,77 @@
+"""Point-in-polygon throughput: grid + band index vs testing every feature.
+
+For each boundary layer present, scatters random points over the layer's
+extent (plus a margin, so some points fall outside every feature), locates
+them with spatial_index and with a naive loop over all features on a small
+sample, and checks that both agree on that sample.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_spatial_index [--points 1000000]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from anchors import _contains
+from boundaries import load_geojson
+from layers import VOTER_LAYERS
+from boundaries import geometry_polygons
+from spatial_index import build_index, locate
+
+NAIVE_SAMPLE = 500
+
+
+def naive_locate(geojson_data, lon, lat):
+    # First feature whose rings contain the point (even-odd), -1 otherwise
+    found = np.full(len(lon), -1)
+    for point, (x, y) in enumerate(zip(lon, lat)):
+        for position, feature in enumerate(geojson_data["features"]):
+            rings = [ring for polygon in geometry_polygons(feature.get("geometry")) for ring in polygon]
+            if sum(_contains([ring], x, y) for ring in rings) % 2:
+                found[point] = position
+                break
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=1_000_000, help="Random points per layer")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'layer':<42}{'features':>9}{'build':>9}{'indexed pts/s':>15}{'naive pts/s':>13}{'outside':>9}  agree")
+    for layer in VOTER_LAYERS.values():
+        path = layer.geojson_path
+        if not os.path.exists(path):
+            print(f"{path:<42}(missing, skipped)")
+            continue
+        geojson_data = load_geojson(path)
+
+        start = time.perf_counter()
+        index = build_index(geojson_data, layer.feature_key)
+        build_time = time.perf_counter() - start
+
+        bounds = index.bounds[~np.isnan(index.bounds[:, 0])]
+        low, high = bounds[:, :2].min(axis=0), bounds[:, 2:].max(axis=0)
+        margin = (high - low) * 0.05
+        points = rng.uniform(low - margin, high + margin, size=(args.points, 2))
+
+        start = time.perf_counter()
+        found = locate(index, points[:, 0], points[:, 1])
+        indexed_rate = args.points / (time.perf_counter() - start)
+
+        sample = rng.choice(args.points, min(NAIVE_SAMPLE, args.points), replace=False)
+        start = time.perf_counter()
+        naive = naive_locate(geojson_data, points[sample, 0], points[sample, 1])
+        naive_rate = len(sample) / (time.perf_counter() - start)
+
+        print(
+            f"{path:<42}{len(index.keys):>9}{build_time:>8.2f}s{indexed_rate:>15,.0f}{naive_rate:>13,.0f}"
+            f"{(found < 0).mean():>9.1%}  {bool((naive == found[sample]).all())}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Metric table load latency and memory: CSV + normalization vs Feather.
+
+For every distinct (CSV, key rule) used by the dashboards, compares the old
+path (pd.read_csv with default inference, then key normalization) with
+tables.load_table reading the persisted, compactly typed Feather file.
+--scale repeats each CSV's rows to see how both paths grow.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_tables [--scale 1000]
+"""
+import argparse
+import dataclasses
+import os
+import tempfile
+import time
+from unittest import mock
+
+import pandas as pd
+
+import tables
+from layers import MUSLIM_LAYERS, VOTER_LAYERS
+
+REPEATS = 5
+
+
+def csv_path_load(layer):
+    # What every section did before: default inference, normalize every run
+    data = pd.read_csv(layer.csv_path)
+    if layer.normalize is not None:
+        data[layer.key_column] = layer.normalize(data[layer.key_column])
+    return data
+
+
+def best_time(load, layer):
+    times = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        data = load(layer)
+        times.append(time.perf_counter() - start)
+    return min(times), data.memory_usage(deep=True).sum()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="Repeat each CSV's rows this many times")
+    args = parser.parse_args()
+
+    layers = {}
+    for layer in list(VOTER_LAYERS.values()) + list(MUSLIM_LAYERS.values()):
+        layers.setdefault(tables.table_path(layer), layer)
+
+    print(f"{'table':<64}{'rows':>8}{'csv':>10}{'feather':>10}{'csv mem':>11}{'feather mem':>13}")
+    with tempfile.TemporaryDirectory() as folder, mock.patch.object(tables, "TABLE_DIR", folder):
+        for layer in layers.values():
+            if args.scale > 1:
+                scaled = os.path.join(folder, os.path.basename(layer.csv_path))
+                data = pd.read_csv(layer.csv_path)
+                pd.concat([data] * args.scale).to_csv(scaled, index=False)
+                layer = dataclasses.replace(layer, csv_path=scaled)
+
+            tables.load_table(layer)  # Ingest once so the Feather file exists
+            csv_time, csv_memory = best_time(csv_path_load, layer)
+            feather_time, feather_memory = best_time(tables.load_table, layer)
+            name = os.path.basename(tables.table_path(layer))
+            rows = len(tables.load_table(layer))
+            print(
+                f"{name:<64}{rows:>8}{csv_time * 1000:>8.2f}ms{feather_time * 1000:>8.2f}ms"
+                f"{csv_memory / 1024:>9.0f}KiB{feather_memory / 1024:>11.0f}KiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
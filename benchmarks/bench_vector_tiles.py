@@ -0,0 +1,109 @@
+"""Time to render the city and school district maps zoomed to King County.
+
+Compares the figure the browser receives when the whole layer is sent (as
+before tiles) with the one assembled from the viewport tiles
+(vector_tiles.py): figure build time, JSON serialization time, payload size
+and number of features. Geometry is inlined in both so the payload counts
+everything the browser has to download and draw. Tile reads are timed cold
+(first read from disk) and warm (tiles already parsed in this process).
+
+Uses the real boundary files when present, otherwise a synthetic dataset
+(synthetic.py) at --scale times the real feature counts.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_vector_tiles [--scale 10]
+"""
+import argparse
+import dataclasses
+import os
+import tempfile
+import time
+from unittest import mock
+
+import plotly.io as pio
+
+import assets
+import declutter
+import keymatch
+import metrics
+import render
+import tables
+import vector_tiles
+from layers import MUSLIM_LAYERS, VOTER_LAYERS
+from synthetic import write_dataset
+
+# King County, WA (west, south, east, north)
+KING_COUNTY_BOUNDS = (-122.54, 47.08, -121.06, 47.78)
+SECTIONS = ("Cities", "School Districts")
+
+
+def measure(layer, view):
+    start = time.perf_counter()
+    fig, _ = render.build_figure(layer, view)
+    built = time.perf_counter()
+    payload = pio.to_json(fig, validate=False)
+    serialized = time.perf_counter()
+    return {
+        "build": built - start,
+        "serialize": serialized - built,
+        "bytes": len(payload),
+        "features": len(fig.data[0].geojson["features"]),
+    }
+
+
+def report(name, mode, result):
+    total = result["build"] + result["serialize"]
+    print(
+        f"{name:<42}{mode:<13}{result['features']:>9}{result['bytes'] / 2 ** 20:>9.2f}MiB"
+        f"{result['build'] * 1000:>9.0f}ms{result['serialize'] * 1000:>9.0f}ms{total * 1000:>9.0f}ms"
+    )
+
+
+def run():
+    layers = [(f"{dashboard} / {section}", registry[section])
+              for dashboard, registry in (("voter", VOTER_LAYERS), ("muslim", MUSLIM_LAYERS)) for section in SECTIONS]
+    for path in {layer.geojson_path for _, layer in layers}:
+        key = next(layer.feature_key for _, layer in layers if layer.geojson_path == path)
+        if vector_tiles.read_meta(path, key) is None:
+            start = time.perf_counter()
+            vector_tiles.build_tiles(path, key)
+            print(f"built tiles for {path} in {time.perf_counter() - start:.1f}s")
+
+    print(f"{'section':<42}{'mode':<13}{'features':>9}{'payload':>12}{'build':>11}{'serialize':>11}{'total':>11}")
+    for name, layer in layers:
+        view = vector_tiles.fit_view(KING_COUNTY_BOUNDS, layer.width, layer.height)
+        # Before tiles: the whole layer, whatever the zoom
+        full = dataclasses.replace(layer, zoom=view[2])
+        metrics.load_metrics(layer)  # Tables and key maps are not what is measured
+        report(name, "whole layer", measure(full, None))
+        with mock.patch.dict(vector_tiles._tiles, clear=True):
+            report(name, "tiles cold", measure(layer, view))
+            report(name, "tiles warm", measure(layer, view))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=10, help="Synthetic feature counts when the real files are missing")
+    args = parser.parse_args()
+
+    real = all(os.path.exists(VOTER_LAYERS[section].geojson_path) for section in SECTIONS)
+    with tempfile.TemporaryDirectory() as scratch, \
+            mock.patch.object(tables, "TABLE_DIR", os.path.join(scratch, "tables")), \
+            mock.patch.object(keymatch, "KEYMAP_DIR", os.path.join(scratch, "keymaps")), \
+            mock.patch.object(declutter, "PLACEMENT_DIR", os.path.join(scratch, "placements")), \
+            mock.patch.object(assets, "geometry_mode", lambda: "inline"):
+        if real:
+            run()
+            return
+        print(f"boundary files missing, using synthetic data at {args.scale}x")
+        write_dataset(scratch, scale=args.scale)
+        previous = os.getcwd()
+        os.chdir(scratch)
+        try:
+            run()
+        finally:
+            os.chdir(previous)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+"""Resident memory readings shared by the benchmarks (Linux /proc, with
+getrusage as the fallback elsewhere)."""
+import os
+import re
+import resource
+
+
+def reset_peak():
+    # Restart peak RSS tracking from the current RSS (Linux); elsewhere the
+    # peak covers the whole process
+    try:
+        with open("/proc/self/clear_refs", "w") as file:
+            file.write("5")
+    except OSError:
+        pass
+
+
+def peak_mib():
+    # Peak resident set size since the last reset (VmHWM), in MiB
+    try:
+        with open("/proc/self/status", "r") as file:
+            return int(re.search(r"VmHWM:\s+(\d+)", file.read()).group(1)) / 1024
+    except (OSError, AttributeError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def rss_mib():
+    # Current resident set size (Linux), in MiB; falls back to the peak elsewhere
+    try:
+        with open("/proc/self/statm", "r") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return peak_mib()
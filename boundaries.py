@@ -0,0 +1,147 @@
+"""Shared loading of the boundary GeoJSON files used by both dashboards."""
+import hashlib
+import json
+import os
+import threading
+
+from boundary_store import read_meta, read_store, store_path, to_geojson
+from spans import span
+
+# Parsed GeoJSON keyed by absolute path; each entry remembers the (mtime, size)
+# of the file it was parsed from so a replaced file is picked up again
+_cache = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "store_loads": 0}
+# Content hashes keyed by absolute path, with the signature they were taken at
+_hashes = {}
+
+
+def file_signature(path):
+    # Cheap change detector for files on disk: (mtime in ns, size in bytes)
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def file_hash(path):
+    # SHA-256 of a file's contents. The digest is recomputed only when the
+    # file's signature changes, so callers can use it freely on every rerun.
+    key = os.path.abspath(path)
+    signature = file_signature(key)
+    with _lock:
+        entry = _hashes.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+    digest = hashlib.sha256()
+    with open(key, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+
+    with _lock:
+        _hashes[key] = (signature, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def sidecar_dir(data_path, folder):
+    # Folder of files derived from a data file, next to that file: running
+    # against another dataset (cd out_dir && streamlit run ...) keeps its
+    # own tables, key maps and placements. An absolute folder is used as is.
+    return os.path.join(os.path.dirname(os.path.abspath(data_path)), folder)
+
+
+def geometry_polygons(geometry):
+    # Polygons of a GeoJSON geometry as a MultiPolygon coordinate list; []
+    # for a missing geometry or one without area
+    if geometry is None:
+        return []
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    return []
+
+
+def write_atomic(path, write):
+    # Call write(temp_path) and rename the result over path, so a reader
+    # (another session, process or worker) never sees a half-written file.
+    # The temp name is unique per process and thread, and removed on failure.
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def write_cache(path, write):
+    # write_atomic for files that only save recomputation; returns False
+    # on a read-only deployment, where the caller keeps its result in memory
+    try:
+        write_atomic(path, write)
+    except OSError:
+        return False
+    return True
+
+
+def json_writer(value, **options):
+    # write function for write_atomic/write_cache that dumps value as JSON
+    def write(temp_path):
+        with open(temp_path, "w") as file:
+            json.dump(value, file, **options)
+
+    return write
+
+
+def load_geojson(path):
+    # Parse a boundary file once per process. Streamlit re-executes the page
+    # script on every interaction but keeps imported modules, so later reruns
+    # (and other sessions) reuse the parsed dict instead of calling json.load.
+    # The returned dict is shared and must be treated as read-only.
+    key = os.path.abspath(path)
+    signature = file_signature(key)
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == signature:
+            _stats["hits"] += 1
+            return entry[1]
+
+    geojson_data = _load_from_store(key)
+    if geojson_data is None:
+        with span("json.load"), open(key, "r") as file:
+            geojson_data = json.load(file)
+
+    with _lock:
+        _cache[key] = (signature, geojson_data)
+        _stats["misses"] += 1
+    return geojson_data
+
+
+def _load_from_store(path):
+    # Rebuild the GeoJSON from its columnar store (see boundary_store.py) when
+    # one was converted from exactly this file; None otherwise
+    store_dir = store_path(path)
+    meta = read_meta(store_dir)
+    if meta is None or meta["source_sha256"] != file_hash(path):
+        return None
+    with span("boundary store"):
+        geojson_data = to_geojson(read_store(store_dir))
+    with _lock:
+        _stats["store_loads"] += 1
+    return geojson_data
+
+
+def cache_stats():
+    # Hit/miss counters since the process started (or the last clear_cache)
+    with _lock:
+        return dict(_stats, files=len(_cache))
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+        _hashes.clear()
+        for name in _stats:
+            _stats[name] = 0
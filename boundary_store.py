@@ -0,0 +1,153 @@
+"""Compact columnar store for boundary layers.
+
+A store is a folder `<name>.bstore/` next to the GeoJSON file holding:
+
+    coords.npy        (N, 2) float64 (or float32) lon/lat of every vertex
+    ring_offsets.npy  vertex offset at which each ring starts (+ final end)
+    part_offsets.npy  ring offset at which each polygon starts (+ final end)
+    geom_offsets.npy  polygon offset at which each feature starts (+ final end)
+    geom_types.npy    uint8 code per feature, see GEOMETRY_TYPES
+    properties.json   {column: [value per feature]}
+    meta.json         source file hash, counts and dtype
+
+Arrays are memory-mapped on load, so opening a store costs almost nothing;
+the nested GeoJSON dict that Plotly needs is only rebuilt by to_geojson.
+
+Usage:
+    python boundary_store.py CityLimits.geojson [--float32]
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+GEOMETRY_TYPES = ("Polygon", "MultiPolygon", "None")
+STORE_VERSION = 1
+_ARRAYS = ("coords", "ring_offsets", "part_offsets", "geom_offsets", "geom_types")
+
+
+def store_path(geojson_path):
+    root, _ = os.path.splitext(geojson_path)
+    return root + ".bstore"
+
+
+def write_store(geojson_data, store_dir, source_sha256=None, dtype="float64"):
+    # Flatten a FeatureCollection into offset arrays plus a properties table
+    coords = []
+    ring_offsets = [0]
+    part_offsets = [0]
+    geom_offsets = [0]
+    geom_types = []
+    columns = {}
+
+    features = geojson_data["features"]
+    for index, feature in enumerate(features):
+        geometry = feature.get("geometry")
+        if geometry is None:
+            polygons = []
+            geom_types.append(GEOMETRY_TYPES.index("None"))
+        elif geometry["type"] in ("Polygon", "MultiPolygon"):
+            polygons = [geometry["coordinates"]] if geometry["type"] == "Polygon" else geometry["coordinates"]
+            geom_types.append(GEOMETRY_TYPES.index(geometry["type"]))
+        else:
+            raise ValueError(f"Unsupported geometry type: {geometry['type']}")
+
+        for polygon in polygons:
+            for ring in polygon:
+                coords.extend(point[:2] for point in ring)
+                ring_offsets.append(len(coords))
+            part_offsets.append(len(ring_offsets) - 1)
+        geom_offsets.append(len(part_offsets) - 1)
+
+        for name, value in (feature.get("properties") or {}).items():
+            columns.setdefault(name, [None] * len(features))[index] = value
+
+    os.makedirs(store_dir, exist_ok=True)
+    arrays = {
+        "coords": np.asarray(coords, dtype=dtype).reshape(-1, 2),
+        "ring_offsets": np.asarray(ring_offsets, dtype=np.int64),
+        "part_offsets": np.asarray(part_offsets, dtype=np.int64),
+        "geom_offsets": np.asarray(geom_offsets, dtype=np.int64),
+        "geom_types": np.asarray(geom_types, dtype=np.uint8),
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(store_dir, name + ".npy"), array)
+    with open(os.path.join(store_dir, "properties.json"), "w") as file:
+        json.dump(columns, file, separators=(",", ":"))
+
+    # meta.json goes last so a half-written store is never considered valid
+    meta = {
+        "version": STORE_VERSION,
+        "source_sha256": source_sha256,
+        "features": len(features),
+        "vertices": len(coords),
+        "dtype": str(np.dtype(dtype)),
+    }
+    with open(os.path.join(store_dir, "meta.json"), "w") as file:
+        json.dump(meta, file)
+    return meta
+
+
+def read_meta(store_dir):
+    try:
+        with open(os.path.join(store_dir, "meta.json"), "r") as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == STORE_VERSION else None
+
+
+def read_store(store_dir):
+    # Memory-map the arrays of a store; nothing is copied until it is used
+    store = {name: np.load(os.path.join(store_dir, name + ".npy"), mmap_mode="r") for name in _ARRAYS}
+    with open(os.path.join(store_dir, "properties.json"), "r") as file:
+        store["properties"] = json.load(file)
+    store["meta"] = read_meta(store_dir)
+    return store
+
+
+def to_geojson(store):
+    # Rebuild the FeatureCollection dict from a store
+    points = np.asarray(store["coords"]).tolist()
+    ring_offsets = np.asarray(store["ring_offsets"]).tolist()
+    part_offsets = np.asarray(store["part_offsets"]).tolist()
+    geom_offsets = np.asarray(store["geom_offsets"]).tolist()
+    geom_types = [GEOMETRY_TYPES[code] for code in np.asarray(store["geom_types"]).tolist()]
+
+    rings = [points[start:end] for start, end in zip(ring_offsets[:-1], ring_offsets[1:])]
+    polygons = [rings[start:end] for start, end in zip(part_offsets[:-1], part_offsets[1:])]
+
+    columns = store["properties"]
+    names = list(columns)
+    rows = zip(*(columns[name] for name in names)) if names else ([] for _ in geom_types)
+
+    features = []
+    for index, (geom_type, row) in enumerate(zip(geom_types, rows)):
+        start, end = geom_offsets[index], geom_offsets[index + 1]
+        if geom_type == "None":
+            geometry = None
+        elif geom_type == "Polygon":
+            geometry = {"type": "Polygon", "coordinates": polygons[start]}
+        else:
+            geometry = {"type": "MultiPolygon", "coordinates": polygons[start:end]}
+        features.append({"type": "Feature", "properties": dict(zip(names, row)), "geometry": geometry})
+    return {"type": "FeatureCollection", "features": features}
+
+
+if __name__ == "__main__":
+    from boundaries import file_hash, load_geojson
+
+    parser = argparse.ArgumentParser(description="Convert boundary GeoJSON files to the compact columnar store.")
+    parser.add_argument("geojson", nargs="+", help="GeoJSON file(s) to convert")
+    parser.add_argument("--float32", action="store_true", help="Store coordinates as float32 (~1 m precision)")
+    args = parser.parse_args()
+
+    for path in args.geojson:
+        meta = write_store(
+            load_geojson(path),
+            store_path(path),
+            source_sha256=file_hash(path),
+            dtype="float32" if args.float32 else "float64",
+        )
+        print(f"{store_path(path)}: {meta['features']} features, {meta['vertices']} vertices ({meta['dtype']})")
@@ -0,0 +1,296 @@
+"""Cross-walk tables between the five geographies.
+
+A cross-walk between two layers is a sparse matrix of overlaps: entry
+(a, b) is how much of region b lies in region a. Overlaps are measured
+either by area (points on a regular grid over the state, located in both
+layers with spatial_index, weighted in km^2) or by voters (people on a
+voter roll counted per pair of regions). They are computed once per
+boundary or roll version and stored as one .npz per layer pair under
+crosswalks/, so a breakdown such as "school districts within LD 36" is a
+sparse multiply against the existing per-geography tables instead of a new
+aggregation. Regions are keyed by their boundary feature names, as the
+dashboards' tables are after normalization and key matching (see
+keymatch.py); voter-weighted cross-walks map the roll's spellings the same way.
+
+Usage:
+    python crosswalk.py [--samples 2000000]     # area-weighted
+    python crosswalk.py --roll voter_roll.csv   # voter-weighted
+"""
+import argparse
+import itertools
+import json
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from aggregate import OUTPUTS, read_roll
+from boundaries import file_hash, file_signature, json_writer, write_atomic
+from keymatch import apply_keymap, load_keymap
+from layers import BOUNDARY_LAYERS
+from metrics import input_signature, load_metrics
+from spans import span
+from spatial_index import load_index, locate
+
+CROSSWALK_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "crosswalks")
+# Bump when stored cross-walks can no longer be read as they are
+CROSSWALK_VERSION = "2"
+KM_PER_DEGREE = 111.32
+
+# rows/cols index source_keys/target_keys; weights is the overlap of each pair
+Crosswalk = namedtuple("Crosswalk", ["source", "target", "source_keys", "target_keys", "rows", "cols", "weights"])
+
+# Breakdowns keyed by (source, target, folder), with the signatures of the
+# cross-walk set and of the target table they were apportioned from
+_breakdowns = {}
+_lock = threading.Lock()
+
+
+def _pairs():
+    # Every unordered pair of geographies, in OUTPUTS order
+    return list(itertools.combinations(OUTPUTS, 2))
+
+
+def _from_codes(source, target, source_keys, target_keys, source_codes, target_codes, weights):
+    # Sum weights per (source, target) pair into a sparse Crosswalk
+    both = (source_codes >= 0) & (target_codes >= 0)
+    codes = source_codes[both] * len(target_keys) + target_codes[both]
+    sums = np.bincount(codes, weights=weights[both], minlength=len(source_keys) * len(target_keys))
+    nonzero = np.flatnonzero(sums)
+    return Crosswalk(
+        source=source,
+        target=target,
+        source_keys=np.asarray(source_keys, dtype=str),
+        target_keys=np.asarray(target_keys, dtype=str),
+        rows=nonzero // len(target_keys),
+        cols=nonzero % len(target_keys),
+        weights=sums[nonzero],
+    )
+
+
+def area_crosswalks(samples=2_000_000):
+    # Area overlaps (km^2) from a regular grid of sample points over all layers
+    indexes = {column: load_index(layer.geojson_path, layer.feature_key) for column, layer in BOUNDARY_LAYERS.items()}
+    bounds = np.vstack([index.bounds for index in indexes.values()])
+    bounds = bounds[~np.isnan(bounds[:, 0])]
+    low, high = bounds[:, :2].min(axis=0), bounds[:, 2:].max(axis=0)
+    extent = high - low
+
+    columns = max(1, int(np.sqrt(samples * extent[0] / extent[1])))
+    rows = max(1, samples // columns)
+    step = extent / (columns, rows)
+    lon = low[0] + (np.arange(columns) + 0.5) * step[0]
+    lat = low[1] + (np.arange(rows) + 0.5) * step[1]
+    lon, lat = (grid.ravel() for grid in np.meshgrid(lon, lat))
+    # Area of each sample's grid cell, smaller towards the pole
+    weights = step[0] * step[1] * KM_PER_DEGREE ** 2 * np.cos(np.radians(lat))
+
+    codes = {column: locate(index, lon, lat) for column, index in indexes.items()}
+    keys = {column: index.keys for column, index in indexes.items()}
+    return {
+        (source, target): _from_codes(source, target, keys[source], keys[target], codes[source], codes[target], weights)
+        for source, target in _pairs()
+    }
+
+
+def _feature_codes(column, roll_keys):
+    # Feature keys the roll's spellings map to, as the dashboards map their
+    # CSV keys (the layer's normalizer, then its key map), and the code of
+    # every roll key among them: (feature keys, codes)
+    layer = BOUNDARY_LAYERS[column]
+    unique = pd.Series(pd.unique(roll_keys), dtype=object)
+    mapped = unique if layer.normalize is None else layer.normalize(unique)
+    feature_keys = load_index(layer.geojson_path, layer.feature_key).keys
+    table = apply_keymap(pd.DataFrame({column: mapped}), column, load_keymap(layer, mapped, feature_keys))
+    by_roll_key = pd.Series(table[column].astype(object).to_numpy(), index=unique)
+    codes, keys = pd.factorize(by_roll_key.reindex(roll_keys).to_numpy())
+    return keys, codes
+
+
+def roll_crosswalks(roll_path, chunksize=500_000):
+    # Voter overlaps: people on the roll per pair of regions, one streaming pass
+    counts = {pair: None for pair in _pairs()}
+    for chunk in read_roll(roll_path, chunksize):
+        for source, target in _pairs():
+            partial = chunk.groupby([source, target]).size()
+            counts[(source, target)] = partial if counts[(source, target)] is None else (
+                pd.concat([counts[(source, target)], partial]).groupby(level=[0, 1]).sum()
+            )
+
+    crosswalks = {}
+    for (source, target), pair_counts in counts.items():
+        if pair_counts is None:
+            raise ValueError(f"{roll_path} has no rows")
+        source_keys, source_codes = _feature_codes(source, pair_counts.index.get_level_values(0))
+        target_keys, target_codes = _feature_codes(target, pair_counts.index.get_level_values(1))
+        crosswalks[(source, target)] = _from_codes(
+            source, target, source_keys, target_keys, source_codes, target_codes, pair_counts.to_numpy(dtype=float),
+        )
+    return crosswalks
+
+
+def _pair_path(folder, source, target):
+    return os.path.join(folder, f"{source}__{target}.npz")
+
+
+def boundary_vintage():
+    # Content hash of every boundary file the area cross-walks depend on
+    return {layer.geojson_path: file_hash(layer.geojson_path) for layer in BOUNDARY_LAYERS.values()}
+
+
+def _save_pair(path, crosswalk):
+    # Through a file object: np.savez on a path would append ".npz" to it
+    with open(path, "wb") as file:
+        np.savez(
+            file,
+            source_keys=crosswalk.source_keys,
+            target_keys=crosswalk.target_keys,
+            rows=crosswalk.rows,
+            cols=crosswalk.cols,
+            weights=crosswalk.weights,
+        )
+
+
+def save_crosswalks(crosswalks, method, inputs, folder=CROSSWALK_DIR):
+    # Write every pair plus meta.json naming the method and input file hashes
+    for (source, target), crosswalk in crosswalks.items():
+        write_atomic(_pair_path(folder, source, target), lambda temp_path: _save_pair(temp_path, crosswalk))
+    # meta.json goes last so a half-written set is never used
+    write_atomic(os.path.join(folder, "meta.json"), json_writer({"method": method, "inputs": inputs, "version": CROSSWALK_VERSION}))
+
+
+def _read_meta(folder):
+    # meta.json of a cross-walk set, or None if missing or of another version
+    try:
+        with open(os.path.join(folder, "meta.json"), "r") as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == CROSSWALK_VERSION else None
+
+
+def load_crosswalk(source, target, folder=CROSSWALK_DIR):
+    # Cross-walk from source to target (either order), or None when none was
+    # built or an input it was built from has changed or is gone since
+    meta = _read_meta(folder)
+    if meta is None:
+        return None
+    for path, digest in meta["inputs"].items():
+        if not os.path.exists(path) or file_hash(path) != digest:
+            return None
+
+    flipped = (target, source) in _pairs()
+    first, second = (target, source) if flipped else (source, target)
+    try:
+        with np.load(_pair_path(folder, first, second)) as stored:
+            arrays = {name: stored[name] for name in stored.files}
+    except OSError:
+        return None
+    if flipped:
+        return Crosswalk(source, target, arrays["target_keys"], arrays["source_keys"],
+                         arrays["cols"], arrays["rows"], arrays["weights"])
+    return Crosswalk(source, target, arrays["source_keys"], arrays["target_keys"],
+                     arrays["rows"], arrays["cols"], arrays["weights"])
+
+
+def apportion(crosswalk, target_table):
+    # Split every target region's counts over the source regions it overlaps,
+    # in proportion to the overlap: one row per nonzero (source, target) entry
+    # of the normalized overlap matrix times the target's counts. The target
+    # table is keyed by feature names, as metrics.load_metrics returns it.
+    table = target_table.dropna(subset=[crosswalk.target]).drop_duplicates(crosswalk.target)
+    position = pd.Index(crosswalk.target_keys).get_indexer(table[crosswalk.target].astype(str))
+
+    total = np.zeros(len(crosswalk.target_keys))
+    voters = np.zeros(len(crosswalk.target_keys))
+    found = position >= 0
+    total[position[found]] = table["total_population"].to_numpy(dtype=float)[found]
+    voters[position[found]] = table["voters"].to_numpy(dtype=float)[found]
+
+    # Share of each target region that lies in each source region
+    overlap = np.bincount(crosswalk.cols, weights=crosswalk.weights, minlength=len(crosswalk.target_keys))
+    share = crosswalk.weights / overlap[crosswalk.cols]
+
+    pieces = pd.DataFrame({
+        crosswalk.source: crosswalk.source_keys[crosswalk.rows],
+        crosswalk.target: crosswalk.target_keys[crosswalk.cols],
+        "share": share,
+        "total_population": share * total[crosswalk.cols],
+        "voters": share * voters[crosswalk.cols],
+    })
+    pieces["voter_rate"] = pieces["voters"] / pieces["total_population"]
+    return pieces
+
+
+def estimate_sources(crosswalk, target_table):
+    # Counts of every source region estimated from the target table: the
+    # sparse product (normalized overlaps) x (target counts), via bincount
+    pieces = apportion(crosswalk, target_table)
+    estimate = pd.DataFrame({
+        crosswalk.source: crosswalk.source_keys,
+        "total_population": np.bincount(crosswalk.rows, weights=pieces["total_population"], minlength=len(crosswalk.source_keys)),
+        "voters": np.bincount(crosswalk.rows, weights=pieces["voters"], minlength=len(crosswalk.source_keys)),
+    })
+    estimate["voter_rate"] = estimate["voters"] / estimate["total_population"]
+    return estimate
+
+
+def breakdown(crosswalk, target_table, source_key):
+    # Turnout of the target regions within one source region
+    pieces = apportion(crosswalk, target_table)
+    pieces = pieces[pieces[crosswalk.source] == source_key]
+    return pieces.drop(columns=crosswalk.source).sort_values("total_population", ascending=False)
+
+
+def load_breakdowns(source, target, folder=CROSSWALK_DIR):
+    # {source region: breakdown} of the target geography's table (as the
+    # dashboards load it) over every source region, or None without an
+    # up-to-date cross-walk. Kept in memory until the cross-walk set, an input
+    # it was built from or the target table changes.
+    meta = _read_meta(folder)
+    if meta is None:
+        return None
+    layer = BOUNDARY_LAYERS[target]
+    signature = (
+        file_signature(os.path.join(folder, "meta.json")),
+        tuple(file_signature(path) if os.path.exists(path) else None for path in meta["inputs"]),
+        input_signature(layer),
+    )
+    key = (source, target, os.path.abspath(folder))
+    with _lock:
+        entry = _breakdowns.get(key)
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+
+    with span("load crosswalk"):
+        crosswalk = load_crosswalk(source, target, folder)
+    if crosswalk is None:
+        return None
+    target_table = load_metrics(layer)
+    with span("apportion"):
+        pieces = apportion(crosswalk, target_table).sort_values("total_population", ascending=False)
+        breakdowns = {
+            region: rows.drop(columns=source)
+            for region, rows in pieces.groupby(source, sort=False)
+        }
+    with _lock:
+        _breakdowns[key] = (signature, breakdowns)
+    return breakdowns
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute cross-walk tables between the five geographies.")
+    parser.add_argument("--roll", help="Voter roll CSV; weight overlaps by voters instead of area")
+    parser.add_argument("--samples", type=int, default=2_000_000, help="Sample points for area weights")
+    args = parser.parse_args()
+
+    if args.roll:
+        crosswalks = roll_crosswalks(args.roll)
+        save_crosswalks(crosswalks, "voters", {args.roll: file_hash(args.roll)})
+    else:
+        crosswalks = area_crosswalks(args.samples)
+        save_crosswalks(crosswalks, "area", boundary_vintage())
+    for (source, target), crosswalk in crosswalks.items():
+        print(f"{source} x {target}: {len(crosswalk.weights)} overlapping pairs")
@@ -0,0 +1,177 @@
+"""Turnout of many elections for all five geographies, stored as arrays.
+
+The cube is election x geography x metric. Under cube/, every geography has
+an append-only list of region keys (<geography>.keys.json) and one int32
+array per election (<geography>/<election>.npy, regions x STORED metrics,
+-1 where a region had no data). A new election only appends the regions it
+is first to mention, so earlier arrays stay valid and are never rewritten.
+meta.json lists the elections in order with the hash of every CSV they were
+built from.
+
+Arrays are memory-mapped and loaded per election on first use, so holding
+many elections costs nothing until they are drawn. non_voters and
+voter_rate are derived from the stored counts on load.
+
+Usage:
+    python cube.py add 2024-11 --label "Nov 2024" [--csv-dir .]    # the five turnout CSVs of one election
+    python cube.py list
+"""
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from aggregate import OUTPUTS, canonical_keys
+from boundaries import file_hash, file_signature, json_writer, write_atomic
+
+CUBE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cube")
+STORED = ("total_population", "voters")
+MISSING = -1
+
+# Election arrays keyed by path, with the signature they were mapped at
+_arrays = {}
+_lock = threading.Lock()
+
+
+def _slug(column):
+    return column.lower().replace(" ", "_")
+
+
+def _keys_path(column, folder):
+    return os.path.join(folder, f"{_slug(column)}.keys.json")
+
+
+def _save_array(path, values):
+    # Through a file object: np.save on a path would append ".npy" to it
+    with open(path, "wb") as file:
+        np.save(file, values)
+
+
+def _array_path(column, election, folder):
+    return os.path.join(folder, _slug(column), f"{election}.npy")
+
+
+def read_meta(folder=CUBE_DIR):
+    try:
+        with open(os.path.join(folder, "meta.json"), "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {"metrics": list(STORED), "elections": []}
+
+
+def read_keys(column, folder=CUBE_DIR):
+    try:
+        with open(_keys_path(column, folder), "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return []
+
+
+def elections(column=None, folder=CUBE_DIR):
+    # (id, label) of every election in order; with a geography, only the
+    # elections that have data for it
+    return [
+        (election["id"], election["label"])
+        for election in read_meta(folder)["elections"]
+        if column is None or column in election["sources"]
+    ]
+
+
+def add_election(election, label, csv_dir=".", folder=CUBE_DIR):
+    # Store the turnout CSVs of one election (as written by aggregate.py);
+    # adding an id again replaces that election. Returns the geographies added.
+    meta = read_meta(folder)
+    sources = {}
+    for column, csv_name in OUTPUTS.items():
+        path = os.path.join(csv_dir, csv_name)
+        if not os.path.exists(path):
+            continue
+        table = pd.read_csv(path, dtype={column: str})
+        table[column] = canonical_keys(table[column]).to_numpy()
+        table = table.dropna(subset=[column]).drop_duplicates(column)
+
+        # Append regions this election is the first to mention
+        keys = read_keys(column, folder)
+        positions = {key: position for position, key in enumerate(keys)}
+        for key in table[column]:
+            if key not in positions:
+                positions[key] = len(keys)
+                keys.append(key)
+
+        values = np.full((len(keys), len(STORED)), MISSING, dtype=np.int32)
+        rows = table[column].map(positions).to_numpy()
+        values[rows] = table[list(STORED)].to_numpy(dtype=np.int32)
+
+        write_atomic(_array_path(column, election, folder), lambda temp_path: _save_array(temp_path, values))
+        write_atomic(_keys_path(column, folder), json_writer(keys))
+        sources[column] = file_hash(path)
+
+    if not sources:
+        raise ValueError(f"no turnout CSVs in {csv_dir}")
+    entries = [entry for entry in meta["elections"] if entry["id"] != election]
+    entries.append({"id": election, "label": label, "sources": sources})
+    meta["elections"] = sorted(entries, key=lambda entry: entry["id"])
+    # meta.json goes last so a half-added election is never listed
+    write_atomic(os.path.join(folder, "meta.json"), json_writer(meta))
+    return list(sources)
+
+
+def _load_array(column, election, folder):
+    # Memory-mapped counts of one election, mapped once per file version
+    path = _array_path(column, election, folder)
+    signature = file_signature(path)
+    with _lock:
+        entry = _arrays.get(path)
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+    values = np.load(path, mmap_mode="r")
+    with _lock:
+        _arrays[path] = (signature, values)
+    return values
+
+
+def load_counts(column, election_ids, folder=CUBE_DIR):
+    # Region keys and counts (elections x regions x STORED) aligned to the
+    # key list; NaN where an election has no data for a region
+    keys = read_keys(column, folder)
+    counts = np.full((len(election_ids), len(keys), len(STORED)), np.nan)
+    for index, election in enumerate(election_ids):
+        values = _load_array(column, election, folder)
+        counts[index, :len(values)] = np.where(values == MISSING, np.nan, values)
+    return keys, counts
+
+
+def load_election(column, election, folder=CUBE_DIR):
+    # One election as a turnout table: key column, total_population,
+    # voters, non_voters and voter_rate, like the CSVs
+    keys, counts = load_counts(column, [election], folder)
+    total, voters = counts[0, :, 0], counts[0, :, 1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rate = voters / total
+    return pd.DataFrame({
+        column: keys,
+        "total_population": total,
+        "voters": voters,
+        "non_voters": total - voters,
+        "voter_rate": rate,
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store turnout of many elections as arrays.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Add (or replace) one election from its turnout CSVs")
+    add.add_argument("election", help="Sortable election id, e.g. 2024-11")
+    add.add_argument("--label", help="Name shown on the slider (default: the id)")
+    add.add_argument("--csv-dir", default=".", help="Folder with the five turnout CSVs")
+    commands.add_parser("list", help="List the stored elections")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        added = add_election(args.election, args.label or args.election, args.csv_dir)
+        print(f"{args.election}: {', '.join(added)}")
+    for election, label in elections():
+        print(f"{election}  {label}")
@@ -0,0 +1,180 @@
+"""Zoom-aware label placement: which labels are drawn at which zoom.
+
+Labels are placed greedily, most important first (by voters, else
+population, else the layer's metric), into a grid collision index of the
+boxes already placed; a label whose box overlaps one of them is left out.
+This runs for every zoom in PLACEMENT_ZOOMS, lowest first. At a higher zoom
+the same labels are further apart while their boxes keep their pixel size,
+so everything placed at one zoom stays placed at the next and only the
+labels left out are tried again. The result is one number per label: the
+lowest zoom it is drawn at (its min zoom).
+
+Boxes are estimated from the label text and font size, in Web Mercator
+pixels (512 px tiles, as plotly's maps use). Placements are persisted to
+placements/<boundary>.<csv>.json (next to the CSV) with a hash of the labels they were
+computed for, and recomputed when the labels, their ranking or the text
+change. Placement always covers the whole layer; a zoomed-in map looks up
+the labels under its viewport.
+
+Usage:
+    python declutter.py    # place the labels of every decluttered layer ahead of time
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from anchors import load_anchors
+from boundaries import json_writer, sidecar_dir, write_cache
+from joins import join_metrics
+from labels import label_text
+from metrics import load_metrics
+from spans import span
+from vector_tiles import TILE_SIZE, world_xy
+
+PLACEMENT_DIR = "placements"  # Next to each CSV (see boundaries.sidecar_dir)
+PLACEMENT_ZOOMS = tuple(range(0, 13))
+PLACEMENT_VERSION = "1"
+# Columns labels are ranked by, first one present wins
+RANK_COLUMNS = ("voters", "total_population")
+CHAR_WIDTH = 0.6  # Average glyph width as a fraction of the font size
+LINE_HEIGHT = 1.2
+PADDING = 2  # Pixels kept clear around every label
+CELL = 64  # Grid cell size in pixels
+
+# Placements keyed by path, with the digest of the labels they were placed for
+_placements = {}
+_lock = threading.Lock()
+
+
+def label_boxes(text, size):
+    # Estimated (width, height) in pixels of every label, padding included
+    lengths = np.array([len(str(value)) for value in text], dtype=float)
+    return lengths * size * CHAR_WIDTH + 2 * PADDING, np.full(len(lengths), size * LINE_HEIGHT + 2 * PADDING)
+
+
+def place_labels(lon, lat, widths, heights, rank, zooms=PLACEMENT_ZOOMS):
+    # Min zoom of every label (zooms[-1] + 1 for labels never placed);
+    # higher rank is placed first, ties in input order
+    x, y = world_xy(lon, lat)
+    order = np.argsort(-np.nan_to_num(np.asarray(rank, dtype=float), nan=-np.inf), kind="stable").tolist()
+    half_widths, half_heights = (np.asarray(widths) / 2).tolist(), (np.asarray(heights) / 2).tolist()
+    never = zooms[-1] + 1
+    min_zoom = [never] * len(order)
+
+    for zoom in zooms:
+        scale = TILE_SIZE * 2 ** zoom
+        xs, ys = (x * scale).tolist(), (y * scale).tolist()
+        grid = {}
+        # Labels placed at a lower zoom cannot collide here; they only
+        # occupy the grid
+        placed = [index for index in order if min_zoom[index] < zoom]
+        candidates = [index for index in order if min_zoom[index] == never]
+        for index in placed + candidates:
+            left, right = xs[index] - half_widths[index], xs[index] + half_widths[index]
+            top, bottom = ys[index] - half_heights[index], ys[index] + half_heights[index]
+            cells = [
+                (column, row)
+                for column in range(int(left // CELL), int(right // CELL) + 1)
+                for row in range(int(top // CELL), int(bottom // CELL) + 1)
+            ]
+            if min_zoom[index] == never:
+                if any(
+                    abs(xs[index] - xs[other]) < half_widths[index] + half_widths[other]
+                    and abs(ys[index] - ys[other]) < half_heights[index] + half_heights[other]
+                    for cell in cells for other in grid.get(cell, ())
+                ):
+                    continue
+                min_zoom[index] = zoom
+            for cell in cells:
+                grid.setdefault(cell, []).append(index)
+    return np.array(min_zoom)
+
+
+def rank_values(labels, layer):
+    # What labels are ranked by: voters, else population, else the metric
+    for column in RANK_COLUMNS + (layer.metric,):
+        if column in labels.columns:
+            return labels[column].to_numpy(dtype=float, na_value=np.nan)
+    return np.zeros(len(labels))
+
+
+def placement_path(layer):
+    boundary = os.path.splitext(os.path.basename(layer.geojson_path))[0]
+    csv_name = os.path.splitext(os.path.basename(layer.csv_path))[0]
+    return os.path.join(sidecar_dir(layer.csv_path, PLACEMENT_DIR), f"{boundary}.{csv_name}.json")
+
+
+def _digest(lon, lat, text, rank, size):
+    # Hash of everything a placement depends on
+    digest = hashlib.sha256()
+    for values in (lon, lat, rank):
+        digest.update(np.ascontiguousarray(values, dtype=float).tobytes())
+    digest.update(json.dumps([[str(value) for value in text], size, PLACEMENT_ZOOMS, PLACEMENT_VERSION]).encode())
+    return digest.hexdigest()
+
+
+def _place(layer):
+    # Min zoom of every label the layer's whole-state map draws, by name
+    anchors = load_anchors(layer.geojson_path, layer.feature_key)
+    matches = join_metrics(load_metrics(layer), layer.key_column, anchors["name"])
+    labels = anchors.join(matches.matched, how="inner" if layer.labels == "matched" else "left")
+    text = label_text(layer, labels)
+    rank = rank_values(labels, layer)
+    digest = _digest(labels["lon"], labels["lat"], text, rank, layer.label_size)
+    path = placement_path(layer)
+    with _lock:
+        entry = _placements.get(path)
+    if entry is not None and entry[0] == digest:
+        return entry[1]
+
+    min_zoom = None
+    try:
+        with open(path, "r") as file:
+            stored = json.load(file)
+        if stored.get("digest") == digest:
+            min_zoom = pd.Series(stored["min_zoom"], index=stored["names"])
+    except (OSError, ValueError):
+        pass
+    if min_zoom is None:
+        with span("place labels"):
+            widths, heights = label_boxes(text, layer.label_size)
+            min_zoom = pd.Series(place_labels(labels["lon"], labels["lat"], widths, heights, rank), index=labels["name"].tolist())
+        stored = {"digest": digest, "names": min_zoom.index.tolist(), "min_zoom": min_zoom.tolist()}
+        # Read-only deployment: the placement is kept in memory only
+        write_cache(path, json_writer(stored))
+    with _lock:
+        _placements[path] = (digest, min_zoom)
+    return min_zoom
+
+
+def label_zooms(layer, names):
+    # Min zoom of the labels of the given features. Placement always covers
+    # the whole layer, so a zoomed map shows the same labels as the
+    # whole-state map at that zoom; it is reused from placements/ while the
+    # labels, their ranking and their text are unchanged.
+    placed = _place(layer)
+    return placed[~placed.index.duplicated()].reindex(names).to_numpy(dtype=float)
+
+
+def visible_at(min_zoom, zoom):
+    # Labels drawn at a (possibly fractional) map zoom
+    return min_zoom <= math.floor(zoom)
+
+
+if __name__ == "__main__":
+    import time
+
+    from layers import MUSLIM_LAYERS, VOTER_LAYERS
+
+    for layer in list(VOTER_LAYERS.values()) + list(MUSLIM_LAYERS.values()):
+        if not layer.declutter or not (os.path.exists(layer.csv_path) and os.path.exists(layer.geojson_path)):
+            continue
+        start = time.perf_counter()
+        min_zoom = _place(layer).to_numpy()
+        shown = ", ".join(f"z{zoom} {int(visible_at(min_zoom, zoom).sum())}" for zoom in range(layer.zoom, layer.zoom + 4))
+        print(f"{placement_path(layer)}: {len(min_zoom)} labels ({shown}) in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,242 @@
+"""Batch export of every map to standalone HTML and PNG files.
+
+Builds the figure of every section of both dashboards, exactly as the app
+does (render.build_figure), and writes it to exports/<dashboard>/<section>.html
+and .png, with exports/ next to this file unless --out-dir says otherwise.
+With --one-pagers, also writes one page per region of the given sections:
+the map built at the zoom that fits that region (so its geometry detail and
+decluttered labels are those of that zoom, and the region's own label is
+always drawn) plus its row of the metric table.
+
+Exports run in a process pool, one job per section. Each output's cache key
+hashes everything its figure depends on (the layer entry at the zoom it is
+drawn at, the contents of the CSV, boundary, simplified boundary and key map
+files, the region and the output format); exports/manifest.json remembers
+the key each file was written with, and files whose key has not changed are
+skipped.
+
+PNG export needs the optional kaleido package (pip install kaleido); without
+it only HTML is written.
+
+Usage:
+    python export.py [--out-dir exports] [--formats html png] [--workers 4]
+                     [--one-pagers "Legislative Districts" "Congressional Districts"] [--force]
+"""
+import argparse
+import dataclasses
+import hashlib
+import html
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import plotly
+
+from boundaries import file_hash, json_writer, load_geojson, write_atomic
+from keymatch import keymap_path
+from layers import DASHBOARDS, slug
+from simplify import lod_path
+
+try:
+    import kaleido  # noqa: F401  (only needed for PNG)
+except ImportError:
+    kaleido = None
+
+logger = logging.getLogger("chorpleth.export")
+
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "exports")
+MANIFEST = "manifest.json"
+# Bump when the exported files change for reasons the cache key cannot see
+EXPORT_VERSION = "2"
+
+
+def _stable(value):
+    # Layer fields as JSON: functions by name, everything else as is
+    return getattr(value, "__name__", None) or repr(value)
+
+
+def export_key(layer, kind, region=None, options=()):
+    # Content hash of everything one exported file depends on
+    paths = [layer.csv_path, layer.geojson_path, lod_path(layer.geojson_path, zoom=layer.zoom), keymap_path(layer)]
+    digest = hashlib.sha256()
+    digest.update(json.dumps(dataclasses.asdict(layer), sort_keys=True, default=_stable).encode())
+    digest.update(json.dumps([file_hash(path) if os.path.exists(path) else None for path in paths]).encode())
+    digest.update(json.dumps([kind, region, list(options), EXPORT_VERSION, plotly.__version__]).encode())
+    return digest.hexdigest()
+
+
+def read_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST), "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_manifest(out_dir, manifest):
+    write_atomic(os.path.join(out_dir, MANIFEST), json_writer(manifest, indent=1, sort_keys=True))
+
+
+def _standalone_figure(layer, focus=None):
+    # The app's figure with its geometry inlined: a standalone file cannot
+    # load the app's static URLs
+    from render import build_figure
+
+    fig, _ = build_figure(layer, focus=focus)
+    if isinstance(fig.data[0].geojson, str):
+        fig.update_traces(geojson=load_geojson(lod_path(layer.geojson_path, zoom=layer.zoom)), selector=0)
+    return fig
+
+
+def _write_text(path, text):
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
+
+
+def page_view(layer, region):
+    # (lon, lat, zoom) that fits one region into the layer's map size
+    from spatial_index import load_index
+    from vector_tiles import fit_view
+
+    index = load_index(layer.geojson_path, layer.feature_key)
+    return fit_view(tuple(index.bounds[index.keys.index(region)].tolist()), layer.width, layer.height)
+
+
+def page_figure(layer, region):
+    # Map zoomed to one region, built at that zoom: labels decluttered for
+    # the whole-state zoom would leave most regions unlabelled
+    lon, lat, zoom = page_view(layer, region)
+    fig = _standalone_figure(dataclasses.replace(layer, zoom=zoom), focus=region)
+    fig.update_layout(mapbox_center={"lon": lon, "lat": lat})
+    return fig
+
+
+def _one_pager(layer, region, row, plotlyjs):
+    # Map zoomed to one region, with its metrics underneath
+    fig = page_figure(layer, region)
+    table = row.to_frame().T.to_html(index=False, border=0) if row is not None else "<p>No data for this region.</p>"
+    return (
+        f"<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>{html.escape(region)}</title></head><body>"
+        f"<h1>{html.escape(region)}</h1><p>{html.escape(layer.title)}</p>"
+        f"{fig.to_html(full_html=False, include_plotlyjs=plotlyjs)}{table}</body></html>"
+    )
+
+
+def export_section(dashboard, section, jobs, out_dir, plotlyjs=True):
+    # Worker: build one section's whole-state figure once (and every
+    # one-pager's own) and write the outputs listed in jobs
+    # ([(path, kind, region)]); returns the paths written
+    from metrics import load_metrics
+
+    layer = DASHBOARDS[dashboard][section]
+    fig = None
+    written = []
+    data = None
+    for path, kind, region in jobs:
+        if kind != "one-pager" and fig is None:
+            fig = _standalone_figure(layer)
+        if kind == "html":
+            write_atomic(path, lambda temp_path: fig.write_html(temp_path, include_plotlyjs=plotlyjs))
+        elif kind == "png":
+            write_atomic(path, lambda temp_path: fig.write_image(temp_path, format="png", width=layer.width, height=layer.height))
+        else:
+            if data is None:
+                data = load_metrics(layer)
+            rows = data[data[layer.key_column] == region]
+            page = _one_pager(layer, region, rows.iloc[0] if len(rows) else None, plotlyjs)
+            write_atomic(path, lambda temp_path: _write_text(temp_path, page))
+        written.append(path)
+    return written
+
+
+def plan(out_dir, formats, one_pagers=(), plotlyjs=True):
+    # Every output with its cache key: {(dashboard, section): [(path, kind, region, key)]}
+    from anchors import load_anchors
+    from metrics import load_metrics
+
+    outputs = {}
+    for dashboard, layers in DASHBOARDS.items():
+        for section, layer in layers.items():
+            if not (os.path.exists(layer.csv_path) and os.path.exists(layer.geojson_path)):
+                continue
+            # Matches keys now so the key map the figure uses exists before it is hashed
+            load_metrics(layer)
+            base = os.path.join(out_dir, dashboard, slug(section))
+            jobs = outputs.setdefault((dashboard, section), [])
+            for kind in formats:
+                jobs.append((f"{base}.{kind}", kind, None, export_key(layer, kind, options=[plotlyjs])))
+            if section in one_pagers:
+                for region in load_anchors(layer.geojson_path, layer.feature_key)["name"]:
+                    path = os.path.join(base, f"{slug(region)}.html")
+                    page = dataclasses.replace(layer, zoom=page_view(layer, region)[2])
+                    jobs.append((path, "one-pager", region, export_key(page, "one-pager", region, [plotlyjs])))
+    return outputs
+
+
+def export_all(out_dir=EXPORT_DIR, formats=("html", "png"), one_pagers=(), workers=None, force=False, plotlyjs=True):
+    # Export everything whose cache key changed; returns (rebuilt, skipped).
+    # Files written by sections that succeeded are recorded in the manifest
+    # even when another section fails; the first failure is then re-raised.
+    if "png" in formats and kaleido is None:
+        logger.warning("kaleido is not installed; skipping PNG (pip install kaleido)")
+        formats = [kind for kind in formats if kind != "png"]
+    manifest = read_manifest(out_dir)
+    outputs = plan(out_dir, formats, one_pagers, plotlyjs)
+
+    stale = {}
+    skipped = 0
+    for section, jobs in outputs.items():
+        for path, kind, region, key in jobs:
+            if not force and manifest.get(os.path.relpath(path, out_dir)) == key and os.path.exists(path):
+                skipped += 1
+            else:
+                stale.setdefault(section, []).append((path, kind, region, key))
+
+    rebuilt = 0
+    failure = None
+    keys = {path: key for jobs in stale.values() for path, _, _, key in jobs}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(export_section, dashboard, section, [job[:3] for job in jobs], out_dir, plotlyjs): (dashboard, section)
+                for (dashboard, section), jobs in stale.items()
+            }
+            for future, (dashboard, section) in futures.items():
+                try:
+                    written = future.result()
+                except Exception as error:
+                    logger.error("%s / %s failed: %s", dashboard, section, error)
+                    failure = failure or error
+                    continue
+                for path in written:
+                    manifest[os.path.relpath(path, out_dir)] = keys[path]
+                rebuilt += len(written)
+                logger.info("%s / %s: %d files", dashboard, section, len(written))
+    finally:
+        write_manifest(out_dir, manifest)
+    if failure is not None:
+        raise failure
+    return rebuilt, skipped
+
+
+if __name__ == "__main__":
+    sections = sorted({section for layers in DASHBOARDS.values() for section in layers})
+    parser = argparse.ArgumentParser(description="Export every dashboard map to standalone HTML and PNG files.")
+    parser.add_argument("--out-dir", default=EXPORT_DIR, help="Folder to write the exports to")
+    parser.add_argument("--formats", nargs="+", choices=["html", "png"], default=["html", "png"], help="Output formats")
+    parser.add_argument("--one-pagers", nargs="+", choices=sections, default=[], help="Sections to write a page per region for")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--plotlyjs", choices=["inline", "cdn"], default="inline",
+                        help="Embed plotly.js in every HTML file (inline) or load it from the CDN")
+    parser.add_argument("--force", action="store_true", help="Rebuild every file, ignoring the cache")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    start = time.perf_counter()
+    rebuilt, skipped = export_all(
+        args.out_dir, args.formats, args.one_pagers, args.workers, args.force,
+        plotlyjs=True if args.plotlyjs == "inline" else "cdn",
+    )
+    print(f"{rebuilt} files rebuilt, {skipped} unchanged, in {time.perf_counter() - start:.1f}s")
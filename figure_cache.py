@@ -0,0 +1,102 @@
+"""Process-wide LRU cache of built map figures.
+
+Figures are keyed by everything that changes what they show (see
+render.figure_key), so an unchanged map is served from here on every rerun
+and in every session until a new CSV or boundary file lands. The least
+recently used figures are dropped once the cache holds more than its memory
+cap, set in MiB with the FIGURE_CACHE_MB environment variable.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from plotly.basedatatypes import BasePlotlyType
+
+MAX_BYTES = int(float(os.environ.get("FIGURE_CACHE_MB", "256")) * 2 ** 20)
+NUMBER_BYTES = 12  # Average JSON length of a number (coordinates have 6 decimals)
+TRACE_BYTES = 2048  # Styling and layout around the data arrays
+
+# key -> (value, size in bytes), least recently used first
+_cache = OrderedDict()
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def _json_bytes(value):
+    # Rough JSON length of a value: numbers at NUMBER_BYTES, strings by length
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind in "biuf":
+            return value.size * NUMBER_BYTES
+        return sum(len(str(item)) + 3 for item in value.ravel().tolist())
+    if isinstance(value, str):
+        return len(value) + 3
+    if isinstance(value, (int, float)):
+        return NUMBER_BYTES
+    if isinstance(value, dict):
+        return sum(len(str(name)) + 4 + _json_bytes(item) for name, item in value.items())
+    if isinstance(value, (list, tuple)):
+        if value and isinstance(value[0], (int, float)):
+            return len(value) * NUMBER_BYTES
+        return sum(_json_bytes(item) + 1 for item in value)
+    return NUMBER_BYTES
+
+
+def figure_size(fig):
+    # Estimated size of the figure's JSON, which is also what Streamlit sends
+    # to the browser; used as the figure's weight against the memory cap.
+    # Estimated from the lengths of its arrays and geometry: serializing
+    # every figure a second time would cost about as much as building it.
+    size = TRACE_BYTES
+    for trace in list(fig.data) + [trace for frame in fig.frames for trace in frame.data]:
+        size += TRACE_BYTES
+        for name in trace:
+            value = trace[name]
+            if value is not None and not isinstance(value, BasePlotlyType):
+                size += _json_bytes(value)
+    return size
+
+
+def cached_figure(key, build):
+    # Return the cached value for key, or call build() -> (figure, extra),
+    # cache its result and return it. Cached figures are shared between
+    # sessions and must not be modified.
+    with _lock:
+        entry = _cache.get(key)
+        if entry is not None:
+            _cache.move_to_end(key)
+            _stats["hits"] += 1
+            return entry[0]
+
+    value = build()
+    size = figure_size(value[0])
+
+    with _lock:
+        _stats["misses"] += 1
+        _cache[key] = (value, size)
+        _cache.move_to_end(key)
+        # Evict least recently used figures, but always keep the newest one
+        used = sum(size for _, size in _cache.values())
+        while used > MAX_BYTES and len(_cache) > 1:
+            _, (_, evicted_size) = _cache.popitem(last=False)
+            used -= evicted_size
+            _stats["evictions"] += 1
+    return value
+
+
+def cache_stats():
+    # Hit/miss/eviction counters plus current and maximum size
+    with _lock:
+        return dict(
+            _stats,
+            figures=len(_cache),
+            bytes=sum(size for _, size in _cache.values()),
+            max_bytes=MAX_BYTES,
+        )
+
+
+def clear_cache():
+    with _lock:
+        _cache.clear()
+        for name in _stats:
+            _stats[name] = 0
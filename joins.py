@@ -0,0 +1,33 @@
+"""Join the per-region metric tables to boundary features by key."""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# matched: metric rows in feature order, indexed by feature position
+# unmatched_csv: keys in the metric table with no boundary feature
+# unmatched_geojson: feature keys with no row in the metric table
+JoinResult = namedtuple("JoinResult", ["matched", "unmatched_csv", "unmatched_geojson"])
+
+
+def join_metrics(data, key_column, feature_keys):
+    # Match every feature key against a hash index of the metric table in a
+    # single pass, so the cost grows with features + rows rather than their
+    # product. Like the old per-feature lookups, the first row wins when a
+    # key appears more than once in the table.
+    keys = data[key_column]
+    first = keys.notna() & ~keys.duplicated()
+    index = pd.Index(keys[first])
+
+    feature_keys = pd.Index(feature_keys)
+    positions = index.get_indexer(feature_keys)
+    found = positions >= 0
+
+    matched = data[first].iloc[positions[found]]
+    matched.index = np.flatnonzero(found)
+
+    return JoinResult(
+        matched=matched,
+        unmatched_csv=index[~index.isin(feature_keys)].tolist(),
+        unmatched_geojson=feature_keys[~found].tolist(),
+    )
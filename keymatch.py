@@ -0,0 +1,245 @@
+"""Match CSV region keys to boundary feature keys, and remember the result.
+
+Keys are matched in three steps, each only for what the previous one left:
+
+  1. exact: the CSV key (after the layer's normalizer) equals a feature key;
+  2. canonical: both sides agree after the geography's canonical key rule
+     (case, punctuation and spacing folded, "County"/"School District"
+     suffixes dropped, district names reduced to their number);
+  3. fuzzy: the closest canonical feature key by difflib ratio, among
+     candidates from a trigram index, if it scores at least FUZZY_THRESHOLD
+     and clearly beats the runner-up.
+
+The result is persisted per layer as keymaps/<csv>.<rule>.<boundary>.csv,
+next to the CSV (csv_key, feature_key, method, score, features). Later runs
+reuse it and only match keys they have not seen; rows can be fixed by hand
+by setting method to "manual", and manual rows are never dropped or
+re-matched. Keys that could not be matched keep an empty feature_key and
+are reported; they are tried again only once the boundary's features change
+(the features column holds a digest of the feature keys they were tried
+against).
+
+Usage:
+    python keymatch.py    # build or refresh the key maps of every layer and print a report
+"""
+import difflib
+import hashlib
+import os
+import re
+from collections import Counter, defaultdict, namedtuple
+
+import pandas as pd
+
+from boundaries import sidecar_dir, write_cache
+
+KEYMAP_DIR = "keymaps"  # Next to each CSV (see boundaries.sidecar_dir)
+FUZZY_THRESHOLD = 0.85
+FUZZY_MARGIN = 0.05
+CANDIDATES = 10
+
+TrigramIndex = namedtuple("TrigramIndex", ["keys", "grams"])
+
+
+def _fold(key):
+    # Lowercase words and digits only, single spaces
+    key = str(key).lower().replace("&", " and ")
+    return " ".join(re.findall(r"[a-z0-9]+", key))
+
+
+def _drop_words(words):
+    def rule(key):
+        key = _fold(key)
+        for word in words:
+            key = re.sub(rf"(^| ){word}( |$)", " ", key).strip()
+        return key
+    return rule
+
+
+def _district_number(key):
+    # "Legislative (House) District 7", "7.0" and "LD 07" are all "7"
+    numbers = re.findall(r"\d+(?:\.\d+)?", str(key))
+    return str(int(float(numbers[-1]))) if numbers else _fold(key)
+
+
+# Canonical key rule of each geography (roll / CSV column name)
+KEY_RULES = {
+    "County": _drop_words(["county"]),
+    "City": _drop_words(["city of", "town of", "city"]),
+    "School District": _drop_words(["school district", "public schools", "schools", "sd"]),
+    "Legislative District": _district_number,
+    "Congressional District": _district_number,
+}
+
+
+def canonical(key, column):
+    return KEY_RULES.get(column, _fold)(key)
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+
+def build_trigram_index(keys):
+    # Trigram -> positions of the keys containing it
+    grams = defaultdict(list)
+    for position, key in enumerate(keys):
+        for gram in _trigrams(key):
+            grams[gram].append(position)
+    return TrigramIndex(keys=list(keys), grams=dict(grams))
+
+
+def fuzzy_match(index, key):
+    # (position, score) of the best key in the index, or (None, best score)
+    # when nothing is close enough or the best is not clearly ahead
+    shared = Counter()
+    for gram in _trigrams(key):
+        shared.update(index.grams.get(gram, ()))
+    scored = sorted(
+        ((difflib.SequenceMatcher(None, key, index.keys[position]).ratio(), position)
+         for position, _ in shared.most_common(CANDIDATES)),
+        reverse=True,
+    )
+    if not scored:
+        return None, 0.0
+    best_score, best = scored[0]
+    runner_up = scored[1][0] if len(scored) > 1 else 0.0
+    if best_score < FUZZY_THRESHOLD or best_score - runner_up < FUZZY_MARGIN:
+        return None, best_score
+    return best, best_score
+
+
+def match_keys(csv_keys, feature_keys, column):
+    # Mapping table for every distinct CSV key
+    feature_keys = [key for key in pd.unique(pd.Series(feature_keys, dtype=object).dropna())]
+    exact = set(feature_keys)
+
+    # Canonical forms that name exactly one feature
+    by_canonical = defaultdict(list)
+    for key in feature_keys:
+        by_canonical[canonical(key, column)].append(key)
+    unique_canonical = {form: keys[0] for form, keys in by_canonical.items() if len(keys) == 1}
+    index = build_trigram_index(list(unique_canonical))
+
+    rows = []
+    for key in pd.unique(pd.Series(csv_keys, dtype=object).dropna()):
+        if key in exact:
+            rows.append((key, key, "exact", 1.0))
+            continue
+        form = canonical(key, column)
+        if form in unique_canonical:
+            rows.append((key, unique_canonical[form], "canonical", 1.0))
+            continue
+        position, score = fuzzy_match(index, form)
+        if position is None:
+            rows.append((key, "", "unmatched", round(score, 3)))
+        else:
+            rows.append((key, unique_canonical[index.keys[position]], "fuzzy", round(score, 3)))
+    return pd.DataFrame(rows, columns=["csv_key", "feature_key", "method", "score"])
+
+
+def keymap_path(layer):
+    # One map per CSV, key normalizer and boundary file
+    csv_name = os.path.splitext(os.path.basename(layer.csv_path))[0]
+    rule = layer.normalize.__name__ if layer.normalize is not None else "raw"
+    boundary_name = os.path.splitext(os.path.basename(layer.geojson_path))[0]
+    return os.path.join(sidecar_dir(layer.csv_path, KEYMAP_DIR), f"{csv_name}.{rule}.{boundary_name}.csv")
+
+
+def features_digest(feature_keys):
+    # Short hash of a boundary's feature keys, recorded on unmatched rows
+    keys = sorted(set(pd.Series(feature_keys, dtype=object).dropna().astype(str)))
+    return hashlib.sha256("\n".join(keys).encode()).hexdigest()[:16]
+
+
+def read_keymap(path):
+    try:
+        return pd.read_csv(path, dtype={"csv_key": str, "feature_key": str}, keep_default_na=False)
+    except (OSError, pd.errors.EmptyDataError):
+        return None
+
+
+def load_keymap(layer, csv_keys, feature_keys):
+    # Persisted mapping for a layer, extended with any CSV keys it lacks.
+    # Manual rows are always kept; other rows are matched again once their
+    # feature has disappeared, unmatched ones once the features changed.
+    # Rows for keys the current CSV lacks are left as they are, so a CSV
+    # that temporarily drops a region loses nothing.
+    path = keymap_path(layer)
+    stored = read_keymap(path)
+    if stored is not None and "features" not in stored.columns:
+        stored["features"] = ""  # Written before unmatched rows were stamped
+    csv_keys = pd.Series(csv_keys, dtype=object).dropna().astype(str)
+    features = set(pd.Series(feature_keys, dtype=object).dropna())
+    digest = features_digest(feature_keys)
+
+    known = set()
+    if stored is not None:
+        valid = (
+            (stored["method"] == "manual")
+            | stored["feature_key"].isin(features)
+            | ((stored["method"] == "unmatched") & (stored["features"] == digest))
+        )
+        known = set(stored.loc[valid, "csv_key"])
+    missing = csv_keys[~csv_keys.isin(known)]
+    if missing.empty and stored is not None:
+        return stored
+
+    matched = match_keys(missing, feature_keys, layer.key_column)
+    matched["features"] = matched["method"].eq("unmatched").map({True: digest, False: ""})
+    kept = stored[~stored["csv_key"].isin(set(matched["csv_key"]))] if stored is not None else matched.iloc[:0]
+    keymap = pd.concat([kept, matched]) if len(kept) else matched
+    keymap = keymap.drop_duplicates("csv_key").sort_values("csv_key").reset_index(drop=True)
+    if stored is not None and keymap.equals(stored):
+        return stored
+    # Read-only deployment: the mapping is kept in memory only
+    write_cache(path, lambda temp_path: keymap.to_csv(temp_path, index=False))
+    return keymap
+
+
+def apply_keymap(data, key_column, keymap):
+    # Copy of data with its keys replaced by the feature keys they map to;
+    # unmatched keys are left as they are
+    mapping = {
+        csv_key: feature_key
+        for csv_key, feature_key in zip(keymap["csv_key"], keymap["feature_key"])
+        if feature_key and csv_key != feature_key
+    }
+    if not mapping:
+        return data
+    data = data.copy()
+    keys = data[key_column].astype(object)
+    data[key_column] = keys.map(lambda key: mapping.get(key, key)).astype(data[key_column].dtype.name)
+    return data
+
+
+def match_report(keymap, feature_keys):
+    # Counts per method, plus what could not be matched on either side
+    matched = set(keymap.loc[keymap["feature_key"] != "", "feature_key"])
+    return {
+        "counts": keymap["method"].value_counts().to_dict(),
+        "unmatched_csv": keymap.loc[keymap["feature_key"] == "", "csv_key"].tolist(),
+        "features_without_data": [key for key in feature_keys if key not in matched],
+        "fuzzy": keymap.loc[keymap["method"] == "fuzzy", ["csv_key", "feature_key", "score"]].values.tolist(),
+    }
+
+
+if __name__ == "__main__":
+    from anchors import load_anchors
+    from layers import MUSLIM_LAYERS, VOTER_LAYERS
+    from tables import load_table
+
+    for layer in list(VOTER_LAYERS.values()) + list(MUSLIM_LAYERS.values()):
+        if not os.path.exists(layer.geojson_path):
+            print(f"{layer.title}: {layer.geojson_path} missing, skipped")
+            continue
+        feature_keys = load_anchors(layer.geojson_path, layer.feature_key)["name"].tolist()
+        keymap = load_keymap(layer, load_table(layer)[layer.key_column], feature_keys)
+        report = match_report(keymap, feature_keys)
+        print(f"{os.path.relpath(keymap_path(layer))}: {report['counts']}")
+        for csv_key, feature_key, score in report["fuzzy"]:
+            print(f"  fuzzy {csv_key!r} -> {feature_key!r} ({score})")
+        if report["unmatched_csv"]:
+            print(f"  CSV keys without a boundary: {report['unmatched_csv']}")
+        if report["features_without_data"]:
+            print(f"  boundaries without data: {report['features_without_data']}")
@@ -0,0 +1,43 @@
+"""Map label helpers: every label of a layer goes into one text trace."""
+import numpy as np
+import plotly.graph_objects as go
+
+
+def _as_list(values):
+    # Plain Python lists serialize noticeably faster than NumPy arrays or
+    # Series in plotly's JSON encoder
+    if values is None or isinstance(values, str):
+        return values
+    return np.asarray(values).tolist()
+
+
+def label_text(layer, labels):
+    # Text drawn for each label: the feature name, or its number
+    return labels["name"].str.split().str[-1] if layer.label_text == "number" else labels["name"]
+
+
+def label_trace(lon, lat, text, hovertext=None, size=10):
+    # A single text-only Scattermapbox for all labels of a layer. One trace
+    # with arrays serializes far smaller than one trace per region and keeps
+    # the browser from managing hundreds of separate traces.
+    return go.Scattermapbox(
+        lon=_as_list(lon),
+        lat=_as_list(lat),
+        mode="text",  # Only text is displayed
+        text=_as_list(text),
+        textfont=dict(size=size, color="black"),  # Adjust font size and color
+        hoverinfo="text",  # Configure hover information
+        hovertext=_as_list(hovertext),
+        showlegend=False  # Hide legend for text
+    )
+
+
+def turnout_hovertext(names, voter_rate, voters, non_voters, rate_format="{:.2%}"):
+    # Hover text for the turnout maps, built column-wise from Series that
+    # share one index
+    return (
+        "<b>" + names + "</b><br>"
+        + "Voter Rate: " + voter_rate.map(rate_format.format) + "<br>"
+        + "Voters: " + voters.astype(str) + "<br>"
+        + "Non-Voters: " + non_voters.astype(str)
+    )
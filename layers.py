@@ -0,0 +1,277 @@
+"""Registry of the map layers shown by the dashboards.
+
+Every map is one Layer entry: which CSV and boundary file to join, how the
+CSV keys are normalized, which column colors the map and how the figure and
+its labels look. Both dashboards render their list of layers through
+render.py, so a new geography (precincts, tribal areas, ...) only needs a new
+entry here.
+"""
+import re
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+# Red below 50% turnout, green above
+TURNOUT_COLORSCALE = (
+    (0, "darkred"),        # Very low voter rate
+    (0.25, "red"),         # Moderate red
+    (0.49, "lightcoral"),  # Light red approaching 50%
+    (0.50, "lightgreen"),  # Neutral green for exactly 50%
+    (0.75, "green"),       # Moderate green
+    (1, "darkgreen"),      # High voter rate
+)
+
+POPULATION_COLORSCALE = (
+    (0, "white"),          # < 100
+    (0.05, "yellow"),      # 100 - 500
+    (0.25, "lightgreen"),  # 500 - 1000
+    (0.5, "green"),        # 1000 - 2000
+    (1, "darkgreen"),      # 2000+
+)
+
+COUNTY_COUNT_COLORSCALE = (
+    (0, "white"),          # White for values < 100
+    (0.01, "yellow"),      # Yellow for values between 100 and 1K
+    (0.1, "lightgreen"),   # Light green for values between 1K and 10K
+    (1, "darkgreen"),      # Dark green for values >= 10K
+)
+
+TURNOUT_HOVERTEMPLATE = (
+    "<b>%{location}</b><br>"  # Displays the district name
+    "Voter Rate: %{z:.2%}<br>"  # Converts voter rate (0-1) to percentage
+    "<extra></extra>"  # Removes default "trace" name in hover
+)
+
+TURNOUT_COLORBAR = {"title": "Voter Rate (%)", "ticksuffix": "%"}
+MUSLIM_COLORBAR = {"title": "Muslim Population", "tickprefix": "", "ticksuffix": ""}
+HORIZONTAL_LEGEND = {"orientation": "h", "y": -0.2}
+
+
+# Key normalizers, applied to the CSV key column so it matches the GeoJSON
+def strip_title(keys):
+    return keys.str.strip().str.title()
+
+
+def title_case(keys):
+    return keys.str.title()
+
+
+def legislative_district(keys):
+    # 12 -> "Legislative (House) District 12", the NAMELSAD of the boundary
+    return keys.apply(lambda x: f"Legislative (House) District {int(float(x))}" if pd.notna(x) else None)
+
+
+@dataclass(frozen=True)
+class Layer:
+    # What to join
+    title: str
+    csv_path: str
+    key_column: str
+    geojson_path: str
+    feature_key: str                      # GeoJSON property matched against key_column
+    metric: str                           # CSV column that colors the map
+    normalize: object = None              # Function applied to the CSV key column (see also keymatch.py)
+
+    # Choropleth trace
+    colorscale: tuple = TURNOUT_COLORSCALE
+    zmin: float = None
+    zmax: float = None
+    marker_opacity: float = 0.8
+    marker_line_width: float = 1.2
+    trace_name: str = None
+    colorbar_title: str = None
+    hovertemplate: str = None
+
+    # Labels: "matched" labels only features with data, "all" every feature,
+    # None draws no labels
+    labels: str = "matched"
+    label_size: int = 10
+    label_text: str = "name"              # "name" or "number" (last word of the name)
+    hover: str = None                     # "turnout", "count" or None
+    hover_column: str = None              # Column shown by hover="count"
+    hover_label: str = "Muslim Population"
+    rate_format: str = "{:.2%}"
+    # Draw only labels that do not overlap at the map's zoom (see declutter.py)
+    declutter: bool = False
+
+    # Layout
+    zoom: int = 6
+    height: int = 600
+    width: int = 500
+    colorbar: dict = field(default=None, hash=False, compare=False)
+    legend: dict = field(default=None, hash=False, compare=False)
+    # Offer "Zoom to" a county, drawn from viewport tiles (see vector_tiles.py)
+    tiles: bool = False
+
+    # Report CSV keys without a boundary (and the other way round)
+    check_keys: bool = False
+
+
+def turnout_layer(title, csv_path, key_column, geojson_path, feature_key, **options):
+    # Voter turnout map: voter_rate on a fixed 0-100% scale with turnout hover
+    options.setdefault("trace_name", "Voter Rate (%)")
+    options.setdefault("colorbar", TURNOUT_COLORBAR)
+    return Layer(
+        title=title,
+        csv_path=csv_path,
+        key_column=key_column,
+        geojson_path=geojson_path,
+        feature_key=feature_key,
+        metric="voter_rate",
+        zmin=0,
+        zmax=1,
+        hovertemplate=TURNOUT_HOVERTEMPLATE,
+        hover="turnout",
+        **options,
+    )
+
+
+############ Voter turnout (VoterChroplethMap.py) #########
+VOTER_LAYERS = {
+    "Counties": turnout_layer(
+        "WA Counties - Voter turnout (Nov 2024)",
+        "Voter_Counties_data.csv", "County",
+        "WA_County_Boundaries.geojson", "JURISDICT_NM",
+        normalize=strip_title,
+        height=800, width=1000,
+        legend=HORIZONTAL_LEGEND,
+    ),
+    "Cities": turnout_layer(
+        "WA Cities - Voter turnout (Nov 2024)",
+        "preprocessed_ld_data_City.csv", "City",
+        "CityLimits.geojson", "CITY_NM",
+        normalize=title_case,
+        label_size=9,
+        declutter=True,
+        height=800, width=1000,
+        tiles=True,
+    ),
+    "School Districts": turnout_layer(
+        "WA School District-  Voter turnout (Nov 2024)",
+        "Voter_SD_data.csv", "School District",
+        "Washington_School_Districts_2024.geojson", "LEAName",
+        normalize=strip_title,
+        label_size=9,
+        declutter=True,
+        height=600, width=800,
+        tiles=True,
+    ),
+    "Legislative Districts": turnout_layer(
+        "WA Legislative District - Voter turnout (Nov 2024)",
+        "preprocessed_ld_data.csv", "Legislative District",
+        "wa_legislative_districts.geojson", "NAMELSAD",
+        normalize=legislative_district,
+        rate_format="{:.2f}%",
+        height=800, width=1000,
+        colorbar={
+            "title": "Voter Rate (%)",
+            "tickvals": [0, 0.25, 0.5, 0.75, 1],  # Tick points for the colorbar
+            "ticktext": ["0%", "25%", "50%", "75%", "100%"],  # Tick labels
+        },
+        legend=HORIZONTAL_LEGEND,
+    ),
+    "Congressional Districts": turnout_layer(
+        "WA Congressional Districts - Voter turnout (Nov 2024)",
+        "preprocessed_ld_data_Congressional District.csv", "Congressional District",
+        "Congressional District.geojson", "NAMELSAD",
+        normalize=strip_title,
+        trace_name=None,
+        colorbar_title="Voter Rate (%)",
+        label_size=12,
+        label_text="number",
+        height=600, width=800,
+        check_keys=True,
+    ),
+}
+
+############ Muslim population (chorplethMap.py) #########
+MUSLIM_LAYERS = {
+    "Counties": Layer(
+        title="Eligible Muslim Voters by County in WA State",
+        csv_path="county_counts.csv",
+        key_column="County",
+        geojson_path="WA_County_Boundaries.geojson",
+        feature_key="JURISDICT_NM",
+        metric="Count",
+        normalize=strip_title,
+        colorscale=COUNTY_COUNT_COLORSCALE,
+        labels="all",
+        colorbar=MUSLIM_COLORBAR,
+    ),
+    "Cities": Layer(
+        title="Eligible Muslim Voters by City in WA State",
+        csv_path="preprocessed_ld_data_City.csv",
+        key_column="City",
+        geojson_path="CityLimits.geojson",
+        feature_key="CITY_NM",
+        metric="total_population",
+        normalize=title_case,
+        colorscale=POPULATION_COLORSCALE,
+        marker_line_width=1,
+        labels=None,
+        tiles=True,
+    ),
+    "School Districts": Layer(
+        title="Eligible Muslim Voters by School District in WA State",
+        csv_path="district_muslim_count.csv",
+        key_column="School District",
+        geojson_path="Washington_School_Districts_2024.geojson",
+        feature_key="LEAName",
+        metric="Muslim Count",
+        normalize=strip_title,
+        colorscale=POPULATION_COLORSCALE,
+        labels="all",
+        label_size=9,
+        declutter=True,
+        hover="count",
+        hover_column="Muslim Count",
+        width=800,
+        colorbar=MUSLIM_COLORBAR,
+        tiles=True,
+    ),
+    "Legislative Districts": Layer(
+        title="Eligible Muslim Voters by Legislative District in WA State",
+        csv_path="preprocessed_ld_data.csv",
+        key_column="Legislative District",
+        geojson_path="wa_legislative_districts.geojson",
+        feature_key="NAMELSAD",
+        metric="total_population",
+        normalize=legislative_district,
+        colorscale=POPULATION_COLORSCALE,
+        marker_opacity=0.6,
+        marker_line_width=0.5,
+        trace_name="Population",
+        labels="all",
+        label_size=9,
+        hover="count",
+        hover_column="total_population",
+        legend={"orientation": "h"},
+    ),
+    "Congressional Districts": Layer(
+        title="Eligible Muslim Voters by Congressional District in WA State",
+        csv_path="preprocessed_ld_data_Congressional District.csv",
+        key_column="Congressional District",
+        geojson_path="Congressional District.geojson",
+        feature_key="NAMELSAD",
+        metric="total_population",
+        colorscale=POPULATION_COLORSCALE,
+        colorbar_title="Population",
+        marker_opacity=0.7,
+        marker_line_width=1,
+        labels="all",
+        label_size=12,
+        label_text="number",
+        check_keys=True,
+    ),
+}
+
+# Boundary layer of each roll geography column (see aggregate.OUTPUTS)
+BOUNDARY_LAYERS = {layer.key_column: layer for layer in VOTER_LAYERS.values()}
+
+# Dashboard scripts and the layers each shows, for tools that cover both
+# (export.py, api.py)
+DASHBOARDS = {"VoterChroplethMap": VOTER_LAYERS, "chorplethMap": MUSLIM_LAYERS}
+
+
+def slug(text):
+    return re.sub(r"[^A-Za-z0-9]+", "-", str(text)).strip("-").lower()
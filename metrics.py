@@ -0,0 +1,49 @@
+"""Metric tables as the maps use them: keyed by boundary feature names.
+
+Shared by the dashboards (render.py), the label placement (declutter.py),
+the batch export and the metrics API.
+"""
+import os
+import threading
+
+from anchors import load_anchors
+from boundaries import file_signature
+from keymatch import apply_keymap, keymap_path, load_keymap
+from spans import span
+from tables import load_table
+
+# Metric tables keyed by (CSV path, key column, normalizer, boundary file,
+# feature key), each with the signatures of the files it was built from
+_tables = {}
+_lock = threading.Lock()
+
+
+def input_signature(layer):
+    # Signatures of the CSV, the boundary file and the persisted key map
+    paths = (layer.csv_path, layer.geojson_path, keymap_path(layer))
+    return tuple(file_signature(path) if os.path.exists(path) else None for path in paths)
+
+
+def load_metrics(layer):
+    # Normalized, compactly typed table of a layer (see tables.py) with its
+    # keys mapped onto the boundary's feature keys (see keymatch.py). Kept
+    # in memory until one of its inputs changes; treat as read-only.
+    key = (layer.csv_path, layer.key_column, layer.normalize, layer.geojson_path, layer.feature_key)
+    with _lock:
+        entry = _tables.get(key)
+    if entry is not None and entry[0] == input_signature(layer):
+        return entry[1]
+
+    data = feature_keyed(layer, load_table(layer))
+    with _lock:
+        _tables[key] = (input_signature(layer), data)
+    return data
+
+
+def feature_keyed(layer, data):
+    # data with its keys mapped onto the boundary's feature keys
+    if os.path.exists(layer.geojson_path):
+        feature_keys = load_anchors(layer.geojson_path, layer.feature_key)["name"]
+        with span("keymap"):
+            data = apply_keymap(data, layer.key_column, load_keymap(layer, data[layer.key_column], feature_keys))
+    return data
@@ -0,0 +1,307 @@
+"""Shared rendering engine: turns a Layer from layers.py into a map section."""
+import os
+
+import plotly.graph_objects as go
+import streamlit as st
+
+from anchors import load_anchors
+from assets import figure_geojson, geometry_mode
+from boundaries import cache_stats, file_hash
+from crosswalk import load_breakdowns
+from cube import CUBE_DIR, load_election
+from cube import elections as cube_elections
+from declutter import label_zooms, visible_at
+from figure_cache import cached_figure
+from figure_cache import cache_stats as figure_cache_stats
+from joins import join_metrics
+from keymatch import keymap_path, read_keymap
+from labels import label_text, label_trace, turnout_hovertext
+from layers import BOUNDARY_LAYERS
+from metrics import feature_keyed, load_metrics
+from simplify import lod_path
+from spatial_index import load_index
+from spans import span
+from timing import run_section, show_section_timings
+from vector_tiles import fit_view, outline_trace, read_meta, tile_dir, viewport_bounds, viewport_geojson
+
+MAP_CENTER = {"lat": 47.7511, "lon": -120.7401}  # Center on Washington State
+WHOLE_STATE = "Washington State"
+ELECTION_FRAME_MS = 800  # Time each election stays on screen while playing
+
+
+def load_elections(layer, election_ids):
+    # The layer's table in every stored election (see cube.py), normalized
+    # and key-mapped like load_metrics; all tables share the cube's row order
+    tables = []
+    for election in election_ids:
+        with span("load election"):
+            data = load_election(layer.key_column, election)
+        if layer.normalize is not None:
+            data[layer.key_column] = layer.normalize(data[layer.key_column])
+        tables.append(feature_keyed(layer, data))
+    return tables
+
+
+def _label_hovertext(layer, labels):
+    if layer.hover == "turnout":
+        return turnout_hovertext(
+            labels["name"], labels["voter_rate"], labels["voters"], labels["non_voters"], rate_format=layer.rate_format
+        )
+    if layer.hover == "count":
+        # Features missing from the data show a count of 0
+        counts = labels[layer.hover_column].fillna(0).astype(int)
+        return "<b>" + labels["name"] + "<b><br>" + layer.hover_label + ": " + counts.astype(str)
+    return None
+
+
+def build_figure(layer, view=None, data=None, focus=None):
+    # Choropleth plus one label trace for a layer: the whole state, or with
+    # view = (lon, lat, zoom) only the features under that viewport. data
+    # replaces the layer's CSV table; focus names a feature whose label is
+    # drawn even where decluttering would leave it out. Returns the figure
+    # and the key join (None when the layer neither labels nor checks its keys).
+    if data is None:
+        with span("load metrics"):
+            data = load_metrics(layer)
+
+    outlines = None
+    if view is None:
+        geojson = figure_geojson(lod_path(layer.geojson_path, zoom=layer.zoom))  # Simplified geometry, inlined or by URL
+    else:
+        # Clipped pieces from the tiles under the viewport; borders are drawn
+        # as a separate line trace so tile edges do not show
+        with span("viewport tiles"):
+            geojson, outlines, _ = viewport_geojson(layer.geojson_path, layer.feature_key, view, layer.width, layer.height)
+        visible = {feature["properties"][layer.feature_key] for feature in geojson["features"]}
+        data = data[data[layer.key_column].isin(visible)]
+
+    fig = go.Figure(go.Choroplethmapbox(
+        geojson=geojson,
+        locations=data[layer.key_column],
+        z=data[layer.metric],
+        featureidkey=f"properties.{layer.feature_key}",
+        colorscale=[list(stop) for stop in layer.colorscale],
+        zmin=layer.zmin,
+        zmax=layer.zmax,
+        colorbar_title=layer.colorbar_title,
+        marker_opacity=layer.marker_opacity,
+        marker_line_width=layer.marker_line_width if outlines is None else 0,
+        name=layer.trace_name,
+        hovertemplate=layer.hovertemplate,
+    ))
+    if outlines is not None:
+        fig.add_trace(outline_trace(outlines, width=layer.marker_line_width))
+
+    matches = None
+    if layer.labels is not None or layer.check_keys:
+        # Precomputed label anchors, one row per GeoJSON feature
+        anchors = load_anchors(layer.geojson_path, layer.feature_key)
+        if view is not None:
+            west, south, east, north = viewport_bounds(view, layer.width, layer.height)
+            # Renumbered: the join indexes matches by position in anchors
+            inside = anchors["lon"].between(west, east) & anchors["lat"].between(south, north)
+            anchors = anchors[inside].reset_index(drop=True)
+        with span("join keys"):
+            matches = join_metrics(data, layer.key_column, anchors["name"])
+
+        if layer.labels is not None:
+            with span("labels"):
+                labels = anchors.join(matches.matched, how="inner" if layer.labels == "matched" else "left")
+                if layer.declutter:
+                    # Only labels that do not overlap at this zoom
+                    visible = visible_at(label_zooms(layer, labels["name"]), layer.zoom if view is None else view[2])
+                    labels = labels[visible | (labels["name"] == focus)]
+                text = label_text(layer, labels)
+                fig.add_trace(label_trace(
+                    labels["lon"],
+                    labels["lat"],
+                    text=text,
+                    hovertext=_label_hovertext(layer, labels),
+                    size=layer.label_size
+                ))
+
+    layout = dict(
+        mapbox_style="carto-positron",
+        mapbox_zoom=layer.zoom if view is None else view[2],
+        mapbox_center=MAP_CENTER if view is None else {"lat": view[1], "lon": view[0]},
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        height=layer.height,
+        width=layer.width,
+    )
+    if layer.colorbar is not None:
+        layout["coloraxis_colorbar"] = layer.colorbar
+    if layer.legend is not None:
+        layout["legend"] = layer.legend
+    fig.update_layout(**layout)
+    return fig, matches
+
+
+def build_animation(layer, elections):
+    # The layer's map with a slider over elections [(id, label)]. Frames
+    # hold only the choropleth's z array: the geometry, locations and labels
+    # are sent once with the first election.
+    tables = load_elections(layer, [election for election, _ in elections])
+    fig, matches = build_figure(layer, data=tables[0])
+    if len(fig.data) > 1:
+        # Label hover would show the first election's numbers throughout
+        fig.data[1].hovertext = None
+
+    with span("frames"):
+        fig.frames = [
+            go.Frame(name=label, data=[go.Choroplethmapbox(z=table[layer.metric].tolist())], traces=[0])
+            for table, (_, label) in zip(tables, elections)
+        ]
+    # Choropleth maps only repaint on a redraw
+    step = {"mode": "immediate", "frame": {"duration": 0, "redraw": True}, "transition": {"duration": 0}}
+    play = {"frame": {"duration": ELECTION_FRAME_MS, "redraw": True}, "transition": {"duration": 0}, "fromcurrent": True}
+    fig.update_layout(
+        sliders=[{
+            "active": 0,
+            "currentvalue": {"prefix": "Election: "},
+            "pad": {"t": 10},
+            "steps": [{"label": label, "method": "animate", "args": [[label], step]} for _, label in elections],
+        }],
+        updatemenus=[{
+            "type": "buttons",
+            "direction": "left",
+            "x": 0, "y": 0, "xanchor": "left", "yanchor": "top",
+            "pad": {"t": 10},
+            "buttons": [
+                {"label": "Play", "method": "animate", "args": [None, play]},
+                {"label": "Pause", "method": "animate", "args": [[None], step]},
+            ],
+        }],
+        margin={"r": 0, "t": 0, "l": 0, "b": 80},
+        height=layer.height + 80,
+    )
+    return fig, matches
+
+
+def figure_key(layer, view=None):
+    # Everything a built figure depends on: the layer entry itself (metric,
+    # colorscale, styling), how geometry is delivered, and the contents of
+    # the CSV, the boundary file, the simplified copy actually drawn and the
+    # key map; for a viewport, the view and the tile pyramid it reads.
+    # The table is loaded first: on a first run that writes the key map and
+    # the label anchors, which would otherwise change the key between the
+    # first two reruns (it stays in memory for build_figure).
+    with span("load metrics"):
+        load_metrics(layer)
+    geometry_path = lod_path(layer.geojson_path, zoom=layer.zoom)
+    return (
+        layer,
+        geometry_mode(),
+        file_hash(layer.csv_path),
+        file_hash(layer.geojson_path),
+        file_hash(geometry_path),
+        file_hash(keymap_path(layer)) if os.path.exists(keymap_path(layer)) else None,
+        view,
+        file_hash(os.path.join(tile_dir(layer.geojson_path), "meta.json")) if view is not None else None,
+    )
+
+
+def focus_view(layer):
+    # (lon, lat, zoom) of the county picked under "Zoom to", or None for the
+    # whole state. Offered only once the layer's tiles are built (python
+    # vector_tiles.py) and the county boundaries are available.
+    counties = BOUNDARY_LAYERS["County"]
+    if not layer.tiles or not os.path.exists(counties.geojson_path):
+        return None
+    if read_meta(layer.geojson_path, layer.feature_key) is None:
+        return None
+    index = load_index(counties.geojson_path, counties.feature_key)
+    choice = st.selectbox("Zoom to", [WHOLE_STATE] + sorted(index.keys), key=f"zoom {layer.title}")
+    if choice == WHOLE_STATE:
+        return None
+    return fit_view(tuple(index.bounds[index.keys.index(choice)].tolist()), layer.width, layer.height)
+
+
+def animated_elections(layer):
+    # Elections to animate the layer over, or None. Offered for turnout maps
+    # once the cube holds two or more elections of their geography.
+    if layer.hover != "turnout":
+        return None
+    stored = cube_elections(layer.key_column)
+    if len(stored) < 2:
+        return None
+    if not st.toggle("Animate elections", key=f"animate {layer.title}"):
+        return None
+    return stored
+
+
+def render_layer(layer):
+    st.title(layer.title)
+    elections = animated_elections(layer)
+    view = focus_view(layer) if elections is None else None
+    with span("figure"):
+        if elections is None:
+            fig, matches = cached_figure(figure_key(layer, view), lambda: build_figure(layer, view))
+        else:
+            key = figure_key(layer) + ("elections", file_hash(os.path.join(CUBE_DIR, "meta.json")))
+            fig, matches = cached_figure(key, lambda: build_animation(layer, elections))
+
+    # Report CSV keys and GeoJSON features that do not line up
+    if layer.check_keys and matches.unmatched_csv:
+        st.write("Warning: Mismatch between CSV and GeoJSON district names.")
+        st.write(f"CSV keys without a boundary: {matches.unmatched_csv}")
+        st.write(f"GeoJSON keys without data: {matches.unmatched_geojson}")
+
+    # Region names that only matched approximately, or not at all
+    keymap = read_keymap(keymap_path(layer))
+    if keymap is not None:
+        fuzzy = int((keymap["method"] == "fuzzy").sum())
+        unmatched = int((keymap["feature_key"] == "").sum())
+        if fuzzy or unmatched:
+            st.caption(
+                f"{fuzzy} region names matched approximately and {unmatched} not at all; "
+                f"review {os.path.relpath(keymap_path(layer))}."
+            )
+
+    with span("plotly_chart"):
+        # A zoomed map keeps the layer's size: its tiles cover exactly that
+        st.plotly_chart(fig, use_container_width=view is None)
+
+
+def show_breakdown(layer):
+    # Turnout of another geography's regions inside one region of this layer,
+    # answered from the precomputed cross-walks (see crosswalk.py). Streamlit
+    # runs an expander's body even while it is collapsed, so nothing is
+    # loaded until the toggle is on.
+    with st.expander("Break down by another geography"):
+        if not st.toggle("Show breakdown", key=f"breakdown {layer.title}"):
+            return
+        others = [column for column in BOUNDARY_LAYERS if column != layer.key_column]
+        target = st.selectbox("Geography", others, key=f"breakdown geography {layer.title}")
+        with span("breakdown"):
+            breakdowns = load_breakdowns(layer.key_column, target)
+        if breakdowns is None:
+            st.caption("No up-to-date cross-walks; build them with `python crosswalk.py`.")
+            return
+        region = st.selectbox(layer.key_column, sorted(breakdowns), key=f"breakdown region {layer.title}")
+        st.dataframe(breakdowns[region].round(3), hide_index=True)
+
+
+def show_section(layer):
+    # One section: its map, and for turnout maps the breakdown panel
+    render_layer(layer)
+    if layer.hover == "turnout" and layer.key_column in BOUNDARY_LAYERS:
+        show_breakdown(layer)
+
+
+def render_dashboard(layers):
+    # Sidebar picker over a {label: Layer} registry; only the selected layer
+    # loads its data and builds its figure
+    section = st.sidebar.radio("Map", list(layers))
+    run_section(section, lambda: show_section(layers[section]))
+    show_section_timings()
+
+    # Boundary cache effectiveness for this process
+    stats = cache_stats()
+    st.sidebar.caption(
+        f"Boundary cache: {stats['hits']} hits / {stats['misses']} misses ({stats['files']} files)"
+    )
+    stats = figure_cache_stats()
+    st.sidebar.caption(
+        f"Figure cache: {stats['hits']} hits / {stats['misses']} misses, {stats['figures']} figures, "
+        f"{stats['bytes'] / 2 ** 20:.1f} of {stats['max_bytes'] / 2 ** 20:.0f} MiB"
+    )
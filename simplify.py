@@ -0,0 +1,273 @@
+"""Offline, topology-preserving simplification of the boundary files.
+
+Each boundary file is written at several levels of detail, one per target
+map zoom, into a `simplified/` folder next to it. Borders shared by two
+regions are split into arcs at the points where the set of neighbouring
+regions changes; every arc is simplified once (Douglas-Peucker) and reused
+by both regions, so adjacent shapes keep identical borders with no gaps or
+overlaps. A <name>.meta.json next to the levels records the hash of the
+file they were simplified from; after that file changes they are ignored
+until simplify.py is run again.
+
+Usage:
+    python simplify.py CityLimits.geojson Washington_School_Districts_2024.geojson
+"""
+import argparse
+import json
+import math
+import os
+import sys
+
+import numpy as np
+
+from boundaries import file_hash, geometry_polygons, json_writer, load_geojson, write_atomic
+
+# Map zoom levels we write simplified copies for
+LOD_ZOOMS = (5, 7, 9, 11)
+# Coordinates are rounded to this many decimals (~0.1 m) in the outputs
+PRECISION = 6
+# Latitude used to convert a Mercator pixel to degrees for Washington State
+REFERENCE_LATITUDE = 47.5
+
+
+def tolerance_for_zoom(zoom):
+    # Half a screen pixel at this zoom, in degrees. Mapbox GL uses 512 px tiles.
+    degrees_per_pixel = 360 / (512 * 2 ** zoom)
+    return degrees_per_pixel * math.cos(math.radians(REFERENCE_LATITUDE)) / 2
+
+
+def _meta_path(geojson_path):
+    folder, name = os.path.split(geojson_path)
+    stem, _ = os.path.splitext(name)
+    return os.path.join(folder, "simplified", f"{stem}.meta.json")
+
+
+def lod_path(geojson_path, zoom):
+    # Simplified copy of a boundary file suited to a map drawn at `zoom`:
+    # the coarsest level that is still at least as detailed as the zoom needs.
+    # Falls back to the full-resolution file if no suitable copy exists or
+    # the copies were simplified from another version of the file.
+    # Pixel size in degrees depends only on zoom in Web Mercator, so the
+    # map's width and height do not change which level is needed.
+    folder, name = os.path.split(geojson_path)
+    stem, _ = os.path.splitext(name)
+    out_dir = os.path.join(folder, "simplified")
+    try:
+        with open(_meta_path(geojson_path), "r") as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return geojson_path
+    if not os.path.exists(geojson_path) or meta.get("source_sha256") != file_hash(geojson_path):
+        return geojson_path
+
+    levels = [level for level in meta["zooms"] if os.path.exists(os.path.join(out_dir, f"{stem}.z{level}.geojson"))]
+    suitable = [level for level in levels if level >= zoom]
+    if not suitable:
+        return geojson_path
+    return os.path.join(out_dir, f"{stem}.z{min(suitable)}.geojson")
+
+
+def _douglas_peucker(points, tolerance):
+    # Indices of the vertices kept by Douglas-Peucker, endpoints included
+    points = np.asarray(points, dtype=float)
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(segment[0], segment[1])
+        if length == 0:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            split = start + 1 + farthest
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    return keep
+
+
+def _vertex_owners(geojson_data):
+    # Which features touch each vertex
+    owners = {}
+    for index, feature in enumerate(geojson_data["features"]):
+        for polygon in geometry_polygons(feature["geometry"]):
+            for ring in polygon:
+                for point in ring:
+                    owners.setdefault((point[0], point[1]), set()).add(index)
+    return owners
+
+
+def _fixed_vertices(ring, owners):
+    # Positions (in the open ring) that both neighbours must keep: points
+    # where the set of adjacent regions changes
+    vertices = [(point[0], point[1]) for point in ring[:-1]]
+    sets = [owners[vertex] for vertex in vertices]
+    count = len(vertices)
+    fixed = [
+        i for i in range(count)
+        if sets[i] != sets[i - 1] or sets[i] != sets[(i + 1) % count]
+    ]
+    if not fixed:
+        # An island or a border shared along its whole length: pick two
+        # anchors from the coordinates alone so every ring sharing this
+        # border picks the same ones
+        first = min(range(count), key=lambda i: vertices[i])
+        points = np.asarray(vertices)
+        distances = np.hypot(*(points - points[first]).T)
+        farthest = max(range(count), key=lambda i: (distances[i], vertices[i]))
+        fixed = sorted({first, farthest})
+    return vertices, fixed
+
+
+def _simplify_arc(arc, tolerance, arcs):
+    # Simplify an arc once per direction-independent identity so the two
+    # regions on either side of it get exactly the same vertices
+    reverse = tuple(reversed(arc))
+    canonical = min(arc, reverse)
+    if canonical not in arcs:
+        keep = _douglas_peucker(canonical, tolerance)
+        arcs[canonical] = [point for point, kept in zip(canonical, keep) if kept]
+    simplified = arcs[canonical]
+    return simplified if canonical == arc else simplified[::-1]
+
+
+def _simplify_ring(ring, tolerance, owners, arcs):
+    vertices, fixed = _fixed_vertices(ring, owners)
+    count = len(vertices)
+    result = []
+    for position, start in enumerate(fixed):
+        end = fixed[(position + 1) % len(fixed)]
+        span = (end - start) % count or count
+        arc = tuple(vertices[(start + step) % count] for step in range(span + 1))
+        result.extend(_simplify_arc(arc, tolerance, arcs)[:-1])
+    result.append(result[0])
+    if len(result) < 4:
+        # Collapsed to a line; keep the ring as it was
+        return [list(vertex) for vertex in vertices] + [list(vertices[0])]
+    return [list(vertex) for vertex in result]
+
+
+def simplify_geojson(geojson_data, tolerance, precision=PRECISION):
+    # A simplified copy of a FeatureCollection; properties are kept as-is
+    owners = _vertex_owners(geojson_data)
+    arcs = {}
+    features = []
+    for feature in geojson_data["features"]:
+        geometry = feature["geometry"]
+        if geometry["type"] not in ("Polygon", "MultiPolygon"):
+            features.append(feature)
+            continue
+        polygons = [
+            [
+                [[round(x, precision), round(y, precision)] for x, y in _simplify_ring(ring, tolerance, owners, arcs)]
+                for ring in polygon
+            ]
+            for polygon in geometry_polygons(geometry)
+        ]
+        coordinates = polygons[0] if geometry["type"] == "Polygon" else polygons
+        features.append({
+            "type": "Feature",
+            "properties": feature["properties"],
+            "geometry": {"type": geometry["type"], "coordinates": coordinates},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+def vertex_count(geojson_data):
+    return sum(
+        len(ring)
+        for feature in geojson_data["features"]
+        for polygon in geometry_polygons(feature["geometry"])
+        for ring in polygon
+    )
+
+
+def misaligned_borders(original, simplified, precision=PRECISION):
+    # Shared vertices that survived simplification in some, but not all, of
+    # the regions they border. Any non-zero count means a gap or overlap.
+    def rounded(point):
+        return round(point[0], precision), round(point[1], precision)
+
+    owners = _vertex_owners(original)
+    kept = {}
+    for index, feature in enumerate(simplified["features"]):
+        for polygon in geometry_polygons(feature["geometry"]):
+            for ring in polygon:
+                for point in ring:
+                    kept.setdefault(rounded(point), set()).add(index)
+
+    misaligned = 0
+    for vertex, features in owners.items():
+        if len(features) > 1:
+            survivors = kept.get(rounded(vertex), set()) & features
+            if survivors and survivors != features:
+                misaligned += 1
+    return misaligned
+
+
+def _encode(geojson_data):
+    return json.dumps(geojson_data, separators=(",", ":")).encode()
+
+
+def _write_bytes(path, payload):
+    with open(path, "wb") as file:
+        file.write(payload)
+
+
+def write_levels(geojson_path, zooms=LOD_ZOOMS):
+    # Write every level of detail for one boundary file and report on it
+    original = load_geojson(geojson_path)
+    folder, name = os.path.split(geojson_path)
+    stem, _ = os.path.splitext(name)
+    out_dir = os.path.join(folder, "simplified")
+    os.makedirs(out_dir, exist_ok=True)
+
+    original_bytes = os.path.getsize(geojson_path)
+    original_vertices = vertex_count(original)
+    report = []
+    for zoom in zooms:
+        simplified = simplify_geojson(original, tolerance_for_zoom(zoom))
+        payload = _encode(simplified)
+        out_path = os.path.join(out_dir, f"{stem}.z{zoom}.geojson")
+        write_atomic(out_path, lambda temp_path: _write_bytes(temp_path, payload))
+        report.append({
+            "layer": name,
+            "zoom": zoom,
+            "vertices": vertex_count(simplified),
+            "original_vertices": original_vertices,
+            "bytes": len(payload),
+            "original_bytes": original_bytes,
+            "misaligned": misaligned_borders(original, simplified),
+        })
+
+    # The meta file goes last: it vouches for the levels written above
+    meta_path = _meta_path(geojson_path)
+    write_atomic(meta_path, json_writer({"source_sha256": file_hash(geojson_path), "zooms": sorted(zooms)}))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write simplified levels of detail for boundary GeoJSON files.")
+    parser.add_argument("geojson", nargs="+", help="GeoJSON file(s) to simplify")
+    parser.add_argument("--zooms", nargs="+", type=int, default=list(LOD_ZOOMS), help="Map zoom levels to target")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.geojson:
+        for row in write_levels(path, args.zooms):
+            saved = 1 - row["bytes"] / row["original_bytes"]
+            print(
+                f"{row['layer']} z{row['zoom']}: "
+                f"{row['original_vertices']} -> {row['vertices']} vertices, "
+                f"{row['original_bytes'] / 1024:.0f} -> {row['bytes'] / 1024:.0f} KiB ({saved:.0%} saved), "
+                f"misaligned shared vertices: {row['misaligned']}"
+            )
+            failed = failed or row["misaligned"] > 0
+    sys.exit(1 if failed else 0)
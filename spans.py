@@ -0,0 +1,88 @@
+"""Timing spans around the hot-path stages of a map section.
+
+Code wraps a stage in `with span("json.load"):`. Spans are only measured
+while a section is being collected (see timing.run_section); otherwise
+span() returns a shared no-op context manager, so instrumentation left in
+place costs one attribute lookup per stage.
+
+With TIMING_LOG=1 in the environment every collected rerun is also written
+to the "chorpleth.timing" logger, one JSON object per span:
+
+    {"event": "span", "section": "Cities", "stage": "json.load", "parent": "figure", "ms": 41.2}
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+LOG_SPANS = os.environ.get("TIMING_LOG", "") not in ("", "0")
+
+logger = logging.getLogger("chorpleth.timing")
+if LOG_SPANS and not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+
+# Streamlit runs each session's script in its own thread, so the spans being
+# collected are per thread
+_local = threading.local()
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Span:
+    __slots__ = ("spans", "stack", "stage", "start")
+
+    def __init__(self, spans, stack, stage):
+        self.spans = spans
+        self.stack = stack
+        self.stage = stage
+
+    def __enter__(self):
+        self.stack.append(self.stage)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        self.stack.pop()
+        self.spans.append({
+            "stage": self.stage,
+            "parent": self.stack[-1] if self.stack else None,
+            "ms": round(elapsed * 1000, 3),
+        })
+        return False
+
+
+def span(stage):
+    # Context manager timing one stage, or a no-op when nothing is collecting
+    collecting = getattr(_local, "collecting", None)
+    if collecting is None:
+        return _NO_SPAN
+    return _Span(collecting[0], collecting[1], stage)
+
+
+@contextmanager
+def collect(section):
+    # Measure every span entered in this thread while the block runs; yields
+    # the list the finished spans are appended to, innermost first
+    previous = getattr(_local, "collecting", None)
+    spans = []
+    _local.collecting = (spans, [])
+    try:
+        yield spans
+    finally:
+        _local.collecting = previous
+        if LOG_SPANS:
+            for entry in spans:
+                logger.info(json.dumps({"event": "span", "section": section, **entry}))
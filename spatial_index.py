@@ -0,0 +1,256 @@
+"""Assign geographies to geocoded voters by point-in-polygon tests.
+
+Each boundary layer gets an index built once per file version:
+
+  * a uniform grid over the layer's extent; every cell lists the features
+    whose bounding box touches it, so a point is only tested against the
+    handful of features near it;
+  * every feature's edges bucketed into horizontal bands, so the even-odd
+    ray test for a point only looks at the edges in its own band.
+
+Points are located in NumPy batches. A point inside no feature (for example
+a voter in unincorporated county land, for the city layer) gets no region;
+a point inside overlapping features gets the first one in file order.
+
+Usage:
+    python spatial_index.py geocoded_voters.csv [--lon lon] [--lat lat] [-o voter_roll.csv]
+"""
+import argparse
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from boundaries import file_signature, geometry_polygons, load_geojson
+from layers import VOTER_LAYERS
+
+# Largest points x edges block tested at once (bounds temporary memory)
+BLOCK_SIZE = 1 << 21
+CHUNKSIZE = 200_000
+
+SpatialIndex = namedtuple("SpatialIndex", [
+    "keys",          # property value of every feature
+    "bounds",        # (F, 4) min lon, min lat, max lon, max lat per feature
+    "origin",        # lon, lat of the grid's lower-left corner
+    "cell_size",     # width, height of one grid cell
+    "shape",         # columns, rows of the grid
+    "cell_offsets",  # CSR offsets into cell_features, one per cell (+ end)
+    "cell_features",
+    "edges",         # (E, 4) x0, y0, x1, y1 of every ring edge
+    "band_base",     # first band id of every feature
+    "band_count",    # bands per feature
+    "band_height",   # band height per feature
+    "band_offsets",  # CSR offsets into band_edges, one per band (+ end)
+    "band_edges",
+])
+
+# Indexes already built in this process, keyed by (path, key property)
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _ranges(starts, counts):
+    # Concatenation of range(start, start + count) for every pair
+    total = int(counts.sum())
+    offsets = np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + np.arange(total) - offsets
+
+
+def build_index(geojson_data, key_property):
+    features = geojson_data["features"]
+    keys = [feature["properties"][key_property] for feature in features]
+
+    # All ring edges of each feature; with the even-odd rule, holes and the
+    # separate parts of a MultiPolygon need no special handling
+    edges = []
+    edge_feature = []
+    bounds = np.full((len(features), 4), np.nan)
+    for index, feature in enumerate(features):
+        for polygon in geometry_polygons(feature.get("geometry")):
+            for ring in polygon:
+                ring = np.asarray(ring, dtype=float)[:, :2]
+                if len(ring) < 2:
+                    continue
+                edges.append(np.hstack([ring[:-1], ring[1:]]))
+                edge_feature.append(np.full(len(ring) - 1, index))
+                low, high = ring.min(axis=0), ring.max(axis=0)
+                bounds[index] = [
+                    np.fmin(bounds[index, 0], low[0]), np.fmin(bounds[index, 1], low[1]),
+                    np.fmax(bounds[index, 2], high[0]), np.fmax(bounds[index, 3], high[1]),
+                ]
+    edges = np.vstack(edges) if edges else np.empty((0, 4))
+    edge_feature = np.concatenate(edge_feature) if edge_feature else np.empty(0, dtype=np.int64)
+
+    # Grid of roughly 4 cells per feature over the layer's extent
+    has_shape = ~np.isnan(bounds[:, 0])
+    if has_shape.any():
+        origin = bounds[has_shape, :2].min(axis=0)
+        extent = np.maximum(bounds[has_shape, 2:].max(axis=0) - origin, 1e-9)
+    else:
+        origin, extent = np.zeros(2), np.ones(2)
+    side = max(1, int(np.ceil(np.sqrt(4 * len(features)))))
+    shape = np.array([side, side])
+    cell_size = extent / shape
+
+    # Every (cell, feature) pair whose bounding boxes overlap
+    shaped = np.flatnonzero(has_shape)
+    low = np.clip(((bounds[shaped, :2] - origin) // cell_size).astype(np.int64), 0, shape - 1)
+    high = np.clip(((bounds[shaped, 2:] - origin) // cell_size).astype(np.int64), 0, shape - 1)
+    columns = high[:, 0] - low[:, 0] + 1
+    rows = high[:, 1] - low[:, 1] + 1
+    pair_feature = np.repeat(shaped, columns * rows)
+    within = _ranges(np.zeros(len(shaped), dtype=np.int64), columns * rows)
+    pair_columns = np.repeat(columns, columns * rows)
+    pair_x = np.repeat(low[:, 0], columns * rows) + within % pair_columns
+    pair_y = np.repeat(low[:, 1], columns * rows) + within // pair_columns
+    pair_cell = pair_y * shape[0] + pair_x
+    order = np.argsort(pair_cell, kind="stable")
+    cell_offsets = np.concatenate([[0], np.cumsum(np.bincount(pair_cell, minlength=int(shape.prod())))])
+    cell_features = pair_feature[order]
+
+    # Horizontal bands of about sqrt(edges) per feature; an edge is listed in
+    # every band its y-range overlaps
+    edge_counts = np.bincount(edge_feature, minlength=len(features))
+    band_count = np.clip(np.sqrt(edge_counts).astype(np.int64), 1, 256)
+    heights = np.nan_to_num(bounds[:, 3] - bounds[:, 1])
+    band_count[heights <= 0] = 1
+    band_height = np.where(heights > 0, heights / band_count, 1.0)
+    band_base = np.concatenate([[0], np.cumsum(band_count)[:-1]])
+
+    feature_low = bounds[edge_feature, 1]
+    heights_of_edge = band_height[edge_feature]
+    last_band = band_count[edge_feature] - 1
+    low_band = np.clip(((np.minimum(edges[:, 1], edges[:, 3]) - feature_low) // heights_of_edge).astype(np.int64), 0, last_band)
+    high_band = np.clip(((np.maximum(edges[:, 1], edges[:, 3]) - feature_low) // heights_of_edge).astype(np.int64), 0, last_band)
+    spans = high_band - low_band + 1
+    pair_band = _ranges(band_base[edge_feature] + low_band, spans)
+    pair_edge = np.repeat(np.arange(len(edges)), spans)
+    order = np.argsort(pair_band, kind="stable")
+    band_offsets = np.concatenate([[0], np.cumsum(np.bincount(pair_band, minlength=int(band_count.sum())))])
+
+    return SpatialIndex(
+        keys=keys,
+        bounds=bounds,
+        origin=origin,
+        cell_size=cell_size,
+        shape=shape,
+        cell_offsets=cell_offsets,
+        cell_features=cell_features,
+        edges=edges,
+        band_base=band_base,
+        band_count=band_count,
+        band_height=band_height,
+        band_offsets=band_offsets,
+        band_edges=pair_edge[order],
+    )
+
+
+def load_index(geojson_path, key_property):
+    # Index of a boundary file, built once per process and file version
+    key = (os.path.abspath(geojson_path), key_property)
+    signature = file_signature(geojson_path)
+    with _lock:
+        entry = _indexes.get(key)
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+    index = build_index(load_geojson(geojson_path), key_property)
+    with _lock:
+        _indexes[key] = (signature, index)
+    return index
+
+
+def _inside(index, edge_ids, x, y):
+    # Even-odd test of points (x, y) against one set of edges, in blocks
+    inside = np.empty(len(x), dtype=bool)
+    x0, y0, x1, y1 = index.edges[edge_ids].T
+    step = max(1, BLOCK_SIZE // max(1, len(edge_ids)))
+    for start in range(0, len(x), step):
+        px = x[start:start + step, None]
+        py = y[start:start + step, None]
+        straddles = (y0 > py) != (y1 > py)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cross_x = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+        inside[start:start + step] = np.count_nonzero(straddles & (px < cross_x), axis=1) % 2 == 1
+    return inside
+
+
+def locate(index, lon, lat):
+    # Position of the feature containing each point, -1 where there is none
+    lon = np.asarray(lon, dtype=float)
+    lat = np.asarray(lat, dtype=float)
+    found = np.full(len(lon), len(index.keys), dtype=np.int64)
+
+    # Candidate (point, feature) pairs from the grid cell of each point
+    cell_xy = np.floor((np.column_stack([lon, lat]) - index.origin) / index.cell_size)
+    valid = np.isfinite(cell_xy).all(axis=1) & (cell_xy >= 0).all(axis=1) & (cell_xy < index.shape).all(axis=1)
+    points = np.flatnonzero(valid)
+    cells = (cell_xy[valid, 1] * index.shape[0] + cell_xy[valid, 0]).astype(np.int64)
+    counts = index.cell_offsets[cells + 1] - index.cell_offsets[cells]
+    pair_point = np.repeat(points, counts)
+    pair_feature = index.cell_features[_ranges(index.cell_offsets[cells], counts)]
+
+    # Drop pairs outside the feature's bounding box
+    box = index.bounds[pair_feature]
+    x, y = lon[pair_point], lat[pair_point]
+    keep = (x >= box[:, 0]) & (x <= box[:, 2]) & (y >= box[:, 1]) & (y <= box[:, 3])
+    pair_point, pair_feature = pair_point[keep], pair_feature[keep]
+
+    # Test each (feature, band) group of points against that band's edges
+    band = np.clip(
+        ((lat[pair_point] - index.bounds[pair_feature, 1]) // index.band_height[pair_feature]).astype(np.int64),
+        0, index.band_count[pair_feature] - 1,
+    )
+    pair_band = index.band_base[pair_feature] + band
+    order = np.argsort(pair_band, kind="stable")
+    pair_point, pair_feature, pair_band = pair_point[order], pair_feature[order], pair_band[order]
+    groups = np.flatnonzero(np.diff(pair_band, prepend=-1, append=-1))
+    for start, end in zip(groups[:-1], groups[1:]):
+        band_id = pair_band[start]
+        edge_ids = index.band_edges[index.band_offsets[band_id]:index.band_offsets[band_id + 1]]
+        group_points = pair_point[start:end]
+        inside = _inside(index, edge_ids, lon[group_points], lat[group_points])
+        np.minimum.at(found, group_points[inside], pair_feature[start])
+
+    found[found == len(index.keys)] = -1
+    return found
+
+
+def roll_key(column, names):
+    # GeoJSON names as the roll (and the turnout CSVs) spell them: the
+    # legislative district number rather than its full NAMELSAD
+    if column == "Legislative District":
+        return names.str.split().str[-1]
+    return names
+
+
+def assign_geographies(lon, lat):
+    # DataFrame with the five roll geography columns for each point; None
+    # where a point lies in no region of that layer
+    columns = {}
+    for layer in VOTER_LAYERS.values():
+        index = load_index(layer.geojson_path, layer.feature_key)
+        positions = locate(index, lon, lat)
+        names = pd.Series(np.asarray(index.keys, dtype=object)[np.maximum(positions, 0)], dtype=object)
+        names[positions < 0] = None
+        columns[layer.key_column] = roll_key(layer.key_column, names)
+    return pd.DataFrame(columns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add County, City, School District, LD and CD columns to geocoded voters.")
+    parser.add_argument("points", help="CSV with one geocoded voter per row")
+    parser.add_argument("--lon", default="lon", help="Longitude column")
+    parser.add_argument("--lat", default="lat", help="Latitude column")
+    parser.add_argument("-o", "--output", default="voter_roll.csv", help="CSV to write (input columns + geographies)")
+    args = parser.parse_args()
+
+    rows = 0
+    for number, chunk in enumerate(pd.read_csv(args.points, chunksize=CHUNKSIZE)):
+        regions = assign_geographies(chunk[args.lon], chunk[args.lat])
+        regions.index = chunk.index
+        chunk = chunk.drop(columns=[column for column in regions if column in chunk]).join(regions)
+        chunk.to_csv(args.output, mode="w" if number == 0 else "a", header=number == 0, index=False)
+        rows += len(chunk)
+    print(f"{args.output}: {rows} voters assigned")
@@ -0,0 +1,250 @@
+"""Synthetic boundaries, metric CSVs and voter rolls for offline load testing.
+
+Boundaries tile the Washington bounding box with a jittered grid. Neighbouring
+features share their border vertices exactly, as real layers do, and carry
+the same property keys as the real files (JURISDICT_NM, CITY_NM, LEAName,
+NAMELSAD). Feature counts default to a multiple (--scale) of the real layers
+and can be set per geography; each polygon has 4 * --edge-vertices + 1
+vertices.
+
+A voter roll (--roll-rows) places voters around random towns, locates each
+one in every layer with spatial_index, and is written in chunks, so rolls of
+millions of rows take bounded memory. The turnout CSVs are then aggregated
+from that roll and agree with it exactly; without a roll they are random.
+All region names are spelled as in the shipped CSVs, so the dashboards'
+normalizers, key maps and joins behave as they do in production. Everything
+is deterministic for a given --seed.
+
+Usage:
+    python synthetic.py out_dir [--scale 10] [--features City=5000] [--edge-vertices 8]
+                                [--roll-rows 5000000] [--seed 0]
+    cd out_dir && streamlit run /path/to/VoterChroplethMap.py
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from aggregate import CHUNKSIZE, VOTED_COLUMN, aggregate_roll, write_outputs
+from layers import BOUNDARY_LAYERS, MUSLIM_LAYERS, VOTER_LAYERS
+from spatial_index import load_index, locate
+
+# Washington State bounding box (lon, lat)
+EXTENT = (-124.8, 45.5, -116.9, 49.0)
+
+# Feature counts of the real layers (by roll geography column), the 1x scale
+BASE_FEATURES = {
+    "County": 39,
+    "City": 281,
+    "School District": 295,
+    "Legislative District": 49,
+    "Congressional District": 10,
+}
+TOWNS = 300
+ROLL_FILE = "voter_roll.csv"
+
+
+def _grid_shape(features):
+    # Columns and rows of a grid with at least `features` cells, roughly
+    # square cells over the extent
+    width, height = EXTENT[2] - EXTENT[0], EXTENT[3] - EXTENT[1]
+    columns = max(1, int(np.ceil(np.sqrt(features * width / height))))
+    rows = max(1, int(np.ceil(features / columns)))
+    return columns, rows
+
+
+def _borders(start, end, edge_vertices, rng):
+    # Wiggly lines between corner pairs, without their end points:
+    # (..., edge_vertices, 2) for corner arrays of shape (..., 2)
+    steps = np.linspace(0, 1, edge_vertices + 1)[:-1, None]
+    delta = (end - start)[..., None, :]
+    normal = np.stack([-delta[..., 1], delta[..., 0]], axis=-1)
+    wiggle = rng.normal(0, 0.04, size=delta.shape[:-2] + (edge_vertices, 1)) * np.sin(np.pi * steps)
+    return start[..., None, :] + delta * steps + wiggle * normal
+
+
+def tessellate(features, edge_vertices=8, seed=0):
+    # Polygon rings (closed, 4 * edge_vertices + 1 points each) of a jittered
+    # grid, as an array (features, points, 2). Every border between two cells
+    # is generated once and walked backwards by the neighbour, so shared
+    # borders match vertex for vertex.
+    rng = np.random.default_rng(seed)
+    columns, rows = _grid_shape(features)
+    cell = np.array([(EXTENT[2] - EXTENT[0]) / columns, (EXTENT[3] - EXTENT[1]) / rows])
+
+    # Grid corners, jittered except on the outer frame
+    xs = EXTENT[0] + np.arange(columns + 1) * cell[0]
+    ys = EXTENT[1] + np.arange(rows + 1) * cell[1]
+    corners = np.stack(np.meshgrid(xs, ys, indexing="ij"), axis=-1)
+    if columns > 1 and rows > 1:
+        corners[1:-1, 1:-1] += rng.uniform(-0.25, 0.25, size=(columns - 1, rows - 1, 2)) * cell
+
+    # horizontal[i, j] runs east along row line j, vertical[i, j] north along column line i
+    horizontal = _borders(corners[:-1, :], corners[1:, :], edge_vertices, rng)
+    vertical = _borders(corners[:, :-1], corners[:, 1:], edge_vertices, rng)
+
+    def backwards(lines, ends):
+        # The same borders walked the other way, starting at their end corner
+        return np.concatenate([ends[..., None, :], lines[..., :0:-1, :]], axis=-2)
+
+    rings = np.concatenate([
+        horizontal[:, :-1],                               # bottom, west to east
+        vertical[1:, :],                                  # right, south to north
+        backwards(horizontal[:, 1:], corners[1:, 1:]),    # top, east to west
+        backwards(vertical[:-1, :], corners[:-1, 1:]),    # left, north to south
+    ], axis=-2)
+    rings = np.concatenate([rings, rings[..., :1, :]], axis=-2)
+    # Cells row by row from the south-west corner
+    return np.round(rings.transpose(1, 0, 2, 3).reshape(-1, rings.shape[-2], 2)[:features], 6)
+
+
+def region_names(column, count):
+    # Feature key values as the real boundary file spells them
+    if column == "County":
+        return [f"Synthetic {number} County" for number in range(1, count + 1)]
+    if column == "City":
+        return [f"Synthetic City {number}" for number in range(1, count + 1)]
+    if column == "School District":
+        return [f"Synthetic {number} School District" for number in range(1, count + 1)]
+    if column == "Legislative District":
+        return [f"Legislative (House) District {number}" for number in range(1, count + 1)]
+    return [f"Congressional District {number}" for number in range(1, count + 1)]
+
+
+def csv_keys(column, names):
+    # Region names as the shipped CSVs (and the roll they came from) spell them
+    names = pd.Series(names, dtype=object)
+    if column == "Legislative District":
+        return names.str.split().str[-1]  # "12"
+    if column == "City":
+        return names.str.upper()  # "ABERDEEN"
+    return names
+
+
+def feature_counts(scale=1, features=None):
+    # Features per geography: the real counts times scale, with overrides
+    counts = {column: base * scale for column, base in BASE_FEATURES.items()}
+    counts.update(features or {})
+    return counts
+
+
+def write_boundaries(folder, counts, edge_vertices=8, seed=0):
+    # One synthetic GeoJSON per real boundary file; returns {column: feature names}
+    names = {}
+    for offset, (column, count) in enumerate(counts.items()):
+        layer = BOUNDARY_LAYERS[column]
+        names[column] = region_names(column, count)
+        rings = tessellate(count, edge_vertices, seed + offset).tolist()
+        features = [
+            {"type": "Feature", "properties": {layer.feature_key: name}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+            for name, ring in zip(names[column], rings)
+        ]
+        with open(os.path.join(folder, layer.geojson_path), "w") as file:
+            json.dump({"type": "FeatureCollection", "features": features}, file, separators=(",", ":"))
+    return names
+
+
+def voter_points(rows, rng):
+    # Voter locations: most around towns of very different sizes, the rest
+    # spread over the whole state
+    towns = rng.uniform(EXTENT[:2], EXTENT[2:], size=(TOWNS, 2))
+    weights = rng.pareto(1.2, TOWNS) + 0.01
+    town = rng.choice(TOWNS, size=rows, p=weights / weights.sum())
+    points = towns[town] + rng.normal(0, 0.12, size=(rows, 2))
+    rural = rng.random(rows) < 0.2
+    points[rural] = rng.uniform(EXTENT[:2], EXTENT[2:], size=(int(rural.sum()), 2))
+    return np.clip(points, EXTENT[:2], EXTENT[2:])
+
+
+def write_roll(folder, rows, seed=0, chunksize=CHUNKSIZE):
+    # Geocoded voter roll with the five geography columns and a voted flag,
+    # written chunk by chunk; returns its path
+    path = os.path.join(folder, ROLL_FILE)
+    rng = np.random.default_rng(seed)
+    indexes = {
+        column: load_index(os.path.join(folder, layer.geojson_path), layer.feature_key)
+        for column, layer in BOUNDARY_LAYERS.items()
+    }
+    keys = {column: np.asarray(csv_keys(column, index.keys), dtype=object) for column, index in indexes.items()}
+    # Turnout varies by county
+    county_turnout = rng.uniform(0.35, 0.85, len(keys["County"]))
+
+    for start in range(0, rows, chunksize):
+        size = min(chunksize, rows - start)
+        points = voter_points(size, rng)
+        chunk = {"voter_id": np.arange(start, start + size), "lon": points[:, 0].round(6), "lat": points[:, 1].round(6)}
+        for column, index in indexes.items():
+            positions = locate(index, points[:, 0], points[:, 1])
+            chunk[column] = np.where(positions >= 0, keys[column][np.maximum(positions, 0)], None)
+            if column == "County":
+                turnout = np.where(positions >= 0, county_turnout[np.maximum(positions, 0)], 0.5)
+        chunk[VOTED_COLUMN] = (rng.random(size) < turnout).astype(int)
+        pd.DataFrame(chunk).to_csv(path, index=False, mode="w" if start == 0 else "a", header=start == 0)
+    return path
+
+
+def write_metrics(folder, names, seed=0, roll_path=None):
+    # Metric CSVs for every layer of both dashboards, keyed like the shipped
+    # ones. Turnout CSVs are aggregated from the roll when there is one.
+    rng = np.random.default_rng(seed)
+    written = set()
+    if roll_path is not None:
+        written.update(os.path.abspath(path) for path in write_outputs(aggregate_roll(roll_path), folder))
+
+    for layer in list(VOTER_LAYERS.values()) + list(MUSLIM_LAYERS.values()):
+        path = os.path.abspath(os.path.join(folder, layer.csv_path))
+        # Several layers share a CSV; the first one written wins
+        if path in written:
+            continue
+        keys = csv_keys(layer.key_column, names[layer.key_column])
+        if layer.metric in ("voter_rate", "total_population"):
+            total = rng.integers(1, 5000, len(keys))
+            voters = rng.binomial(total, rng.uniform(0.2, 0.9, len(keys)))
+            data = pd.DataFrame({
+                layer.key_column: keys,
+                "total_population": total,
+                "voters": voters,
+                "non_voters": total - voters,
+                "voter_rate": voters / total,
+            })
+        else:
+            data = pd.DataFrame({layer.key_column: keys, layer.metric: rng.integers(0, 20000, len(keys))})
+        data.to_csv(path, index=False)
+        written.add(path)
+
+
+def write_dataset(folder, scale=1, edge_vertices=8, seed=0, features=None, roll_rows=0):
+    # Boundaries, optional voter roll and metric CSVs for both dashboards in `folder`
+    os.makedirs(folder, exist_ok=True)
+    names = write_boundaries(folder, feature_counts(scale, features), edge_vertices, seed)
+    roll_path = write_roll(folder, roll_rows, seed) if roll_rows else None
+    write_metrics(folder, names, seed, roll_path)
+    return names
+
+
+def _feature_override(text):
+    column, _, count = text.partition("=")
+    if column not in BASE_FEATURES or not count.isdigit() or int(count) < 1:
+        raise argparse.ArgumentTypeError(f"expected one of {', '.join(BASE_FEATURES)}=<count>, got {text!r}")
+    return column, int(count)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic boundaries, metric CSVs and a voter roll.")
+    parser.add_argument("out_dir", help="Folder to write the dataset to")
+    parser.add_argument("--scale", type=int, default=1, help="Feature counts as a multiple of the real layers")
+    parser.add_argument("--features", type=_feature_override, nargs="+", default=[],
+                        help="Feature count of one geography, e.g. City=5000")
+    parser.add_argument("--edge-vertices", type=int, default=8, help="Vertices per shared border")
+    parser.add_argument("--roll-rows", type=int, default=0, help="Voters on the synthetic roll (0: no roll)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    names = write_dataset(args.out_dir, args.scale, args.edge_vertices, args.seed, dict(args.features), args.roll_rows)
+    for column, column_names in names.items():
+        layer = BOUNDARY_LAYERS[column]
+        print(f"{layer.geojson_path}: {len(column_names)} features, {4 * args.edge_vertices + 1} vertices each")
+    if args.roll_rows:
+        print(f"{ROLL_FILE}: {args.roll_rows} voters")
@@ -0,0 +1,105 @@
+"""Normalized, compactly typed metric tables persisted as Feather files.
+
+Each layer's CSV is read once at ingest: its keys are normalized with the
+layer's rule, non_voters is filled in, region names become categoricals
+and counts int32. Rates stay float64, parsed exactly as written, so the maps
+and the metrics API show the CSV's own values. The result is written to
+tables/<csv name>.<normalizer>.feather (next to the CSV) together with the hash of the CSV it
+came from, and later loads read that file directly -- no CSV parsing, type
+inference or string normalization on the dashboards' hot path. A table is
+re-ingested automatically when its CSV changes.
+
+Usage:
+    python tables.py    # ingest every layer of both dashboards ahead of time
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from boundaries import file_hash, sidecar_dir, write_atomic, write_cache
+from spans import span
+
+TABLE_DIR = "tables"  # Next to each CSV (see boundaries.sidecar_dir)
+TABLE_VERSION = "2"
+
+
+def table_path(layer):
+    name = os.path.splitext(os.path.basename(layer.csv_path))[0]
+    rule = layer.normalize.__name__ if layer.normalize is not None else "raw"
+    return os.path.join(sidecar_dir(layer.csv_path, TABLE_DIR), f"{name}.{rule}.feather")
+
+
+def compact(data, key_column):
+    # Smallest dtypes that hold the values: categorical keys and int32 counts
+    # (when they fit); float rates are kept as they are
+    data = data.copy()
+    data[key_column] = data[key_column].astype("category")
+    for column in data.columns.drop(key_column):
+        values = data[column]
+        if pd.api.types.is_integer_dtype(values):
+            info = np.iinfo(np.int32)
+            if values.empty or (values.min() >= info.min and values.max() <= info.max):
+                data[column] = values.astype(np.int32)
+    return data
+
+
+def ingest(layer):
+    # CSV -> normalized, compact DataFrame (the slow path, run once per CSV)
+    with span("read_csv"):
+        # round_trip: the default parser can be off in the last digit
+        data = pd.read_csv(layer.csv_path, float_precision="round_trip")
+    if layer.normalize is not None:
+        with span("normalize keys"):
+            data[layer.key_column] = layer.normalize(data[layer.key_column])
+
+    # Calculate non-voter counts if not included in the CSV
+    if "non_voters" not in data.columns and {"total_population", "voters"} <= set(data.columns):
+        data["non_voters"] = data["total_population"] - data["voters"]
+    return compact(data, layer.key_column)
+
+
+def _table_writer(data, source_sha256):
+    # write function (see boundaries.write_atomic) saving data as Feather
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata.update({b"source_sha256": source_sha256.encode(), b"table_version": TABLE_VERSION.encode()})
+    table = table.replace_schema_metadata(metadata)
+    return lambda temp_path: feather.write_feather(table, temp_path, compression="uncompressed")
+
+
+def _read_table(path, source_sha256):
+    # The persisted table, or None if missing or built from another CSV
+    try:
+        table = feather.read_table(path, memory_map=True)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    metadata = table.schema.metadata or {}
+    if metadata.get(b"source_sha256") != source_sha256.encode() or metadata.get(b"table_version") != TABLE_VERSION.encode():
+        return None
+    return table.to_pandas()
+
+
+def load_table(layer):
+    # Normalized table of a layer: from its Feather file when that was built
+    # from the current CSV, otherwise ingested now and persisted
+    path = table_path(layer)
+    digest = file_hash(layer.csv_path)
+    with span("read_feather"):
+        data = _read_table(path, digest)
+    if data is None:
+        data = ingest(layer)
+        # Read-only deployment: the table is kept in memory only
+        write_cache(path, _table_writer(data, digest))
+    return data
+
+
+if __name__ == "__main__":
+    from layers import MUSLIM_LAYERS, VOTER_LAYERS
+
+    for layer in list(VOTER_LAYERS.values()) + list(MUSLIM_LAYERS.values()):
+        data = ingest(layer)
+        write_atomic(table_path(layer), _table_writer(data, file_hash(layer.csv_path)))
+        print(f"{table_path(layer)}: {len(data)} rows, {data.memory_usage(deep=True).sum() / 1024:.1f} KiB in memory")
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    # Run from an empty folder, with every sidecar directory inside it so
+    # tests never touch the repository's tables, key maps or placements
+    import declutter
+    import keymatch
+    import tables
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(tables, "TABLE_DIR", str(tmp_path / "tables"))
+    monkeypatch.setattr(keymatch, "KEYMAP_DIR", str(tmp_path / "keymaps"))
+    monkeypatch.setattr(declutter, "PLACEMENT_DIR", str(tmp_path / "placements"))
+    return tmp_path
@@ -0,0 +1,105 @@
+import pandas as pd
+import pytest
+
+from aggregate import OUTPUTS, VOTED_COLUMN, VOTER_ID_COLUMN, aggregate_roll, apply_delta, split_roll, write_outputs
+from synthetic import ROLL_FILE, write_dataset
+
+ROLL = pd.DataFrame({
+    VOTER_ID_COLUMN: ["1", "2", "3", "4", "5", "6"],
+    "County": ["King", "King", "King", "Pierce", "Pierce", "Pierce"],
+    "City": ["SEATTLE", "SEATTLE", "KENT", "TACOMA", "TACOMA", "TACOMA"],
+    "School District": ["Seattle", "Seattle", "Kent", "Tacoma", "Tacoma", "Tacoma"],
+    "Legislative District": ["43", "43", "33", "27", "27", "27"],
+    "Congressional District": ["7", "7", "9", "6", "6", "6"],
+    VOTED_COLUMN: ["1", "0", "0", "1", "0", "0"],
+})
+
+
+def _write(frame, path):
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+def _read_outputs(folder):
+    return {column: pd.read_csv(folder / name).sort_values(column, ignore_index=True) for column, name in OUTPUTS.items()}
+
+
+def test_incremental_equals_recompute(workdir):
+    # Voters 2 and 3 vote later, one batch each
+    roll_path = _write(ROLL, workdir / "roll.csv")
+    write_outputs(aggregate_roll(roll_path), workdir)
+    for voter in ("2", "3"):
+        batch = ROLL[ROLL[VOTER_ID_COLUMN] == voter].drop(columns=VOTED_COLUMN)
+        assert apply_delta(_write(batch, workdir / f"batch{voter}.csv"), workdir) is not None
+
+    final = ROLL.assign(**{VOTED_COLUMN: ROLL[VOTER_ID_COLUMN].isin(["1", "2", "3", "4"]).astype(int).astype(str)})
+    expected_dir = workdir / "expected"
+    expected_dir.mkdir()
+    write_outputs(aggregate_roll(_write(final, workdir / "final.csv")), expected_dir)
+    for column, table in _read_outputs(workdir).items():
+        pd.testing.assert_frame_equal(table, _read_outputs(expected_dir)[column], check_dtype=False)
+
+
+def test_identical_batches_from_different_voters_both_count(workdir):
+    write_outputs(aggregate_roll(_write(ROLL, workdir / "roll.csv")), workdir)
+    # Voters 5 and 6 live in the same regions: without voter ids the two
+    # files are byte for byte the same
+    batch = ROLL[ROLL[VOTER_ID_COLUMN] == "5"].drop(columns=[VOTED_COLUMN, VOTER_ID_COLUMN])
+    path = _write(batch, workdir / "batch.csv")
+    assert apply_delta(path, workdir, batch="count-1") is not None
+    assert apply_delta(path, workdir, batch="count-2") is not None
+    assert apply_delta(path, workdir, batch="count-2") is None
+
+    counties = pd.read_csv(workdir / OUTPUTS["County"]).set_index("County")
+    assert counties.loc["Pierce", "voters"] == 3
+
+
+def test_batch_without_voter_ids_needs_an_id(workdir):
+    write_outputs(aggregate_roll(_write(ROLL, workdir / "roll.csv")), workdir)
+    batch = ROLL.head(1).drop(columns=[VOTED_COLUMN, VOTER_ID_COLUMN])
+    with pytest.raises(ValueError):
+        apply_delta(_write(batch, workdir / "batch.csv"), workdir)
+
+
+def test_interrupted_batch_is_finished_once(workdir, monkeypatch):
+    import aggregate
+
+    write_outputs(aggregate_roll(_write(ROLL, workdir / "roll.csv")), workdir)
+    path = _write(ROLL[ROLL[VOTER_ID_COLUMN] == "2"].drop(columns=VOTED_COLUMN), workdir / "batch.csv")
+
+    # Crash right after the batch is recorded, before its CSVs are swapped in
+    finish = aggregate._finish_pending
+    calls = []
+
+    def crash(out_dir, ledger):
+        calls.append(ledger["pending"])
+        if ledger["pending"] is not None:
+            raise KeyboardInterrupt
+        return finish(out_dir, ledger)
+
+    monkeypatch.setattr(aggregate, "_finish_pending", crash)
+    with pytest.raises(KeyboardInterrupt):
+        apply_delta(path, workdir)
+    monkeypatch.setattr(aggregate, "_finish_pending", finish)
+
+    assert apply_delta(path, workdir) is None  # Recorded: finished, not re-applied
+    counties = pd.read_csv(workdir / OUTPUTS["County"]).set_index("County")
+    assert counties.loc["King", "voters"] == 2
+
+
+@pytest.mark.parametrize("workers", [2, 3, 4])
+def test_parallel_equals_serial(workdir, workers):
+    write_dataset(workdir, roll_rows=3000)
+    roll_path = str(workdir / ROLL_FILE)
+
+    # The even cuts split_roll starts from land inside lines
+    data = (workdir / ROLL_FILE).read_bytes()
+    header = data.index(b"\n") + 1
+    cuts = [header + (len(data) - header) * part // workers for part in range(1, workers)]
+    assert any(data[cut - 1:cut] != b"\n" for cut in cuts)
+    assert len(split_roll(roll_path, workers)) == workers
+
+    serial = aggregate_roll(roll_path, chunksize=97)
+    parallel = aggregate_roll(roll_path, chunksize=97, workers=workers)
+    for column in OUTPUTS:
+        pd.testing.assert_frame_equal(parallel[column], serial[column])
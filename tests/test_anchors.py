@@ -0,0 +1,34 @@
+import pytest
+
+from anchors import label_point
+from spatial_index import build_index, locate
+
+
+def _square(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]
+
+
+# Shapes whose area centroid lies outside them
+SHAPES = {
+    # U: the centroid falls in the gap between the arms
+    "concave": {"type": "Polygon", "coordinates": [
+        [[0, 0], [10, 0], [10, 10], [8, 10], [8, 2], [2, 2], [2, 10], [0, 10], [0, 0]],
+    ]},
+    # Two islands: the centroid falls in the water between them
+    "islands": {"type": "MultiPolygon", "coordinates": [
+        [_square(0, 0, 2, 2)], [_square(8, 0, 10, 2)],
+    ]},
+    # Ring: the centroid falls in the hole
+    "holed": {"type": "Polygon", "coordinates": [_square(0, 0, 10, 10), _square(2, 2, 8, 8)]},
+}
+
+
+@pytest.mark.parametrize("name", list(SHAPES))
+def test_label_point_is_inside(name):
+    geometry = SHAPES[name]
+    lon, lat = label_point(geometry)
+    # Checked with the spatial index's own point-in-polygon test
+    index = build_index({"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"NAME": name}, "geometry": geometry},
+    ]}, "NAME")
+    assert locate(index, [lon], [lat])[0] == 0
@@ -0,0 +1,78 @@
+import gzip
+import http.client
+import json
+import threading
+from urllib.parse import quote
+
+import pandas as pd
+import pytest
+
+import api
+import metrics
+from synthetic import write_dataset
+
+
+@pytest.fixture
+def server(workdir, monkeypatch):
+    # A running API over a synthetic dataset, with empty response caches
+    write_dataset(workdir)
+    monkeypatch.setattr(api, "_responses", {})
+    monkeypatch.setattr(metrics, "_tables", {})
+    server = api.serve(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def get(port, path, **headers):
+    connection = http.client.HTTPConnection("127.0.0.1", port)
+    connection.request("GET", path, headers=headers)
+    reply = connection.getresponse()
+    body = reply.read()
+    connection.close()
+    return reply, body
+
+
+def test_region_values_equal_csv(server):
+    # Rates as some exports write them, not exactly voters / total_population
+    csv = pd.read_csv("Voter_Counties_data.csv")
+    csv["voter_rate"] = csv["voter_rate"].round(9)
+    csv.to_csv("Voter_Counties_data.csv", index=False)
+    # round_trip: the default parser can be off by one unit in the last place
+    csv = pd.read_csv("Voter_Counties_data.csv", float_precision="round_trip")
+    for row in csv.head(5).itertuples(index=False):
+        reply, body = get(server, "/voterchroplethmap/counties/regions/" + quote(row.County))
+        assert reply.status == 200
+        region = json.loads(body)
+        assert region["voters"] == row.voters
+        assert region["total_population"] == row.total_population
+        assert region["voter_rate"] == row.voter_rate
+
+
+def test_etag_per_encoding(server):
+    path = "/voterchroplethmap/counties"
+    plain, plain_body = get(server, path)
+    zipped, zipped_body = get(server, path, **{"Accept-Encoding": "gzip"})
+    assert zipped.getheader("Content-Encoding") == "gzip"
+    assert gzip.decompress(zipped_body) == plain_body
+    assert zipped.getheader("ETag") == plain.getheader("ETag")[:-1] + '-gz"'
+
+    reply, body = get(server, path, **{"Accept-Encoding": "gzip", "If-None-Match": zipped.getheader("ETag")})
+    assert (reply.status, body) == (304, b"")
+    # The gzipped copy's tag does not validate the plain body
+    reply, body = get(server, path, **{"If-None-Match": zipped.getheader("ETag")})
+    assert (reply.status, body) == (200, plain_body)
+
+
+@pytest.mark.parametrize("header, gzipped", [
+    ("gzip", True),
+    ("gzip;q=0", False),
+    ("gzip; q=0.0, identity", False),
+    ("br, gzip;q=0.5", True),
+    ("*", True),
+    ("*;q=0", False),
+    ("identity", False),
+])
+def test_accept_encoding_q_values(header, gzipped):
+    assert api._accepts_gzip(header) == gzipped
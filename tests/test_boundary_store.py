@@ -0,0 +1,42 @@
+import json
+
+import pytest
+
+from boundaries import cache_stats, clear_cache, file_hash, load_geojson
+from boundary_store import read_meta, store_path, write_store
+from synthetic import write_dataset
+
+FEATURES = {"type": "FeatureCollection", "features": [
+    {"type": "Feature", "properties": {"NAME": "Holed", "ID": 1, "AREA": 12.5},
+     "geometry": {"type": "Polygon", "coordinates": [
+         [[-122.5, 47.0], [-122.0, 47.0], [-122.0, 47.5], [-122.5, 47.5], [-122.5, 47.0]],
+         [[-122.3, 47.2], [-122.2, 47.2], [-122.2, 47.3], [-122.3, 47.2]],
+     ]}},
+    {"type": "Feature", "properties": {"NAME": "Islands", "ID": 2, "AREA": None},
+     "geometry": {"type": "MultiPolygon", "coordinates": [
+         [[[-123.0, 48.0], [-122.9, 48.0], [-122.9, 48.1], [-123.0, 48.0]]],
+         [[[-122.8, 48.0], [-122.7, 48.0], [-122.7, 48.1], [-122.8, 48.0]]],
+     ]}},
+    {"type": "Feature", "properties": {"NAME": "Nowhere", "ID": 3, "AREA": 0.0}, "geometry": None},
+]}
+
+
+def _round_trip(path):
+    # load_geojson from the store must give what json.load gives
+    write_store(json.loads(path.read_text()), store_path(str(path)), source_sha256=file_hash(str(path)))
+    assert read_meta(store_path(str(path))) is not None
+    clear_cache()
+    assert load_geojson(str(path)) == json.loads(path.read_text())
+    assert cache_stats()["store_loads"] == 1
+
+
+def test_store_round_trip(workdir):
+    path = workdir / "fixture.geojson"
+    path.write_text(json.dumps(FEATURES))
+    _round_trip(path)
+
+
+@pytest.mark.parametrize("name", ["CityLimits.geojson", "wa_legislative_districts.geojson"])
+def test_store_round_trip_synthetic(workdir, name):
+    write_dataset(workdir)
+    _round_trip(workdir / name)
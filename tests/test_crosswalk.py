@@ -0,0 +1,64 @@
+import os
+
+import pytest
+
+import crosswalk as crosswalk_module
+from boundaries import file_hash
+from crosswalk import area_crosswalks, breakdown, load_breakdowns, load_crosswalk, roll_crosswalks, save_crosswalks
+from layers import BOUNDARY_LAYERS
+from metrics import load_metrics
+from synthetic import ROLL_FILE, write_dataset
+
+
+@pytest.fixture
+def dataset(workdir):
+    # Synthetic CSVs spell cities "SYNTHETIC CITY 1", the boundaries "Synthetic City 1"
+    write_dataset(workdir, roll_rows=5000)
+    return workdir
+
+
+@pytest.mark.parametrize("method", ["area", "voters"])
+def test_city_breakdown_has_turnout(dataset, method):
+    if method == "area":
+        crosswalks = area_crosswalks(samples=50_000)
+    else:
+        crosswalks = roll_crosswalks(str(dataset / ROLL_FILE))
+    save_crosswalks(crosswalks, method, {}, folder=str(dataset / "crosswalks"))
+    crosswalk = load_crosswalk("County", "City", folder=str(dataset / "crosswalks"))
+
+    # The dashboards' table, keyed by feature names
+    table = load_metrics(BOUNDARY_LAYERS["City"])
+    total = sum(
+        breakdown(crosswalk, table, county)["total_population"].sum()
+        for county in set(crosswalk.source_keys.tolist())
+    )
+    # Every city's people are split over the counties it overlaps
+    overlapping = set(crosswalk.target_keys[crosswalk.cols].tolist())
+    expected = table.loc[table["City"].astype(str).isin(overlapping), "total_population"].sum()
+    assert expected > 0
+    assert total == pytest.approx(expected)
+
+
+def test_breakdowns_are_kept_until_the_crosswalk_changes(dataset, monkeypatch):
+    folder = str(dataset / "crosswalks")
+    save_crosswalks(area_crosswalks(samples=20_000), "area", {}, folder=folder)
+    crosswalk = load_crosswalk("County", "City", folder=folder)
+    table = load_metrics(BOUNDARY_LAYERS["City"])
+
+    breakdowns = load_breakdowns("County", "City", folder=folder)
+    county = next(iter(breakdowns))
+    expected = breakdown(crosswalk, table, county)
+    assert breakdowns[county]["total_population"].sum() == pytest.approx(expected["total_population"].sum())
+
+    # A rerun reuses them without reading the cross-walk again
+    monkeypatch.setattr(crosswalk_module, "load_crosswalk", None)
+    assert load_breakdowns("County", "City", folder=folder) is breakdowns
+
+
+def test_crosswalk_of_a_deleted_roll_is_not_used(dataset):
+    roll = str(dataset / ROLL_FILE)
+    folder = str(dataset / "crosswalks")
+    save_crosswalks(roll_crosswalks(roll), "voters", {roll: file_hash(roll)}, folder=folder)
+    assert load_crosswalk("County", "City", folder=folder) is not None
+    os.remove(roll)
+    assert load_crosswalk("County", "City", folder=folder) is None
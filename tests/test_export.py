@@ -0,0 +1,43 @@
+import pytest
+
+import export
+from anchors import load_anchors
+from export import export_section, page_figure
+from layers import DASHBOARDS
+from render import build_figure
+from synthetic import write_dataset
+
+
+@pytest.mark.parametrize("section", ["Cities", "School Districts"])
+def test_one_pager_labels_its_region(workdir, section):
+    write_dataset(workdir)
+    layer = DASHBOARDS["VoterChroplethMap"][section]
+    state, _ = build_figure(layer)
+    # Regions whose labels the whole-state map leaves out
+    names = load_anchors(layer.geojson_path, layer.feature_key)["name"]
+    hidden = [name for name in names if name not in set(state.data[-1].text)][:5]
+    assert hidden
+
+    for region in hidden:
+        page = page_figure(layer, region)
+        assert region in page.data[-1].text
+        assert len(page.data[-1].text) > len(state.data[-1].text)
+
+
+def _failing_section(dashboard, section, *args):
+    # Runs in the worker (forked, so it sees the patched module)
+    if section == "Cities":
+        raise RuntimeError("worker failed")
+    return export_section(dashboard, section, *args)
+
+
+def test_manifest_survives_a_failing_section(workdir, monkeypatch):
+    write_dataset(workdir)
+    out_dir = str(workdir / "exports")
+    monkeypatch.setattr(export, "export_section", _failing_section)
+    with pytest.raises(RuntimeError, match="worker failed"):
+        export.export_all(out_dir, formats=("html",), workers=2, plotlyjs="cdn")
+
+    manifest = export.read_manifest(out_dir)
+    assert "VoterChroplethMap/counties.html" in manifest
+    assert not any(path.startswith("VoterChroplethMap/cities") for path in manifest)
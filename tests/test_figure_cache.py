@@ -0,0 +1,26 @@
+import plotly.io as pio
+import pytest
+
+from figure_cache import figure_size
+from layers import VOTER_LAYERS
+from render import build_figure, figure_key
+from synthetic import write_dataset
+
+
+@pytest.fixture
+def dataset(workdir):
+    write_dataset(workdir)
+    return workdir
+
+
+def test_figure_key_is_stable_from_the_first_run(dataset):
+    layer = VOTER_LAYERS["Cities"]
+    key = figure_key(layer)
+    build_figure(layer)
+    assert figure_key(layer) == key
+
+
+@pytest.mark.parametrize("section", ["Counties", "Cities"])
+def test_figure_size_estimate(dataset, section):
+    fig, _ = build_figure(VOTER_LAYERS[section])
+    assert figure_size(fig) == pytest.approx(len(pio.to_json(fig, validate=False)), rel=0.25)
@@ -0,0 +1,69 @@
+import os
+
+from keymatch import keymap_path, load_keymap, read_keymap
+from layers import VOTER_LAYERS
+
+LAYER = VOTER_LAYERS["Cities"]
+FEATURES = ["Aberdeen", "Airway Heights", "Seattle"]
+
+
+def _write(rows):
+    path = keymap_path(LAYER)
+    lines = ["csv_key,feature_key,method,score"] + [",".join(row) for row in rows]
+    with open(path, "w") as file:
+        file.write("\n".join(lines) + "\n")
+
+
+def test_manual_row_survives_a_csv_without_its_key(workdir):
+    (workdir / "keymaps").mkdir()
+    _write([("Airway Hts", "Airway Heights", "manual", "1.0")])
+
+    # A CSV without "Airway Hts" adds its own keys ...
+    keymap = load_keymap(LAYER, ["Aberdeen", "Seatle"], FEATURES)
+    assert set(keymap["csv_key"]) == {"Aberdeen", "Airway Hts", "Seatle"}
+
+    # ... and the hand-made row is still on disk
+    stored = read_keymap(keymap_path(LAYER)).set_index("csv_key")
+    assert stored.loc["Airway Hts", "feature_key"] == "Airway Heights"
+    assert stored.loc["Airway Hts", "method"] == "manual"
+
+
+def test_rows_of_unseen_keys_are_kept(workdir):
+    (workdir / "keymaps").mkdir()
+    load_keymap(LAYER, ["Aberdeen", "Seattle"], FEATURES)
+    load_keymap(LAYER, ["Aberdeen"], FEATURES)
+    assert set(read_keymap(keymap_path(LAYER))["csv_key"]) == {"Aberdeen", "Seattle"}
+
+
+def test_row_of_a_removed_feature_is_matched_again(workdir):
+    (workdir / "keymaps").mkdir()
+    _write([("Seattle", "Seattle City", "fuzzy", "0.9")])
+    keymap = load_keymap(LAYER, ["Seattle"], FEATURES).set_index("csv_key")
+    assert keymap.loc["Seattle", "feature_key"] == "Seattle"
+
+
+def test_unmatched_key_is_tried_again_only_for_new_features(workdir, monkeypatch):
+    import keymatch
+
+    (workdir / "keymaps").mkdir()
+    load_keymap(LAYER, ["Aberdeen", "Nowhere"], FEATURES)
+
+    def no_matching(*args):
+        raise AssertionError("matched again")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(keymatch, "match_keys", no_matching)
+        keymap = load_keymap(LAYER, ["Aberdeen", "Nowhere"], FEATURES).set_index("csv_key")
+    assert keymap.loc["Nowhere", "method"] == "unmatched"
+
+    keymap = load_keymap(LAYER, ["Aberdeen", "Nowhere"], FEATURES + ["Nowhere"]).set_index("csv_key")
+    assert keymap.loc["Nowhere", "feature_key"] == "Nowhere"
+
+
+def test_key_map_is_kept_next_to_the_csv(workdir, monkeypatch):
+    import keymatch
+
+    monkeypatch.setattr(keymatch, "KEYMAP_DIR", "keymaps")
+    load_keymap(LAYER, ["Aberdeen"], FEATURES)
+    assert keymap_path(LAYER) == str(workdir / "keymaps" / os.path.basename(keymap_path(LAYER)))
+    assert os.path.exists(keymap_path(LAYER))
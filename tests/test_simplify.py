@@ -0,0 +1,39 @@
+import json
+
+from boundaries import load_geojson
+from simplify import _vertex_owners, lod_path, misaligned_borders, vertex_count, write_levels
+from synthetic import tessellate
+
+
+def _write_boundary(path, seed, regions=4, edge_vertices=20):
+    rings = tessellate(regions, edge_vertices=edge_vertices, seed=seed).tolist()
+    features = [
+        {"type": "Feature", "properties": {"NAME": str(number)}, "geometry": {"type": "Polygon", "coordinates": [ring]}}
+        for number, ring in enumerate(rings)
+    ]
+    with open(path, "w") as file:
+        json.dump({"type": "FeatureCollection", "features": features}, file)
+
+
+def test_stale_levels_are_not_used(workdir):
+    path = str(workdir / "regions.geojson")
+    _write_boundary(path, seed=0)
+    write_levels(path, zooms=[7])
+    assert lod_path(path, zoom=6).endswith("regions.z7.geojson")
+
+    # The boundary file is replaced: its old simplified copy must not be drawn
+    _write_boundary(path, seed=1)
+    assert lod_path(path, zoom=6) == path
+
+
+def test_shared_borders_stay_aligned_at_every_level(workdir):
+    path = str(workdir / "regions.geojson")
+    _write_boundary(path, seed=3, regions=2, edge_vertices=200)
+    original = load_geojson(path)
+    assert any(len(owners) > 1 for owners in _vertex_owners(original).values())
+
+    for row in write_levels(path):
+        with open(str(workdir / "simplified" / f"regions.z{row['zoom']}.geojson")) as file:
+            level = json.load(file)
+        assert vertex_count(level) < vertex_count(original)
+        assert misaligned_borders(original, level) == 0
@@ -0,0 +1,37 @@
+import numpy as np
+
+from spatial_index import build_index, locate
+
+
+def _square(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1], [x0, y0]]
+
+
+def _feature(name, geometry_type, coordinates):
+    return {"type": "Feature", "properties": {"NAME": name}, "geometry": {"type": geometry_type, "coordinates": coordinates}}
+
+
+# A city with a hole, a smaller one inside that hole and one made of two islands
+BOUNDARIES = {"type": "FeatureCollection", "features": [
+    _feature("Donut", "Polygon", [_square(0, 0, 10, 10), _square(4, 4, 6, 6)]),
+    _feature("Plug", "Polygon", [_square(4.5, 4.5, 5.5, 5.5)]),
+    _feature("Islands", "MultiPolygon", [[_square(20, 0, 22, 2)], [_square(25, 0, 27, 2)]]),
+]}
+
+
+def test_locate_points_in_holes_islands_and_outside():
+    index = build_index(BOUNDARIES, "NAME")
+    points = {
+        (1, 1): "Donut",
+        (9.5, 5): "Donut",
+        (5, 5): "Plug",          # Inside the hole, in the city filling it
+        (4.2, 4.2): None,        # Inside the hole, in no city
+        (21, 1): "Islands",
+        (26, 1): "Islands",
+        (23.5, 1): None,         # Between the islands
+        (15, 5): None,           # Unincorporated, inside the layer's extent
+        (-50, 60): None,         # Outside the extent
+    }
+    lon, lat = np.array(list(points), dtype=float).T
+    found = locate(index, lon, lat)
+    assert [index.keys[position] if position >= 0 else None for position in found] == list(points.values())
@@ -0,0 +1,80 @@
+"""Per-section render timings for the dashboards.
+
+The sidebar always lists the last render time of each section. Turning on
+"Stage timings" also measures the spans of every stage (see spans.py) and
+shows the last rerun's breakdown plus running percentiles per stage.
+"""
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from spans import LOG_SPANS, collect
+
+# Stage durations remembered per section for the percentiles
+HISTORY = 200
+
+
+def run_section(name, render):
+    # Render one map section and remember how long it took for this session;
+    # stage spans are collected only when the panel or span logging is on
+    if not (LOG_SPANS or st.session_state.get("timing_panel")):
+        start = time.perf_counter()
+        render()
+        elapsed = time.perf_counter() - start
+    else:
+        with collect(name) as spans:
+            start = time.perf_counter()
+            render()
+            elapsed = time.perf_counter() - start
+        spans.append({"stage": "section", "parent": None, "ms": elapsed * 1000})
+        _record_spans(name, spans)
+    st.session_state.setdefault("section_timings", {})[name] = elapsed
+    return elapsed
+
+
+def _record_spans(name, spans):
+    st.session_state["last_spans"] = (name, spans)
+    history = st.session_state.setdefault("stage_history", {}).setdefault(name, {})
+    totals = {}
+    for entry in spans:
+        # A stage entered several times in one rerun counts once, summed
+        totals[entry["stage"]] = totals.get(entry["stage"], 0.0) + entry["ms"]
+    for stage, ms in totals.items():
+        history.setdefault(stage, deque(maxlen=HISTORY)).append(ms)
+
+
+def stage_percentiles(history):
+    # p50/p90/p99 of each stage's durations (ms) over the remembered reruns
+    rows = []
+    for stage, durations in history.items():
+        p50, p90, p99 = np.percentile(list(durations), [50, 90, 99])
+        rows.append({"stage": stage, "reruns": len(durations), "p50": p50, "p90": p90, "p99": p99})
+    return pd.DataFrame(rows, columns=["stage", "reruns", "p50", "p90", "p99"]).round(1)
+
+
+def show_section_timings():
+    # Sidebar table with the last render time of every section viewed so far
+    timings = st.session_state.get("section_timings", {})
+    if timings:
+        st.sidebar.caption("Last render time per section")
+        st.sidebar.dataframe(
+            pd.DataFrame(
+                {"section": list(timings), "ms": [round(seconds * 1000, 1) for seconds in timings.values()]}
+            ),
+            hide_index=True,
+        )
+
+    if not st.sidebar.toggle("Stage timings", key="timing_panel"):
+        return
+    last = st.session_state.get("last_spans")
+    if last is None:
+        st.sidebar.caption("Stage timings start with the next rerun.")
+        return
+    name, spans = last
+    st.sidebar.caption(f"Last rerun of {name} by stage (stages nest inside their parent)")
+    st.sidebar.dataframe(pd.DataFrame(spans).round({"ms": 1}), hide_index=True)
+    st.sidebar.caption(f"{name}: ms per stage over the last {HISTORY} reruns")
+    st.sidebar.dataframe(stage_percentiles(st.session_state["stage_history"][name]), hide_index=True)
@@ -0,0 +1,359 @@
+"""Zoom-pyramided GeoJSON tiles for the large boundary layers.
+
+A boundary file is cut into XYZ (Web Mercator, 512 px) tiles for every zoom
+in TILE_ZOOMS. Each zoom starts from a topology-preserving simplification
+for that zoom (see simplify.py); every feature is then clipped to each tile
+it overlaps. A tile is a FeatureCollection of the clipped polygons plus an
+"outlines" member with the feature borders inside the tile, clipped as
+lines, so the cuts along tile edges are never drawn. Tiles are written to
+tiles/<boundary name>/<z>/<x>/<y>.geojson next to the boundary file, with a
+meta.json recording the hash of the file they were cut from.
+
+A map zoomed into part of the state loads only the tiles under its viewport
+(viewport_geojson), merges each feature's pieces and colors them from the
+metric tables like any other choropleth. The same tiles can be served to
+other clients by a small sidecar HTTP server.
+
+Usage:
+    python vector_tiles.py CityLimits.geojson Washington_School_Districts_2024.geojson
+    python vector_tiles.py CityLimits.geojson --serve 8765    # build if stale, then serve /<name>/<z>/<x>/<y>.geojson
+"""
+import argparse
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import plotly.graph_objects as go
+
+from boundaries import file_hash, file_signature, geometry_polygons, load_geojson
+from simplify import PRECISION, simplify_geojson, tolerance_for_zoom
+
+TILE_ZOOMS = (6, 7, 8, 9, 10, 11, 12)
+TILE_SIZE = 512
+MAX_LATITUDE = 85.05112878
+
+# Parsed tiles keyed by path, with the signature they were read at
+_tiles = {}
+_lock = threading.Lock()
+
+
+def tile_dir(geojson_path):
+    folder, name = os.path.split(geojson_path)
+    return os.path.join(folder, "tiles", os.path.splitext(name)[0])
+
+
+def world_xy(lon, lat):
+    # Web Mercator positions in [0, 1) x [0, 1), y growing southwards; lon
+    # and lat may be scalars or arrays
+    lat = np.radians(np.clip(np.asarray(lat, dtype=float), -MAX_LATITUDE, MAX_LATITUDE))
+    x = (np.asarray(lon, dtype=float) + 180) / 360
+    y = 0.5 - np.log((1 + np.sin(lat)) / (1 - np.sin(lat))) / (4 * np.pi)
+    return x, y
+
+
+def _lon_lat(x, y):
+    return x * 360 - 180, math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+
+
+def tile_bounds(z, x, y):
+    # (west, south, east, north) of a tile in degrees
+    west, north = _lon_lat(x / 2 ** z, y / 2 ** z)
+    east, south = _lon_lat((x + 1) / 2 ** z, (y + 1) / 2 ** z)
+    return west, south, east, north
+
+
+def tile_range(bounds, z):
+    # Tiles (x0, y0, x1, y1 inclusive) covering a lon/lat box at zoom z
+    west, south, east, north = bounds
+    x0, y0 = world_xy(west, north)
+    x1, y1 = world_xy(east, south)
+    last = 2 ** z - 1
+    return (
+        max(0, min(last, int(x0 * 2 ** z))), max(0, min(last, int(y0 * 2 ** z))),
+        max(0, min(last, int(x1 * 2 ** z))), max(0, min(last, int(y1 * 2 ** z))),
+    )
+
+
+def tile_zoom(zoom):
+    # Tile level drawn at a map zoom: one finer than the floor, so tiles show
+    # at 256-512 px and a viewport reads little beyond its edges. Tiles are
+    # simplified for their own zoom, which is then always detailed enough.
+    return max(TILE_ZOOMS[0], min(TILE_ZOOMS[-1], int(math.floor(zoom)) + 1))
+
+
+def viewport_bounds(view, width, height):
+    # (west, south, east, north) visible in a width x height px map centered
+    # on view = (lon, lat, zoom)
+    lon, lat, zoom = view
+    x, y = world_xy(lon, lat)
+    half_x = width / 2 / (TILE_SIZE * 2 ** zoom)
+    half_y = height / 2 / (TILE_SIZE * 2 ** zoom)
+    west, north = _lon_lat(max(0.0, x - half_x), max(0.0, y - half_y))
+    east, south = _lon_lat(min(1.0, x + half_x), min(1.0, y + half_y))
+    return west, south, east, north
+
+
+def fit_view(bounds, width, height, padding=0.1):
+    # (lon, lat, zoom) that shows a lon/lat box in a width x height px map
+    west, south, east, north = bounds
+    x0, y0 = world_xy(west, north)
+    x1, y1 = world_xy(east, south)
+    span = max((x1 - x0) / width, (y1 - y0) / height, 1e-12) * (1 + 2 * padding)
+    zoom = math.log2(1 / (span * TILE_SIZE))
+    lon, lat = _lon_lat((x0 + x1) / 2, (y0 + y1) / 2)
+    return round(lon, 5), round(lat, 5), round(zoom, 2)
+
+
+def _clip_ring(ring, bounds):
+    # Sutherland-Hodgman: the part of a closed ring inside an axis-aligned box
+    west, south, east, north = bounds
+    edges = (
+        (lambda p: p[0] >= west, lambda a, b: (west, a[1] + (b[1] - a[1]) * (west - a[0]) / (b[0] - a[0]))),
+        (lambda p: p[0] <= east, lambda a, b: (east, a[1] + (b[1] - a[1]) * (east - a[0]) / (b[0] - a[0]))),
+        (lambda p: p[1] >= south, lambda a, b: (a[0] + (b[0] - a[0]) * (south - a[1]) / (b[1] - a[1]), south)),
+        (lambda p: p[1] <= north, lambda a, b: (a[0] + (b[0] - a[0]) * (north - a[1]) / (b[1] - a[1]), north)),
+    )
+    points = [tuple(point[:2]) for point in ring[:-1]]
+    for inside, cross in edges:
+        if not points:
+            break
+        clipped = []
+        previous = points[-1]
+        for point in points:
+            if inside(point):
+                if not inside(previous):
+                    clipped.append(cross(previous, point))
+                clipped.append(point)
+            elif inside(previous):
+                clipped.append(cross(previous, point))
+            previous = point
+        points = clipped
+    if len(points) < 3:
+        return None
+    return [[round(x, PRECISION), round(y, PRECISION)] for x, y in points + points[:1]]
+
+
+def _clip_segment(a, b, bounds):
+    # Liang-Barsky: the part of segment a-b inside the box, or None
+    west, south, east, north = bounds
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    low, high = 0.0, 1.0
+    for p, q in ((-dx, a[0] - west), (dx, east - a[0]), (-dy, a[1] - south), (dy, north - a[1])):
+        if p == 0:
+            if q < 0:
+                return None
+        elif p < 0:
+            low = max(low, q / p)
+        else:
+            high = min(high, q / p)
+        if low > high:
+            return None
+    return (a[0] + low * dx, a[1] + low * dy), (a[0] + high * dx, a[1] + high * dy)
+
+
+def _clip_lines(ring, bounds):
+    # The ring's borders inside the box as polylines
+    lines = []
+    current = None
+    for a, b in zip(ring[:-1], ring[1:]):
+        segment = _clip_segment(a, b, bounds)
+        if segment is None:
+            current = None
+            continue
+        start, end = ([round(value, PRECISION) for value in point] for point in segment)
+        if current is None or current[-1] != start:
+            current = [start]
+            lines.append(current)
+        current.append(end)
+    return lines
+
+
+def _bounds(polygons):
+    xs = [point[0] for polygon in polygons for point in polygon[0]]
+    ys = [point[1] for polygon in polygons for point in polygon[0]]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def cut_tiles(geojson_data, key_property, z):
+    # {(x, y): tile FeatureCollection} of one zoom level
+    simplified = simplify_geojson(geojson_data, tolerance_for_zoom(z))
+    tiles = {}
+    for feature in simplified["features"]:
+        polygons = [polygon for polygon in geometry_polygons(feature["geometry"]) if polygon and len(polygon[0]) >= 4]
+        if not polygons:
+            continue
+        x0, y0, x1, y1 = tile_range(_bounds(polygons), z)
+        for x in range(x0, x1 + 1):
+            for y in range(y0, y1 + 1):
+                bounds = tile_bounds(z, x, y)
+                pieces, outlines = [], []
+                for polygon in polygons:
+                    outer = _clip_ring(polygon[0], bounds)
+                    if outer is not None:
+                        holes = [hole for hole in (_clip_ring(ring, bounds) for ring in polygon[1:]) if hole]
+                        pieces.append([outer] + holes)
+                    for ring in polygon:
+                        outlines.extend(_clip_lines(ring, bounds))
+                if not pieces:
+                    continue
+                tile = tiles.setdefault((x, y), {"type": "FeatureCollection", "features": [], "outlines": []})
+                tile["features"].append({
+                    "type": "Feature",
+                    "properties": {key_property: feature["properties"].get(key_property)},
+                    "geometry": {"type": "MultiPolygon", "coordinates": pieces},
+                })
+                tile["outlines"].extend(outlines)
+    return tiles
+
+
+def build_tiles(geojson_path, key_property, zooms=TILE_ZOOMS):
+    # Cut the whole pyramid into a fresh folder, then swap it in; returns
+    # the number of tiles per zoom
+    original = load_geojson(geojson_path)
+    target = tile_dir(geojson_path)
+    parent = os.path.dirname(target)
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=parent, prefix=".building-")
+    counts = {}
+    for z in zooms:
+        tiles = cut_tiles(original, key_property, z)
+        counts[z] = len(tiles)
+        for (x, y), tile in tiles.items():
+            folder = os.path.join(staging, str(z), str(x))
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, f"{y}.geojson"), "w") as file:
+                json.dump(tile, file, separators=(",", ":"))
+    # meta.json goes last so a half-built pyramid is never used
+    with open(os.path.join(staging, "meta.json"), "w") as file:
+        json.dump({
+            "source_sha256": file_hash(geojson_path),
+            "key_property": key_property,
+            "zooms": list(zooms),
+            "tiles": {str(z): count for z, count in counts.items()},
+        }, file)
+    if os.path.exists(target):
+        shutil.rmtree(target)
+    os.replace(staging, target)
+    return counts
+
+
+def read_meta(geojson_path, key_property):
+    # The pyramid's meta.json when it was cut from the current boundary file
+    # with this key property, otherwise None
+    try:
+        with open(os.path.join(tile_dir(geojson_path), "meta.json"), "r") as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return None
+    if meta.get("source_sha256") != file_hash(geojson_path) or meta.get("key_property") != key_property:
+        return None
+    return meta
+
+
+def load_tile(geojson_path, z, x, y):
+    # One parsed tile (shared, read-only), or None where the layer has no
+    # features
+    path = os.path.join(tile_dir(geojson_path), str(z), str(x), f"{y}.geojson")
+    try:
+        signature = file_signature(path)
+    except OSError:
+        return None
+    with _lock:
+        entry = _tiles.get(path)
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+    with open(path, "r") as file:
+        tile = json.load(file)
+    with _lock:
+        _tiles[path] = (signature, tile)
+    return tile
+
+
+def viewport_geojson(geojson_path, key_property, view, width, height):
+    # Features under a viewport, assembled from the tiles it covers: a
+    # FeatureCollection with one MultiPolygon per feature, the feature
+    # borders as polylines, and the number of tiles read
+    z = tile_zoom(view[2])
+    x0, y0, x1, y1 = tile_range(viewport_bounds(view, width, height), z)
+    pieces = {}
+    outlines = []
+    tiles = 0
+    for x in range(x0, x1 + 1):
+        for y in range(y0, y1 + 1):
+            tile = load_tile(geojson_path, z, x, y)
+            if tile is None:
+                continue
+            tiles += 1
+            for feature in tile["features"]:
+                pieces.setdefault(feature["properties"][key_property], []).extend(feature["geometry"]["coordinates"])
+            outlines.extend(tile["outlines"])
+    features = [
+        {"type": "Feature", "properties": {key_property: key}, "geometry": {"type": "MultiPolygon", "coordinates": polygons}}
+        for key, polygons in pieces.items()
+    ]
+    return {"type": "FeatureCollection", "features": features}, outlines, tiles
+
+
+def outline_trace(outlines, width=1.2, color="#444"):
+    # All borders as one line trace, polylines separated by gaps
+    lon, lat = [], []
+    for line in outlines:
+        lon.extend([point[0] for point in line] + [None])
+        lat.extend([point[1] for point in line] + [None])
+    return go.Scattermapbox(
+        lon=lon,
+        lat=lat,
+        mode="lines",
+        line={"width": width, "color": color},
+        hoverinfo="skip",
+        showlegend=False,
+    )
+
+
+def _serve(folder, port):
+    class TileHandler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=folder, **kwargs)
+
+        def end_headers(self):
+            # Tiles only change when rebuilt, under a new meta.json
+            self.send_header("Cache-Control", "public, max-age=3600")
+            self.send_header("Access-Control-Allow-Origin", "*")
+            super().end_headers()
+
+        def guess_type(self, path):
+            return "application/geo+json" if path.endswith(".geojson") else super().guess_type(path)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), TileHandler)
+    print(f"serving {folder} on http://127.0.0.1:{port}/<name>/<z>/<x>/<y>.geojson")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    from layers import VOTER_LAYERS
+
+    parser = argparse.ArgumentParser(description="Cut boundary GeoJSON files into zoom-pyramided tiles.")
+    parser.add_argument("geojson", nargs="+", help="GeoJSON file(s) to tile")
+    parser.add_argument("--key", help="Feature property naming each region (default: the layer's)")
+    parser.add_argument("--zooms", nargs="+", type=int, default=list(TILE_ZOOMS), help="Tile zoom levels")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="Serve the tiles over HTTP afterwards")
+    parser.add_argument("--force", action="store_true", help="Rebuild even when the tiles are up to date")
+    args = parser.parse_args()
+
+    keys = {layer.geojson_path: layer.feature_key for layer in VOTER_LAYERS.values()}
+    for path in args.geojson:
+        key = args.key or keys.get(os.path.basename(path))
+        if key is None:
+            parser.error(f"no layer uses {path}; pass --key")
+        if not args.force and read_meta(path, key) is not None:
+            print(f"{tile_dir(path)}: up to date")
+            continue
+        counts = build_tiles(path, key, args.zooms)
+        print(f"{tile_dir(path)}: " + ", ".join(f"z{z} {count} tiles" for z, count in counts.items()))
+    if args.serve:
+        _serve(os.path.join(os.path.dirname(os.path.abspath(args.geojson[0])), "tiles"), args.serve)